@@ -16,9 +16,8 @@ from datetime import datetime, timedelta
 path.append(os.getcwd())
 from system_logger_tool import sys_log_logger_get_module_logger # pylint: disable=wrong-import-position
 log = sys_log_logger_get_module_logger(__name__)
-from system_shared_tool import SysShdIpcChanC # pylint: disable=wrong-import-position
 #######################          PROJECT IMPORTS         #######################
-from can_sniffer import DrvCanCmdTypeE, DrvCanCmdDataC, DrvCanFilterC, DrvCanMessageC
+from can_sniffer import DrvCanCmdTypeE, DrvCanCmdDataC, DrvCanFilterC, DrvCanMessageC, DrvCanChanC
 from wattrex_driver_base import DrvBaseStatusE, DrvBaseStatusC
 
 #######################          MODULE IMPORTS          #######################
@@ -43,9 +42,12 @@ class DrvBmsDataC(): #pylint: disable=too-many-instance-attributes
     '''
     Class method to create a DRVDB model of database BMS.
     '''
-    def __init__(self, list_measures: list) -> None:
+    def __init__(self, list_measures: list, timestamp: float = 0.0) -> None:
         log.debug(f"Writting data: {list_measures}")
         self.__status = DrvBaseStatusC(DrvBaseStatusE.OK)
+        # Time when the CAN interface received the first fragment of the measures,
+        # 0 if they have not been received
+        self.timestamp: float = timestamp
         self.vcell1: int = 0
         self.vcell2: int = 0
         self.vcell3: int = 0
@@ -128,7 +130,7 @@ class DrvBmsDataC(): #pylint: disable=too-many-instance-attributes
                 f"temp1: {self.temp1} temp2: {self.temp2}\n"
                 f"temp3: {self.temp3} temp4: {self.temp4}\n"
                 f"pres1: {self.pres1} pres2: {self.pres2}\n"
-                f"status: {self.status}")
+                f"status: {self.status} timestamp: {self.timestamp}")
 
 
 class DrvBmsDeviceC: #pylint: disable=too-many-instance-attributes
@@ -139,11 +141,11 @@ class DrvBmsDeviceC: #pylint: disable=too-many-instance-attributes
         log.info(f"Device ID: {self.__can_id: 03x}")
         self.__data = DrvBmsDataC([])
         self.__data.status = DrvBaseStatusC(DrvBaseStatusE.OK)
-        self.__tx_chan = SysShdIpcChanC(name = DEFAULT_TX_CHAN)
+        self.__tx_chan = DrvCanChanC(name = DEFAULT_TX_CHAN)
         self.__rx_chan_name = rx_chan_name + '_' + str(f'{self.__can_id & 0x00F:02x}')
-        self.__rx_chan = SysShdIpcChanC(name = self.__rx_chan_name,
-                                      max_msg = DEFAULT_MAX_MSG,
-                                      max_message_size = DEFAULT_MAX_MESSAGE_SIZE)
+        self.__rx_chan = DrvCanChanC(name = self.__rx_chan_name,
+                                     max_msg = DEFAULT_MAX_MSG,
+                                     max_message_size = DEFAULT_MAX_MESSAGE_SIZE)
         filter_bms = DrvCanFilterC(addr=self.__can_id, mask=0x7FF, chan_name=self.__rx_chan_name)
         add_msg = DrvCanCmdDataC(data_type = DrvCanCmdTypeE.ADD_FILTER,
                                 payload = filter_bms)
@@ -161,7 +163,7 @@ class DrvBmsDeviceC: #pylint: disable=too-many-instance-attributes
         """
         while not self.__rx_chan.is_empty():
             raw_data: DrvCanMessageC = self.__rx_chan.receive_data_unblocking()
-            self._defragment(raw_data.payload)
+            self._defragment(raw_data.payload, raw_data.timestamp)
         # Check if message receive between expected time
         if self.__last_recv_ts + timedelta(seconds=DEFAULT_TIMEOUT_RESPONSE) < datetime.now():
             if self.__data.status == DrvBaseStatusE.OK:
@@ -176,9 +178,10 @@ class DrvBmsDeviceC: #pylint: disable=too-many-instance-attributes
         """
         self.__raw_data = []
         self.__next_idx_frag = 0
+        self.__raw_timestamp: float = 0.0
 
 
-    def _defragment(self, data) -> None:
+    def _defragment(self, data, timestamp: float = 0.0) -> None:
         '''
         Defragment the message received from BMS with can_id. When all fragments has
         been received and defragmented, the resulting message is parsed and stored
@@ -187,6 +190,8 @@ class DrvBmsDeviceC: #pylint: disable=too-many-instance-attributes
         Args:
             id (int): Identificator of the sender bms.
             data ([type]): Data to be defragmented.
+            timestamp (float, optional): Time when the CAN interface received the fragment.
+                Defaults to 0.0.
         '''
         # Prase ids and frags
         frag_idx = 0xF & data[0]
@@ -209,6 +214,8 @@ class DrvBmsDeviceC: #pylint: disable=too-many-instance-attributes
                 self.__data.status = DrvBaseStatusC(DrvBaseStatusE.COMM_ERROR)
                 self.__reset_raw_data()
             else:
+                if frag_idx == 0:
+                    self.__raw_timestamp = timestamp
                 self.__raw_data.extend(data[1:])
 
                 # Prepare for new fragment reception
@@ -226,7 +233,7 @@ class DrvBmsDeviceC: #pylint: disable=too-many-instance-attributes
                             new_elem = self.__raw_data[i+1] << 8 | self.__raw_data[i]
                             new_data.append(new_elem)
 
-                        self.__data = DrvBmsDataC(new_data)
+                        self.__data = DrvBmsDataC(new_data, self.__raw_timestamp)
                         ## RESET TIMEOUT
                         self.__last_recv_ts = datetime.now()
                         self.__data.status = DrvBaseStatusC(DrvBaseStatusE.OK)
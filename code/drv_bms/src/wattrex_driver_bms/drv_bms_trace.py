@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+'''
+Offline decoding of traces of the bms into columnar numpy arrays.
+numpy is an optional dependency of the package, installed with the extra trace, so this module is
+not imported by the package and has to be imported as wattrex_driver_bms.drv_bms_trace.
+'''
+
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+
+#######################         GENERIC IMPORTS          #######################
+from typing import Dict, Iterator, List
+#######################       THIRD PARTY IMPORTS        #######################
+import numpy as np
+#######################      SYSTEM ABSTRACTION IMPORTS  #######################
+from system_logger_tool import sys_log_logger_get_module_logger
+log = sys_log_logger_get_module_logger(__name__)
+#######################          PROJECT IMPORTS         #######################
+from can_sniffer.can_trace import read_trace
+from can_sniffer.context import DEFAULT_TRACE_CHUNK
+
+#######################          MODULE IMPORTS          #######################
+
+######################             CONSTANTS              ######################
+from .context import DEFAULT_MEASURE_NAMES
+_FRAG_DATA_SIZE: int = 7 # Bytes of measures of each fragment, after the byte of the fragment
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvBmsTraceDecoderC:
+    '''
+    Decoder of the measures of a bms in a trace. The fragments of all the messages of a chunk
+    are joined at once, and the fragments of the last message, if it continues in the next
+    chunk, are kept until the next call.
+    '''
+    def __init__(self, can_id: int) -> None:
+        '''
+        Args:
+            can_id (int): Id of the bms, as given to DrvBmsDeviceC.
+        '''
+        self.__addr: int = (int(0x100) | can_id) & 0x7FF
+        self.__n_measures: int = len(DEFAULT_MEASURE_NAMES)
+        # Frames of the message not finished in the previous chunk: timestamp, dlc, payload
+        self.__pending: List[np.ndarray] = [np.empty(0, dtype= np.float64),
+                                            np.empty(0, dtype= np.uint8),
+                                            np.empty((0, 8), dtype= np.uint8)]
+
+    def decode(self, timestamp: np.ndarray, addr: np.ndarray, dlc: np.ndarray,
+               payload: np.ndarray) -> Dict[str, np.ndarray]:
+        '''
+        Decode the measures of the bms received in a chunk of a trace. Only the messages with all
+        their fragments in order and with every measure are decoded, as DrvBmsDeviceC does.
+
+        Args:
+            timestamp (np.ndarray): Time of each frame.
+            addr (np.ndarray): Id of each frame.
+            dlc (np.ndarray): Size of the payload of each frame.
+            payload (np.ndarray): Payload of each frame, uint8 with shape (frames, 8), as read
+                by can_sniffer.can_trace.read_trace.
+
+        Returns:
+            Dict[str, np.ndarray]: Column timestamp, with the time of the first fragment of
+                each message, and a column of uint16 for each measure of DEFAULT_MEASURE_NAMES.
+        '''
+        selected = addr == self.__addr
+        timestamp = np.concatenate((self.__pending[0], timestamp[selected]))
+        dlc = np.concatenate((self.__pending[1], dlc[selected]))
+        payload = np.concatenate((self.__pending[2], payload[selected]))
+        frag_idx = payload[:, 0] & 0xF
+        n_frags = payload[:, 0] >> 4
+        starts = np.flatnonzero((frag_idx == 0) & (n_frags > 0))
+        # The last message may continue in the next chunk
+        finished = starts + n_frags[starts] <= len(timestamp)
+        if len(starts) > 0 and not finished[-1]:
+            self.__pending = [timestamp[starts[-1]:], dlc[starts[-1]:], payload[starts[-1]:]]
+        else:
+            self.__pending = [timestamp[:0], dlc[:0], payload[:0]]
+        starts = starts[finished]
+        first_frags: List[np.ndarray] = []
+        measures: List[np.ndarray] = []
+        for msg_frags in np.unique(n_frags[starts]):
+            # Frames of each message, one row per message
+            frames = starts[n_frags[starts] == msg_frags][:, None] + np.arange(msg_frags)
+            frames = frames[np.all(frag_idx[frames] == np.arange(msg_frags), axis= 1)]
+            valid = np.arange(_FRAG_DATA_SIZE) < (dlc[frames].astype(np.int64) - 1)[..., None]
+            complete = valid.sum(axis= (1, 2)) == 2 * self.__n_measures
+            frames, valid = frames[complete], valid[complete]
+            data = payload[frames, 1:][valid].reshape(-1, 2 * self.__n_measures)
+            first_frags.append(frames[:, 0])
+            measures.append(data.view('<u2'))
+        first_frag = np.concatenate(first_frags) if first_frags else np.empty(0, dtype= np.int64)
+        values = (np.concatenate(measures) if measures
+                  else np.empty((0, self.__n_measures), dtype= np.uint16))
+        order = np.argsort(first_frag, kind= 'stable')
+        columns: Dict[str, np.ndarray] = {'timestamp': timestamp[first_frag[order]]}
+        for index, name in enumerate(DEFAULT_MEASURE_NAMES):
+            columns[name] = values[order, index]
+        return columns
+
+#######################            FUNCTIONS             #######################
+def read_bms_trace(file_path: str, can_id: int,
+                   chunk_size: int = DEFAULT_TRACE_CHUNK) -> Iterator[Dict[str, np.ndarray]]:
+    '''
+    Read and decode the measures of a bms in a trace in chunks, so the memory used does not
+    depend on the length of the trace.
+
+    Args:
+        file_path (str): Path of the trace, a file of the flight recorder or a log of python-can.
+        can_id (int): Id of the bms, as given to DrvBmsDeviceC.
+        chunk_size (int, optional): Max number of frames of each chunk.
+            Defaults to DEFAULT_TRACE_CHUNK.
+
+    Yields:
+        Dict[str, np.ndarray]: Columns of the measures of each chunk, as returned by
+            DrvBmsTraceDecoderC.decode.
+    '''
+    decoder = DrvBmsTraceDecoderC(can_id)
+    for chunk in read_trace(file_path, chunk_size):
+        yield decoder.decode(chunk.timestamp, chunk.addr, chunk.dlc, chunk.payload)
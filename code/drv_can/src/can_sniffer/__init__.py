@@ -2,12 +2,41 @@
 This file specifies what is going to be exported from this module.
 In this case is sys_log.
 """
-from .can_sniffer import DrvCanNodeC,DrvCanCmdDataC, DrvCanCmdTypeE, DrvCanFilterC, DrvCanMessageC
+from .can_common import (DrvCanCmdDataC, DrvCanCmdTypeE, DrvCanFilterC, DrvCanMessageC,
+                         DrvCanOverflowE, DrvCanDeliveryE, DrvCanPeriodicC, DrvCanPriorityE,
+                         DrvCanRequestC, DrvCanResponseC, DrvCanTriggerC)
+from .can_mailbox import DrvCanMailboxC
+from .can_ring import DrvCanRingC
+from .can_recorder import DrvCanRecorderC, read_record
+from .can_codec import DrvCanChanC, DrvCanTxChanC, encode_can_data, decode_can_data
+from .can_sniffer import DrvCanNodeC, DrvCanBusParamsC
+from .can_process import DrvCanProcessC
+from .can_stats import DrvCanNodeStatsC, DrvCanFilterStatsC, DrvCanBusLoadC
 
 __all__ = [
     'DrvCanNodeC',
+    'DrvCanBusParamsC',
+    'DrvCanProcessC',
     'DrvCanCmdDataC',
     'DrvCanCmdTypeE',
     'DrvCanFilterC',
-    'DrvCanMessageC'
+    'DrvCanMessageC',
+    'DrvCanOverflowE',
+    'DrvCanDeliveryE',
+    'DrvCanPeriodicC',
+    'DrvCanPriorityE',
+    'DrvCanRequestC',
+    'DrvCanResponseC',
+    'DrvCanTriggerC',
+    'DrvCanMailboxC',
+    'DrvCanRingC',
+    'DrvCanRecorderC',
+    'DrvCanNodeStatsC',
+    'DrvCanFilterStatsC',
+    'DrvCanBusLoadC',
+    'DrvCanChanC',
+    'DrvCanTxChanC',
+    'encode_can_data',
+    'decode_can_data',
+    'read_record'
 ]
@@ -0,0 +1,637 @@
+#!/usr/bin/python3
+"""
+This module contains the binary encoding of the CAN messages and commands sent
+through the IPC channels, and the channel that uses it.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from pickle import loads, dumps, HIGHEST_PROTOCOL
+from struct import Struct
+from typing import List
+
+#######################       THIRD PARTY IMPORTS        #######################
+import posix_ipc as ipc
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+from system_shared_tool import SysShdIpcChanC
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+from .can_common import (DrvCanCmdTypeE, DrvCanMessageC, DrvCanFilterC, DrvCanCmdDataC,
+                         DrvCanOverflowE, DrvCanDeliveryE, DrvCanPeriodicC, DrvCanPriorityE,
+                         DrvCanRequestC, DrvCanResponseC, DrvCanTriggerC)
+
+######################             CONSTANTS              ######################
+from .context import (DEFAULT_TIMEOUT_CHAN_RX, DEFAULT_TX_NAME, DEFAULT_CHAN_NUM_MSG,
+                      DEFAULT_MAX_MSG_SIZE)
+
+# The first byte of each encoded data identifies its layout. Pickled data always starts
+# with the byte 0x80, so both can be received through the same channel.
+_TAG_MSG: int = 0x01
+_TAG_CMD_MSG: int = 0x02
+_TAG_CMD_FILTER: int = 0x03
+_TAG_CMD_PERIODIC: int = 0x04
+_TAG_CMD_REQUEST: int = 0x05
+_TAG_RESPONSE: int = 0x06
+_TAG_CMD_BATCH: int = 0x07
+_TAG_CMD_TRIGGER: int = 0x08
+_TAGS = (_TAG_MSG, _TAG_CMD_MSG, _TAG_CMD_FILTER, _TAG_CMD_PERIODIC, _TAG_CMD_REQUEST,
+         _TAG_RESPONSE, _TAG_CMD_BATCH, _TAG_CMD_TRIGGER)
+# Message: tag, addr, dlc, bus, timestamp, payload
+_MSG_FMT = Struct('<BHBBd8s')
+# The commands start with the tag, the command type, the priority of the command and the
+# command timestamp, so they keep their priority whatever the priority of the queue is.
+# Command with message: command fields + message fields
+_CMD_MSG_FMT = Struct('<BBBdHBBd8s')
+# Command with filter: command fields, addr, mask, overflow policy, delivery, multicast, bus,
+# length of the name, followed by the name of the channel
+_CMD_FILTER_FMT = Struct('<BBBdHHBB?BB')
+# Command with periodic message: command fields, addr, dlc, bus, payload, period in ms
+_CMD_PERIODIC_FMT = Struct('<BBBdHBB8sI')
+# Command with request: command fields, addr, dlc, bus, payload, response addr, response mask,
+# timeout in ms, request id, length of the name, followed by the name of the channel
+_CMD_REQUEST_FMT = Struct('<BBBdHBB8sHHIIB')
+# Response: tag, request id, received, round trip + message fields without tag
+_RESPONSE_FMT = Struct('<BI?dHBBd8s')
+# Command with a batch: command fields, number of items, followed by the items. The items do
+# not repeat the command fields and the payloads only take their dlc, so a burst of requests
+# fits in a message of the TX channel. The batches that do not fit are split by the channel.
+_CMD_BATCH_FMT = Struct('<BBBdH')
+# Command with trigger: command fields, addr, mask, mask of the payload, bus
+_CMD_TRIGGER_FMT = Struct('<BBBdHHQB')
+_MAX_DATA_MASK: int = 2**64 - 1 # The payload of a frame takes up to 8 bytes
+# Filter of a batch: addr, mask, overflow policy, delivery, multicast, bus, length of the
+# name, followed by the name of the channel
+_BATCH_FILTER_FMT = Struct('<HHBB?BB')
+# Message of a batch: is request, addr, dlc, bus, followed by the payload
+_BATCH_MSG_FMT = Struct('<?HBB')
+# Request fields of a message of a batch: response addr, response mask, timeout in ms,
+# request id, length of the name, followed by the name of the channel
+_BATCH_REQUEST_FMT = Struct('<HHIIB')
+_BATCH_TYPES = (DrvCanCmdTypeE.ADD_FILTER_BATCH, DrvCanCmdTypeE.REMOVE_FILTER_BATCH,
+                DrvCanCmdTypeE.MESSAGE_BATCH)
+_ENCODING: str = 'utf-8'
+# Global of the class of the messages in the pickles of the versions before the binary encoding,
+# when it was defined in the module can_sniffer
+_LEGACY_MSG_GLOBAL: bytes = (b'c' + __name__.rsplit('.', 1)[0].encode(_ENCODING)
+                             + b'.can_sniffer\nDrvCanMessageC\n')
+_BULK_SUFFIX: str = '_BULK' # Suffix of the name of the queue of the bulk commands
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvCanChanC(SysShdIpcChanC):
+    """IPC channel used to send CAN messages and commands with a fixed binary layout
+    instead of pickle. Any other object is still sent pickled, and pickled data sent by
+    a SysShdIpcChanC is also received, so both can share the same queue.
+    """
+    def send_data(self, data) -> None:
+        '''
+        Push data to the queue. The commands are pushed with their priority, so the queue
+        returns them ordered by priority. The batches longer than the messages of the queue
+        are pushed as several batches.
+
+        Args:
+            data (object): Data to be pushed to the queue.
+
+        Raises:
+            ValueError: An item of the batch does not fit in a message of the queue.
+        '''
+        for encoded_data in self.__encode(data):
+            self.send(encoded_data, priority= _get_priority(data))
+
+    def send_data_unblocking(self, data) -> bool:
+        '''
+        Push data to the queue in unblocking mode. A batch split in several parts is only
+        pushed if the queue has room for all of them, so no part is pushed twice when it is
+        sent again. If other producers fill the queue meanwhile, the rest of parts wait for
+        room.
+
+        Args:
+            data (object): Data to be pushed to the queue.
+
+        Raises:
+            ValueError: An item of the batch does not fit in a message of the queue.
+
+        Returns:
+            bool: True if the data was pushed, False if the queue is full.
+        '''
+        chunks = self.__encode(data)
+        priority = _get_priority(data)
+        if len(chunks) > 1 and self.current_messages + len(chunks) > self.max_messages:
+            return False
+        if not self.send_raw_unblocking(chunks[0], priority):
+            return False
+        for encoded_data in chunks[1:]:
+            self.send(encoded_data, priority= priority)
+        return True
+
+    def __encode(self, data) -> List[bytes]:
+        '''
+        Encode data with its binary layout, or pickle it if it has not one.
+
+        Args:
+            data (object): Data to encode.
+
+        Raises:
+            ValueError: An item of the batch does not fit in a message of the queue.
+
+        Returns:
+            List[bytes]: Messages to push, several only for the batches that do not fit in one.
+        '''
+        encoded_data = None
+        if (isinstance(data, DrvCanCmdDataC) and data.data_type in _BATCH_TYPES
+            and isinstance(data.payload, (list, tuple))):
+            encoded_data = _encode_batch(data, self.max_message_size)
+        if encoded_data is None:
+            encoded_data = encode_can_data(data)
+            if encoded_data is None:
+                encoded_data = dumps(data, protocol= HIGHEST_PROTOCOL)
+            encoded_data = [encoded_data]
+        return encoded_data
+
+    def send_raw(self, encoded_data: bytes) -> None:
+        '''
+        Push data already encoded to the queue, so the same data can be encoded once
+        and sent to several channels.
+
+        Args:
+            encoded_data (bytes): Data encoded with encode_can_data.
+        '''
+        self.send(encoded_data)
+
+    def send_raw_unblocking(self, encoded_data: bytes, priority: int = 0) -> bool:
+        '''
+        Push data already encoded to the queue in unblocking mode.
+
+        Args:
+            encoded_data (bytes): Data encoded with encode_can_data.
+            priority (int, optional): Priority of the data in the queue. Defaults to 0.
+
+        Returns:
+            bool: True if the data was pushed, False if the queue is full.
+        '''
+        try:
+            self.send(encoded_data, timeout= 0, priority= priority)
+        except ipc.BusyError: #pylint: disable= c-extension-no-member
+            return False
+        return True
+
+    def receive_data(self, timeout: float|None = DEFAULT_TIMEOUT_CHAN_RX) -> object:
+        '''
+        Pop the first element from the queue and return it. If queue is empty,
+        wait until a new element is pushed to the queue or the timeout expires.
+
+        Args:
+            timeout (float|None, optional): Max time to wait in seconds, None to wait forever.
+                Defaults to DEFAULT_TIMEOUT_CHAN_RX.
+
+        Returns:
+            object: The first element of the queue.
+        '''
+        try:
+            message, _ = self.receive(timeout = timeout)
+            msg_decoded = decode_can_data(message)
+        except Exception as err:
+            log.error(f"Impossible to receive message with error: {err}")
+            raise err
+        return msg_decoded
+
+    def receive_data_unblocking(self) -> object:
+        '''
+        Receive data from the queue in unblocking mode.
+
+        Returns:
+            object: Return the first element from the queue if it is not empty.
+            Return None otherwise.
+        '''
+        return self.wait_data(timeout= 0)
+
+    def receive_raw_unblocking(self) -> bytes|None:
+        '''
+        Receive data from the queue in unblocking mode without decoding it, so the receiver
+        can check if it was pickled.
+
+        Returns:
+            bytes|None: Return the first element from the queue if it is not empty.
+            Return None otherwise.
+        '''
+        try:
+            message, _ = self.receive(timeout = 0)
+        except ipc.BusyError: #pylint: disable= c-extension-no-member
+            return None
+        return message
+
+    def wait_data(self, timeout: float) -> object:
+        '''
+        Receive data from the queue, waiting until it arrives or the timeout expires.
+
+        Args:
+            timeout (float): Max time to wait in seconds.
+
+        Returns:
+            object: Return the first element from the queue, None if the timeout expired.
+        '''
+        try:
+            message, _ = self.receive(timeout = max(timeout, 0))
+        except ipc.BusyError: #pylint: disable= c-extension-no-member
+            return None
+        return decode_can_data(message)
+
+    def drain_data(self, max_msgs: int = DEFAULT_CHAN_NUM_MSG) -> List[object]:
+        '''
+        Receive the elements of the queue in unblocking mode until it is empty. Each element
+        takes a single call to the queue, without checking first if it is empty, so draining n
+        elements takes n+1 calls.
+
+        Args:
+            max_msgs (int, optional): Max number of elements received.
+                Defaults to DEFAULT_CHAN_NUM_MSG.
+
+        Returns:
+            List[object]: Elements received, from the first of the queue.
+        '''
+        msgs: List[object] = []
+        try:
+            while len(msgs) < max_msgs:
+                message, _ = self.receive(timeout = 0)
+                msgs.append(decode_can_data(message))
+        except ipc.BusyError: #pylint: disable= c-extension-no-member
+            pass
+        return msgs
+
+class DrvCanTxChanC(DrvCanChanC):
+    """TX channel of the CAN node with a lane for each priority of the commands. The control
+    and configuration commands share the main queue, which returns them ordered by priority,
+    and the bulk commands are pushed to a second queue, so a queue full of bulk requests does
+    not block the control frames. The node always empties the main queue before reading
+    the bulk one.
+    """
+    def __init__(self, name: str = DEFAULT_TX_NAME, max_msg: int = DEFAULT_CHAN_NUM_MSG,
+                 max_message_size: int = DEFAULT_MAX_MSG_SIZE) -> None:
+        '''
+        Open or create both queues of the channel.
+
+        Args:
+            name (str, optional): Name of the main queue, the bulk queue uses the same name
+                with the suffix _BULK. Defaults to DEFAULT_TX_NAME.
+            max_msg (int, optional): Max number of messages of each queue, only used when
+                they are created. Defaults to DEFAULT_CHAN_NUM_MSG.
+            max_message_size (int, optional): Max size of each message, only used when they
+                are created. Defaults to DEFAULT_MAX_MSG_SIZE.
+        '''
+        super().__init__(name= name, max_msg= max_msg, max_message_size= max_message_size)
+        self.bulk: DrvCanChanC = DrvCanChanC(name= name + _BULK_SUFFIX, max_msg= max_msg,
+                                             max_message_size= max_message_size)
+
+    @property
+    def depth(self) -> int:
+        '''Number of commands queued in both lanes.
+        '''
+        return self.current_messages + self.bulk.current_messages
+
+    def send_data(self, data) -> None:
+        '''
+        Push data to the lane of its priority.
+
+        Args:
+            data (object): Data to be pushed to the queue.
+        '''
+        if _get_priority(data) == DrvCanPriorityE.BULK.value:
+            self.bulk.send_data(data)
+        else:
+            super().send_data(data)
+
+    def send_data_unblocking(self, data) -> bool:
+        '''
+        Push data to the lane of its priority in unblocking mode.
+
+        Args:
+            data (object): Data to be pushed to the queue.
+
+        Returns:
+            bool: True if the data was pushed, False if the lane is full.
+        '''
+        if _get_priority(data) == DrvCanPriorityE.BULK.value:
+            return self.bulk.send_data_unblocking(data)
+        return super().send_data_unblocking(data)
+
+    def receive_data_unblocking(self, bulk: bool = True) -> object:
+        '''
+        Receive the command with the highest priority in unblocking mode.
+
+        Args:
+            bulk (bool, optional): False to not read the bulk queue. Defaults to True.
+
+        Returns:
+            object: The first command of the main queue, or of the bulk queue if the main one
+            is empty. None if both are empty.
+        '''
+        data = super().receive_data_unblocking()
+        if data is None and bulk:
+            data = self.bulk.receive_data_unblocking()
+        return data
+
+    def receive_raw_unblocking(self, bulk: bool = True) -> bytes|None:
+        '''
+        Receive the command with the highest priority in unblocking mode without decoding it.
+
+        Args:
+            bulk (bool, optional): False to not read the bulk queue. Defaults to True.
+
+        Returns:
+            bytes|None: The first command of the main queue, or of the bulk queue if the main
+            one is empty. None if both are empty.
+        '''
+        data = super().receive_raw_unblocking()
+        if data is None and bulk:
+            data = self.bulk.receive_raw_unblocking()
+        return data
+
+    def terminate(self) -> None:
+        '''Close and remove both queues.
+        '''
+        super().terminate()
+        self.bulk.terminate()
+
+#######################            FUNCTIONS             #######################
+def encode_can_msg(msg: DrvCanMessageC) -> bytes:
+    '''Encode a CAN message.
+
+    Args:
+        msg (DrvCanMessageC): Message to encode.
+
+    Returns:
+        bytes: Message encoded.
+    '''
+    return _MSG_FMT.pack(_TAG_MSG, msg.addr, msg.dlc, msg.bus, msg.timestamp,
+                         bytes(msg.payload))
+
+def pickle_legacy_msg(msg: DrvCanMessageC) -> bytes:
+    '''Pickle a CAN message as the versions before the binary encoding did, with the class
+    in the module can_sniffer, so the drivers built with them can unpickle it.
+
+    Args:
+        msg (DrvCanMessageC): Message to pickle.
+
+    Returns:
+        bytes: Message pickled with protocol 2.
+    '''
+    state = {'addr': msg.addr, 'dlc': msg.dlc, 'payload': bytes(msg.payload),
+             'timestamp': msg.timestamp, 'bus': msg.bus}
+    # Protocol, class, empty tuple of arguments, new object, state without protocol and stop,
+    # build and stop
+    return (b'\x80\x02' + _LEGACY_MSG_GLOBAL + b')\x81'
+            + dumps(state, protocol= 2)[2:-1] + b'b.')
+
+def encode_can_data(data: object) -> bytes|None:
+    '''Encode a CAN message or a command for the CAN node.
+
+    Args:
+        data (object): Data to encode.
+
+    Returns:
+        bytes|None: Data encoded, None if the data has not a binary layout.
+    '''
+    encoded_data = None
+    if isinstance(data, DrvCanMessageC):
+        encoded_data = encode_can_msg(data)
+    elif isinstance(data, DrvCanResponseC):
+        msg = DrvCanMessageC(0, 0, b'') if data.message is None else data.message
+        encoded_data = _RESPONSE_FMT.pack(_TAG_RESPONSE, data.req_id, data.message is not None,
+                                          data.round_trip, msg.addr, msg.dlc, msg.bus,
+                                          msg.timestamp, bytes(msg.payload))
+    elif isinstance(data, DrvCanCmdDataC):
+        payload = data.payload
+        priority = _get_priority(data)
+        if (data.data_type is DrvCanCmdTypeE.MESSAGE and isinstance(payload, DrvCanMessageC)):
+            encoded_data = _CMD_MSG_FMT.pack(_TAG_CMD_MSG, data.data_type.value, priority,
+                                             data.timestamp, payload.addr, payload.dlc,
+                                             payload.bus, payload.timestamp,
+                                             bytes(payload.payload))
+        elif (data.data_type in (DrvCanCmdTypeE.ADD_FILTER, DrvCanCmdTypeE.REMOVE_FILTER)
+              and isinstance(payload, DrvCanFilterC)):
+            name = payload.chan_name.encode(_ENCODING)
+            encoded_data = _CMD_FILTER_FMT.pack(_TAG_CMD_FILTER, data.data_type.value, priority,
+                                                data.timestamp, payload.addr, payload.mask,
+                                                payload.overflow.value, payload.delivery.value,
+                                                payload.multicast, payload.bus,
+                                                len(name)) + name
+        elif (data.data_type in (DrvCanCmdTypeE.START_PERIODIC, DrvCanCmdTypeE.MODIFY_PERIODIC,
+                                 DrvCanCmdTypeE.STOP_PERIODIC)
+              and isinstance(payload, DrvCanPeriodicC)):
+            encoded_data = _CMD_PERIODIC_FMT.pack(_TAG_CMD_PERIODIC, data.data_type.value,
+                                                  priority, data.timestamp, payload.addr,
+                                                  payload.dlc, payload.bus,
+                                                  bytes(payload.payload), payload.period)
+        elif (data.data_type is DrvCanCmdTypeE.REQUEST and isinstance(payload, DrvCanRequestC)):
+            name = payload.chan_name.encode(_ENCODING)
+            encoded_data = _CMD_REQUEST_FMT.pack(_TAG_CMD_REQUEST, data.data_type.value,
+                                                 priority, data.timestamp, payload.addr,
+                                                 payload.dlc, payload.bus,
+                                                 bytes(payload.payload), payload.resp_addr,
+                                                 payload.resp_mask, payload.timeout,
+                                                 payload.req_id, len(name)) + name
+        elif (data.data_type in (DrvCanCmdTypeE.ADD_TRIGGER, DrvCanCmdTypeE.REMOVE_TRIGGER)
+              and isinstance(payload, DrvCanTriggerC)
+              and 0 <= payload.data_mask <= _MAX_DATA_MASK):
+            encoded_data = _CMD_TRIGGER_FMT.pack(_TAG_CMD_TRIGGER, data.data_type.value,
+                                                 priority, data.timestamp, payload.addr,
+                                                 payload.mask, payload.data_mask, payload.bus)
+        elif data.data_type in _BATCH_TYPES and isinstance(payload, (list, tuple)):
+            encoded_data = _encode_batch(data)
+            if encoded_data is not None:
+                encoded_data = encoded_data[0]
+    return encoded_data
+
+def _encode_batch(data: DrvCanCmdDataC, max_size: int|None = None) -> List[bytes]|None:
+    '''Encode a command with a batch of filters or messages.
+
+    Args:
+        data (DrvCanCmdDataC): Command to encode.
+        max_size (int|None, optional): Max size of each encoded batch, the items that do not
+            fit in a batch go to the next one. None to encode all items in one batch.
+            Defaults to None.
+
+    Raises:
+        ValueError: An item does not fit in a batch of max_size bytes.
+
+    Returns:
+        List[bytes]|None: Batches encoded, None if any item has not the type of the batch.
+    '''
+    encoded_items = []
+    for item in data.payload:
+        if data.data_type is DrvCanCmdTypeE.MESSAGE_BATCH and isinstance(item, DrvCanMessageC):
+            is_request = isinstance(item, DrvCanRequestC)
+            encoded_item = (_BATCH_MSG_FMT.pack(is_request, item.addr, item.dlc, item.bus)
+                            + bytes(item.payload).ljust(item.dlc, b'\0')[:item.dlc])
+            if is_request:
+                name = item.chan_name.encode(_ENCODING)
+                encoded_item += _BATCH_REQUEST_FMT.pack(item.resp_addr, item.resp_mask,
+                                                        item.timeout, item.req_id,
+                                                        len(name)) + name
+        elif (data.data_type is not DrvCanCmdTypeE.MESSAGE_BATCH
+              and isinstance(item, DrvCanFilterC)):
+            name = item.chan_name.encode(_ENCODING)
+            encoded_item = _BATCH_FILTER_FMT.pack(item.addr, item.mask, item.overflow.value,
+                                                  item.delivery.value, item.multicast,
+                                                  item.bus, len(name)) + name
+        else:
+            return None
+        if max_size is not None and _CMD_BATCH_FMT.size + len(encoded_item) > max_size:
+            log.error(f"Item {hex(item.addr)} of the batch does not fit in {max_size} bytes")
+            raise ValueError(f"Item {hex(item.addr)} of the batch does not fit in "+
+                             f"{max_size} bytes")
+        encoded_items.append(encoded_item)
+    # Split the items in batches of max_size bytes
+    batches: List[List[bytes]] = [[]]
+    size = _CMD_BATCH_FMT.size
+    for encoded_item in encoded_items:
+        if max_size is not None and size + len(encoded_item) > max_size:
+            batches.append([])
+            size = _CMD_BATCH_FMT.size
+        batches[-1].append(encoded_item)
+        size += len(encoded_item)
+    return [_CMD_BATCH_FMT.pack(_TAG_CMD_BATCH, data.data_type.value, _get_priority(data),
+                                data.timestamp, len(items)) + b''.join(items)
+            for items in batches]
+
+def _decode_batch(encoded_data: bytes) -> DrvCanCmdDataC:
+    '''Decode a command with a batch of filters or messages.
+
+    Args:
+        encoded_data (bytes): Command encoded with _encode_batch.
+
+    Returns:
+        DrvCanCmdDataC: Command decoded.
+    '''
+    _, cmd_type, priority, cmd_ts, n_items = _CMD_BATCH_FMT.unpack_from(encoded_data)
+    cmd_type = DrvCanCmdTypeE(cmd_type)
+    offset = _CMD_BATCH_FMT.size
+    items = []
+    for _ in range(n_items):
+        if cmd_type is DrvCanCmdTypeE.MESSAGE_BATCH:
+            is_request, addr, dlc, bus = _BATCH_MSG_FMT.unpack_from(encoded_data, offset)
+            offset += _BATCH_MSG_FMT.size
+            payload = bytearray(encoded_data[offset:offset+dlc])
+            offset += dlc
+            if is_request:
+                (resp_addr, resp_mask, timeout, req_id,
+                 name_len) = _BATCH_REQUEST_FMT.unpack_from(encoded_data, offset)
+                offset += _BATCH_REQUEST_FMT.size
+                name = encoded_data[offset:offset+name_len].decode(_ENCODING)
+                offset += name_len
+                items.append(DrvCanRequestC(addr, dlc, payload, resp_addr, name, timeout,
+                                            resp_mask, req_id, bus))
+            else:
+                items.append(DrvCanMessageC(addr, dlc, payload, bus= bus))
+        else:
+            (addr, mask, overflow, delivery, multicast, bus,
+             name_len) = _BATCH_FILTER_FMT.unpack_from(encoded_data, offset)
+            offset += _BATCH_FILTER_FMT.size
+            name = encoded_data[offset:offset+name_len].decode(_ENCODING)
+            offset += name_len
+            items.append(DrvCanFilterC(addr, mask, name, DrvCanOverflowE(overflow),
+                                       DrvCanDeliveryE(delivery), multicast, bus))
+    data = DrvCanCmdDataC(cmd_type, items, DrvCanPriorityE(priority))
+    data.timestamp = cmd_ts
+    return data
+
+def _get_priority(data: object) -> int:
+    '''Get the priority used to push data to a queue.
+
+    Args:
+        data (object): Data pushed.
+
+    Returns:
+        int: Priority of the command, 0 for the rest of data.
+    '''
+    if isinstance(data, DrvCanCmdDataC):
+        # Commands created by older versions of the package do not have priority
+        return getattr(data, 'priority', DrvCanPriorityE.CONFIG).value
+    return 0
+
+def is_pickled(encoded_data: bytes) -> bool:
+    '''Check if the data received from a channel was pickled, as the drivers that use a
+    SysShdIpcChanC send it, instead of encoded with encode_can_data.
+
+    Args:
+        encoded_data (bytes): Data received.
+
+    Returns:
+        bool: True if the data was pickled.
+    '''
+    return encoded_data[0] not in _TAGS
+
+def decode_can_data(encoded_data: bytes) -> object:
+    '''Decode the data received from a channel, encoded with encode_can_data or pickled.
+    The commands keep the priority they were encoded with, and the pickled ones the priority
+    of the object, if they have it.
+
+    Args:
+        encoded_data (bytes): Data received.
+
+    Returns:
+        object: Data decoded.
+    '''
+    tag = encoded_data[0]
+    if tag == _TAG_MSG:
+        _, addr, dlc, bus, timestamp, payload = _MSG_FMT.unpack(encoded_data)
+        data = DrvCanMessageC(addr, dlc, bytearray(payload[:dlc]), timestamp, bus)
+    elif tag == _TAG_CMD_MSG:
+        (_, cmd_type, priority, cmd_ts, addr, dlc, bus, timestamp,
+         payload) = _CMD_MSG_FMT.unpack(encoded_data)
+        data = DrvCanCmdDataC(DrvCanCmdTypeE(cmd_type),
+                              DrvCanMessageC(addr, dlc, bytearray(payload[:dlc]), timestamp, bus),
+                              DrvCanPriorityE(priority))
+        data.timestamp = cmd_ts
+    elif tag == _TAG_CMD_FILTER:
+        (_, cmd_type, priority, cmd_ts, addr, mask, overflow, delivery, multicast, bus,
+         name_len) = _CMD_FILTER_FMT.unpack_from(encoded_data)
+        name = encoded_data[_CMD_FILTER_FMT.size:_CMD_FILTER_FMT.size+name_len].decode(_ENCODING)
+        data = DrvCanCmdDataC(DrvCanCmdTypeE(cmd_type),
+                              DrvCanFilterC(addr, mask, name, DrvCanOverflowE(overflow),
+                                            DrvCanDeliveryE(delivery), multicast, bus),
+                              DrvCanPriorityE(priority))
+        data.timestamp = cmd_ts
+    elif tag == _TAG_CMD_PERIODIC:
+        (_, cmd_type, priority, cmd_ts, addr, dlc, bus, payload,
+         period) = _CMD_PERIODIC_FMT.unpack(encoded_data)
+        data = DrvCanCmdDataC(DrvCanCmdTypeE(cmd_type),
+                              DrvCanPeriodicC(addr, dlc, bytearray(payload[:dlc]), period, bus),
+                              DrvCanPriorityE(priority))
+        data.timestamp = cmd_ts
+    elif tag == _TAG_CMD_REQUEST:
+        (_, cmd_type, priority, cmd_ts, addr, dlc, bus, payload, resp_addr, resp_mask, timeout,
+         req_id, name_len) = _CMD_REQUEST_FMT.unpack_from(encoded_data)
+        name = encoded_data[_CMD_REQUEST_FMT.size:_CMD_REQUEST_FMT.size+name_len].decode(_ENCODING)
+        data = DrvCanCmdDataC(DrvCanCmdTypeE(cmd_type),
+                              DrvCanRequestC(addr, dlc, bytearray(payload[:dlc]), resp_addr, name,
+                                             timeout, resp_mask, req_id, bus),
+                              DrvCanPriorityE(priority))
+        data.timestamp = cmd_ts
+    elif tag == _TAG_RESPONSE:
+        (_, req_id, received, round_trip, addr, dlc, bus, timestamp,
+         payload) = _RESPONSE_FMT.unpack(encoded_data)
+        message = None
+        if received:
+            message = DrvCanMessageC(addr, dlc, bytearray(payload[:dlc]), timestamp, bus)
+        data = DrvCanResponseC(req_id, message, round_trip)
+    elif tag == _TAG_CMD_BATCH:
+        data = _decode_batch(encoded_data)
+    elif tag == _TAG_CMD_TRIGGER:
+        (_, cmd_type, priority, cmd_ts, addr, mask, data_mask,
+         bus) = _CMD_TRIGGER_FMT.unpack(encoded_data)
+        data = DrvCanCmdDataC(DrvCanCmdTypeE(cmd_type),
+                              DrvCanTriggerC(addr, mask, data_mask, bus),
+                              DrvCanPriorityE(priority))
+        data.timestamp = cmd_ts
+    else:
+        data = loads(encoded_data)
+    return data
@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+"""
+This module contains the data classes shared between the CAN node and the drivers
+that use it, that is the messages, filters and commands sent to the node.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from time import time
+from enum import Enum
+from typing import List
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+
+######################             CONSTANTS              ######################
+
+#######################              ENUMS               #######################
+
+
+#######################             CLASSES              #######################
+class _Constants:
+    """
+    Class to store constants used in the module.
+    """
+    MAX_DLC_SIZE : int = 8
+    MIN_ID          = 0x000     # As the last 4 bits will identify the messages are reserved
+    MAX_ID          = 0x7FF     # In standard mode the can id max value is 0x7FF
+class DrvCanCmdTypeE(Enum):
+    """
+    Type of command for the CAN
+    """
+    MESSAGE = 0
+    ADD_FILTER = 1
+    REMOVE_FILTER = 2
+    START_PERIODIC = 3
+    MODIFY_PERIODIC = 4
+    STOP_PERIODIC = 5
+    REQUEST = 6
+    ADD_FILTER_BATCH = 7
+    REMOVE_FILTER_BATCH = 8
+    MESSAGE_BATCH = 9
+    ADD_TRIGGER = 10
+    REMOVE_TRIGGER = 11
+    DUMP_RECORD = 12
+
+class DrvCanMessageC:
+    """The class to create messages correctly to be send by can .
+    """
+    def __init__(self, addr : int, size : int, payload : int | bytearray, # pylint: disable= too-many-arguments
+                 timestamp: float = 0.0, bus: int = 0) -> None:
+        '''
+        Initialize a CAN message.
+
+        Args:
+            addr (int): CAN datafrane addres.
+            size (int): Message payload size on bytes.
+            data (int): Can message payload.
+            timestamp (float, optional): Time in seconds when the message was received,
+                0 if it is unknown. Defaults to 0.0.
+            bus (int, optional): Index of the bus of the node where the message is sent or
+                was received. Defaults to 0.
+
+        Raises:
+            BytesWarning: Throw an exception if the payload size of message is too long (size > 8).
+        '''
+        self.addr = addr
+        self.dlc = size
+        if self.dlc > _Constants.MAX_DLC_SIZE:
+            log.error(f"Message payload size on bytes (size = {self.dlc}) \
+                      is higher than {_Constants.MAX_DLC_SIZE}")
+            raise BytesWarning("To many element for a CAN message")
+        if isinstance(payload,int):
+            self.payload = payload.to_bytes(size, byteorder='little', signed = False)
+        else:
+            self.payload = payload
+        self.timestamp: float = timestamp
+        self.bus: int = bus
+
+class DrvCanPeriodicC(DrvCanMessageC):
+    """Message sent periodically by the CAN node, identified by its id and bus.
+    """
+    def __init__(self, addr : int, size : int, payload : int | bytearray, # pylint: disable= too-many-arguments
+                 period: int, bus: int = 0) -> None:
+        '''
+        Initialize a periodic CAN message.
+
+        Args:
+            addr (int): CAN datafrane addres.
+            size (int): Message payload size on bytes.
+            payload (int | bytearray): Can message payload.
+            period (int): Period of the message in ms, not used to stop it.
+            bus (int, optional): Index of the bus of the node where the message is sent.
+                Defaults to 0.
+        '''
+        super().__init__(addr, size, payload, bus= bus)
+        self.period: int = period
+
+class DrvCanRequestC(DrvCanMessageC):
+    """Message sent by the CAN node that expects a response. The node sends to the channel of
+    the request the first message received with the response id, or a timeout result if it
+    does not arrive in time.
+    """
+    def __init__(self, addr : int, size : int, payload : int | bytearray, # pylint: disable= too-many-arguments
+                 resp_addr: int, chan_name: str, timeout: int, resp_mask: int = _Constants.MAX_ID,
+                 req_id: int = 0, bus: int = 0) -> None:
+        '''
+        Initialize a CAN request.
+
+        Args:
+            addr (int): CAN datafrane addres.
+            size (int): Message payload size on bytes.
+            payload (int | bytearray): Can message payload.
+            resp_addr (int): Id of the response.
+            chan_name (str): Name of the channel where the response is sent.
+            timeout (int): Max time in ms to wait the response, since the command is created.
+            resp_mask (int, optional): Mask applied to the response id, to accept several ids
+                as response. Defaults to 0x7FF.
+            req_id (int, optional): Id of the request, sent back in the response so the
+                caller can match them. Defaults to 0.
+            bus (int, optional): Index of the bus of the node where the request is sent and
+                the response is received. Defaults to 0.
+        '''
+        super().__init__(addr, size, payload, bus= bus)
+        self.resp_addr: int = resp_addr
+        self.resp_mask: int = resp_mask
+        self.chan_name: str = chan_name
+        self.timeout: int = timeout
+        self.req_id: int = req_id
+
+class DrvCanResponseC:
+    """Result of a request sent by the CAN node, sent to the channel of the request.
+    """
+    def __init__(self, req_id: int, message: DrvCanMessageC|None, round_trip: float) -> None:
+        '''
+        Initialize the result of a request.
+
+        Args:
+            req_id (int): Id of the request.
+            message (DrvCanMessageC|None): Response received, None if the timeout expired.
+            round_trip (float): Time in seconds since the node sent the request until it
+                received the response or the timeout expired.
+        '''
+        self.req_id: int = req_id
+        self.message: DrvCanMessageC|None = message
+        self.round_trip: float = round_trip
+        self.timed_out: bool = message is None
+
+class DrvCanOverflowE(Enum):
+    """
+    Policy applied by the CAN node when the channel of a filter is full
+    """
+    BLOCK = 0 # Wait until the consumer reads a message
+    DROP_NEWEST = 1 # Discard the message received
+    DROP_OLDEST = 2 # Discard the oldest message of the channel
+    COALESCE = 3 # Keep only the newest message of each id in the channel
+
+class DrvCanDeliveryE(Enum):
+    """
+    Way the CAN node delivers the messages that match a filter
+    """
+    QUEUE = 0 # Send them to the channel of the filter
+    MAILBOX = 1 # Write the last one of each id in the mailbox of the node
+    RING = 2 # Write them in the ring buffer of the node
+
+class DrvCanPriorityE(Enum):
+    """
+    Priority of the commands sent to the CAN node, the node always applies the commands of
+    a higher priority first
+    """
+    BULK = 0 # Requests of data that can wait, as measurements
+    CONFIG = 1 # Configuration of the devices and the node, as limits and filters
+    CONTROL = 2 # Control and safety frames, as changing the mode or disabling a device
+
+class DrvCanFilterC:
+    """This class is used to create objects that
+    works as messages to make write or erase filters in can .
+    """
+    def __init__(self, addr : int, mask : int, chan_name: str, # pylint: disable= too-many-arguments
+                 overflow: DrvCanOverflowE = DrvCanOverflowE.BLOCK,
+                 delivery: DrvCanDeliveryE = DrvCanDeliveryE.QUEUE,
+                 multicast: bool = False, bus: int = 0):
+        if _Constants.MIN_ID <= addr <= _Constants.MAX_ID:
+            self.addr = addr
+        else:
+            log.error("Wrong value for address, value must be between 0-0x7ff")
+            raise ValueError("Wrong value for address, value must be between 0-0x7ff")
+
+        if _Constants.MIN_ID <= mask <= _Constants.MAX_ID:
+            self.mask = mask
+        else:
+            log.error("Wrong value for mask, value must be between 0 and 0x7ff")
+            raise ValueError("Wrong value for mask, value must be between 0 and 0x7ff")
+
+        self.chan_name = chan_name
+        self.overflow = overflow
+        self.delivery = delivery
+        # A multicast filter receives the messages even if another filter matches them
+        self.multicast = multicast
+        # Index of the bus of the node where the messages are received
+        self.bus = bus
+
+class DrvCanTriggerC:
+    """Frames that make the flight recorder of the CAN node write the frames recorded before
+    them, as the status message of a device with any error bit set.
+    """
+    def __init__(self, addr: int, mask: int = _Constants.MAX_ID, data_mask: int = 0,
+                 bus: int = 0) -> None:
+        '''
+        Initialize a trigger.
+
+        Args:
+            addr (int): CAN id of the frames.
+            mask (int, optional): Mask applied to the id. Defaults to 0x7FF.
+            data_mask (int, optional): Bits of the payload, read as a little endian integer,
+                of which any must be set, 0 to trigger with any payload. Defaults to 0.
+            bus (int, optional): Index of the bus of the node where the frames are received.
+                Defaults to 0.
+
+        Raises:
+            ValueError: Raised when the id or the mask are not standard ids.
+        '''
+        if not (_Constants.MIN_ID <= addr <= _Constants.MAX_ID
+                and _Constants.MIN_ID <= mask <= _Constants.MAX_ID):
+            log.error("Wrong value for address or mask, value must be between 0-0x7ff")
+            raise ValueError("Wrong value for address or mask, value must be between 0-0x7ff")
+        self.addr: int = addr
+        self.mask: int = mask
+        self.data_mask: int = data_mask
+        self.bus: int = bus
+
+    def match(self, addr: int, payload: bytes, bus: int) -> bool:
+        '''Check if a frame triggers the flight recorder.
+
+        Args:
+            addr (int): CAN id of the frame.
+            payload (bytes): Payload of the frame.
+            bus (int): Index of the bus where the frame was received.
+
+        Returns:
+            bool: True if it matches the id, the bus and the bits of the payload.
+        '''
+        return (bus == self.bus and (addr & self.mask) == (self.addr & self.mask)
+                and (self.data_mask == 0
+                     or int.from_bytes(payload, byteorder='little') & self.data_mask != 0))
+
+class DrvCanCmdDataC:
+    """
+    Returns a function that can be called when the command is not available .
+    """
+    def __init__(self, data_type: DrvCanCmdTypeE,
+                 payload: DrvCanMessageC|DrvCanFilterC|DrvCanPeriodicC|DrvCanRequestC|
+                          List[DrvCanFilterC]|List[DrvCanMessageC]|DrvCanTriggerC|str,
+                 priority: DrvCanPriorityE = DrvCanPriorityE.CONFIG):
+        self.data_type = data_type
+        self.payload = payload
+        self.priority = priority
+        # Time when the command is created, used to measure the latency until it is applied
+        self.timestamp: float = time()
@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+"""
+This module contains the index used by the CAN node to dispatch the received
+messages to the active filters without walking the whole list of filters.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+from typing import Dict, Iterator, List, Tuple
+
+#######################         GENERIC IMPORTS          #######################
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+
+######################             CONSTANTS              ######################
+_EXACT_MASK: int = 0x7FF # Mask of the filters that only match one standard id
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvCanFilterIndexC:
+    """Index of CAN filters. The filters with a full mask (0x7FF) are stored in a
+    dictionary by id, and the rest of them are grouped in buckets by mask, so the
+    lookup of a CAN id only costs one dictionary access per different mask in use.
+    The result of each lookup is cached until the filters change, so after the first
+    message of each id the dispatch is a single dictionary access.
+    The filters stored only need the attributes addr, mask, chan_name and multicast.
+    When a message matches more than one filter, the first filter added wins,
+    as it happened when the filters were stored in a list, but the multicast filters
+    that match it also receive it.
+    """
+    def __init__(self) -> None:
+        self.__seq: int = 0
+        # Every filter is stored with the order in which it was added
+        self.__filters: Dict[Tuple[int, int, str], Tuple[int, object]] = {}
+        # Filters with the same address and mask, so they are found without walking all of them
+        self.__same: Dict[Tuple[int, int], List[Tuple[int, object]]] = {}
+        self.__exact: Dict[int, List[Tuple[int, object]]] = {}
+        self.__masked: Dict[int, Dict[int, List[Tuple[int, object]]]] = {}
+        self.__cache: Dict[int, object|None] = {}
+        self.__cache_all: Dict[int, List[object]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__filters)
+
+    def __iter__(self) -> Iterator:
+        return (entry[1] for entry in self.__filters.values())
+
+    def __bucket(self, addr: int, mask: int) -> Tuple[Dict[int, List[Tuple[int, object]]], int]:
+        '''Get the bucket where a filter with the given address and mask is stored.
+
+        Args:
+            addr (int): Address of the filter.
+            mask (int): Mask of the filter.
+
+        Returns:
+            Tuple[Dict, int]: Dictionary that stores the filter and its key in it.
+        '''
+        if mask == _EXACT_MASK:
+            return self.__exact, addr
+        return self.__masked.setdefault(mask, {}), addr & mask
+
+    def find(self, addr: int, mask: int) -> List[object]:
+        '''Get the filters added with the same address and mask.
+
+        Args:
+            addr (int): Address of the filter.
+            mask (int): Mask of the filter.
+
+        Returns:
+            List[object]: Filters stored, in the order they were added.
+        '''
+        return [entry[1] for entry in self.__same.get((addr, mask), [])]
+
+    def add(self, new_filter) -> None:
+        '''Add a filter to the index. The caller must check before that the filter
+        has not been added yet.
+
+        Args:
+            new_filter (DrvCanFilterC): Filter to add.
+        '''
+        entry = (self.__seq, new_filter)
+        self.__seq += 1
+        self.__filters[(new_filter.addr, new_filter.mask, new_filter.chan_name)] = entry
+        self.__same.setdefault((new_filter.addr, new_filter.mask), []).append(entry)
+        bucket, key = self.__bucket(new_filter.addr, new_filter.mask)
+        bucket.setdefault(key, []).append(entry)
+        self.__cache.clear()
+        self.__cache_all.clear()
+
+    def remove(self, addr: int, mask: int, chan_name: str) -> object|None:
+        '''Remove the filter added with the same address, mask and channel.
+
+        Args:
+            addr (int): Address of the filter.
+            mask (int): Mask of the filter.
+            chan_name (str): Name of the channel of the filter.
+
+        Returns:
+            object|None: Filter removed, None if there was not any.
+        '''
+        entry = self.__filters.pop((addr, mask, chan_name), None)
+        if entry is not None:
+            same = self.__same[(addr, mask)]
+            same.remove(entry)
+            if len(same) == 0:
+                del self.__same[(addr, mask)]
+            bucket, key = self.__bucket(addr, mask)
+            entries = bucket[key]
+            entries.remove(entry)
+            if len(entries) == 0:
+                del bucket[key]
+                if mask != _EXACT_MASK and len(bucket) == 0:
+                    del self.__masked[mask]
+            self.__cache.clear()
+            self.__cache_all.clear()
+        return None if entry is None else entry[1]
+
+    def match(self, id_can: int) -> object|None:
+        '''Get the filter that matches the CAN id.
+
+        Args:
+            id_can (int): Complete id of the message received by CAN.
+
+        Returns:
+            object|None: First filter added that matches the id, None if there is not any.
+        '''
+        try:
+            return self.__cache[id_can]
+        except KeyError:
+            pass
+        found = self.__exact.get(id_can)
+        best = None if found is None else found[0]
+        for mask, bucket in self.__masked.items():
+            found = bucket.get(id_can & mask)
+            if found is not None and (best is None or found[0][0] < best[0]):
+                best = found[0]
+        result = None if best is None else best[1]
+        self.__cache[id_can] = result
+        return result
+
+    def match_all(self, id_can: int) -> List[object]:
+        '''Get the filters that receive a message with the CAN id, that is every multicast
+        filter that matches it and the first filter added of the rest of them.
+
+        Args:
+            id_can (int): Complete id of the message received by CAN.
+
+        Returns:
+            List[object]: Filters that receive the message, in the order they were added,
+            empty if there is not any.
+        '''
+        try:
+            return self.__cache_all[id_can]
+        except KeyError:
+            pass
+        found = list(self.__exact.get(id_can, []))
+        for mask, bucket in self.__masked.items():
+            found.extend(bucket.get(id_can & mask, []))
+        found.sort(key= lambda entry: entry[0])
+        result = []
+        exclusive = False
+        for _, act_filter in found:
+            if act_filter.multicast:
+                result.append(act_filter)
+            elif not exclusive:
+                result.append(act_filter)
+                exclusive = True
+        self.__cache_all[id_can] = result
+        return result
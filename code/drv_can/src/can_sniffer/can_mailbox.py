@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""
+This module contains the mailbox of the CAN node, a table in shared memory with the
+last message received of each CAN id in each bus, that can be read from any process
+without draining a queue.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from typing import Tuple
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+from .can_common import _Constants, DrvCanMessageC
+from .can_shm import open_shared_memory, close_shared_memory
+
+######################             CONSTANTS              ######################
+from .context import DEFAULT_MAILBOX_NAME
+
+# Slot of each id: sequence counter, dlc, bus, timestamp, payload
+_SEQ_FMT = Struct('<I')
+_SLOT_FMT = Struct('<IBB2xd8s')
+_DATA_FMT = Struct('<BB2xd8s')
+_N_SLOTS: int = _Constants.MAX_ID + 1 # Slots of each bus
+_MAX_SEQ: int = 0xFFFFFFFF
+_MAX_READ_RETRIES: int = 1000 # Max reads of a slot while the node is writing it
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvCanMailboxC:
+    """Table in shared memory with one slot for each standard CAN id of each bus of the node,
+    where the CAN node writes the last message received with that id in that bus.
+    Each slot has a sequence counter that is odd while the node is writing it, so readers
+    retry until they get a consistent copy without locking the writer. The counter also
+    tells the readers if the message has changed since the last time they read it.
+    """
+    def __init__(self, name: str = DEFAULT_MAILBOX_NAME, create: bool = False,
+                 n_buses: int = 1) -> None:
+        '''
+        Create or open the mailbox.
+
+        Args:
+            name (str, optional): Name of the shared memory. Defaults to DEFAULT_MAILBOX_NAME.
+            create (bool, optional): True to create it, only done by the CAN node,
+                False to open the one created by the node. Defaults to False.
+            n_buses (int, optional): Number of buses of the node, only used when it is
+                created, the readers get it from the size of the table. Defaults to 1.
+        '''
+        self.name: str = name
+        self.__owner: bool = create
+        self.__shm: SharedMemory
+        self.__shm, _ = open_shared_memory(name, _SLOT_FMT.size * _N_SLOTS * n_buses, create)
+        self.__buf: memoryview = self.__shm.buf
+        self.n_buses: int = self.__shm.size // (_SLOT_FMT.size * _N_SLOTS)
+
+    def __offset(self, addr: int, bus: int) -> int:
+        '''Get the offset of the slot of an id in a bus.
+
+        Args:
+            addr (int): CAN id.
+            bus (int): Index of the bus.
+
+        Raises:
+            ValueError: Raised when the mailbox has not a slot for that id and bus.
+
+        Returns:
+            int: Offset of the slot in the shared memory.
+        '''
+        if not (0 <= bus < self.n_buses and _Constants.MIN_ID <= addr <= _Constants.MAX_ID):
+            log.error(f"Wrong id {hex(addr)} or bus {bus}, the mailbox has {self.n_buses} buses")
+            raise ValueError(f"Wrong id {hex(addr)} or bus {bus}, "+
+                             f"the mailbox has {self.n_buses} buses")
+        return (bus * _N_SLOTS + addr) * _SLOT_FMT.size
+
+    def write(self, message: DrvCanMessageC) -> None:
+        '''Write a message in the slot of its id and bus. Only the CAN node writes in the
+        mailbox. The messages without a slot in the mailbox are dropped.
+
+        Args:
+            message (DrvCanMessageC): Message received from CAN.
+        '''
+        try:
+            offset = self.__offset(message.addr, message.bus)
+        except ValueError:
+            return
+        seq = _SEQ_FMT.unpack_from(self.__buf, offset)[0]
+        _SEQ_FMT.pack_into(self.__buf, offset, (seq + 1) & _MAX_SEQ)
+        _DATA_FMT.pack_into(self.__buf, offset + _SEQ_FMT.size, message.dlc, message.bus,
+                            message.timestamp, bytes(message.payload))
+        _SEQ_FMT.pack_into(self.__buf, offset, (seq + 2) & _MAX_SEQ)
+
+    def get_seq(self, addr: int, bus: int = 0) -> int:
+        '''Get the sequence counter of an id, that changes each time a message is written.
+
+        Args:
+            addr (int): CAN id.
+            bus (int, optional): Index of the bus. Defaults to 0.
+
+        Returns:
+            int: Sequence counter, 0 if no message has been received with the id.
+        '''
+        return _SEQ_FMT.unpack_from(self.__buf, self.__offset(addr, bus))[0]
+
+    def read(self, addr: int, bus: int = 0) -> Tuple[int, DrvCanMessageC|None]:
+        '''Read the last message received with an id in a bus.
+
+        Args:
+            addr (int): CAN id.
+            bus (int, optional): Index of the bus. Defaults to 0.
+
+        Returns:
+            Tuple[int, DrvCanMessageC|None]: Sequence counter of the message read and the
+            message, None if no message has been received with the id or if the slot
+            could not be read because the node did not finish writing it.
+        '''
+        offset = self.__offset(addr, bus)
+        consistent = False
+        retries = 0
+        while not consistent and retries < _MAX_READ_RETRIES:
+            retries += 1
+            seq, dlc, slot_bus, timestamp, payload = _SLOT_FMT.unpack_from(self.__buf, offset)
+            consistent = seq % 2 == 0 and _SEQ_FMT.unpack_from(self.__buf, offset)[0] == seq
+        message = None
+        if not consistent:
+            log.warning(f"Slot of id {hex(addr)} in bus {bus} of the mailbox is being written")
+        elif seq != 0:
+            message = DrvCanMessageC(addr, dlc, bytearray(payload[:dlc]), timestamp, slot_bus)
+        return seq, message
+
+    def close(self) -> None:
+        '''Close the mailbox, the node also removes it.
+        '''
+        self.__buf.release()
+        close_shared_memory(self.__shm, self.__owner)
+
+#######################            FUNCTIONS             #######################
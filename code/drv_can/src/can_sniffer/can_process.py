@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+"""
+This module contains the launcher used to run the CAN node in its own process, so it does
+not share the GIL with the rest of the threads of the application.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+import os
+from multiprocessing import get_context
+from signal import signal, SIGINT, SIG_IGN
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+from system_shared_tool import SysShdNodeStatusE, SysShdErrorC
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+from .can_sniffer import DrvCanNodeC
+
+######################             CONSTANTS              ######################
+from .context import (DEFAULT_NODE_NAME, DEFAULT_PROCESS_START_TIMEOUT,
+                      DEFAULT_PROCESS_STOP_TIMEOUT, DEFAULT_PROCESS_STATUS_PERIOD)
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvCanProcessC:
+    """Launcher of the CAN node in a dedicated process. The process is forked, so it inherits
+    the logger and the configuration of the parent, and the node is created in it. The parent
+    waits until the node has started, reads the status of the node, which the process forwards
+    periodically, and stops it clearing the working flag of the node.
+    """
+    def __init__(self, cpu: int|None = None, nice: int|None = None, # pylint: disable= too-many-arguments
+                 rt_priority: int|None = None,
+                 start_timeout: float = DEFAULT_PROCESS_START_TIMEOUT,
+                 stop_timeout: float = DEFAULT_PROCESS_STOP_TIMEOUT, **node_args) -> None:
+        '''
+        Prepare the process of the CAN node, it is not started until start is called.
+
+        Args:
+            cpu (int|None, optional): Core where the process is pinned, None to let the system
+                choose it. Defaults to None.
+            nice (int|None, optional): Nice value of the process, None to keep the one of the
+                parent. Defaults to None.
+            rt_priority (int|None, optional): Real time priority (SCHED_FIFO) of the process,
+                None to keep the normal scheduling. It usually needs root privileges.
+                Defaults to None.
+            start_timeout (float, optional): Max time in seconds to wait the node to start.
+                Defaults to DEFAULT_PROCESS_START_TIMEOUT.
+            stop_timeout (float, optional): Max time in seconds to wait the node to stop before
+                killing the process. Defaults to DEFAULT_PROCESS_STOP_TIMEOUT.
+            node_args: Arguments of DrvCanNodeC, except working_flag.
+        '''
+        # Fork is used so the process inherits the logger, which must be initialized before
+        # importing any module
+        context = get_context('fork')
+        self.working_flag = context.Event()
+        self.start_timeout: float = start_timeout
+        self.stop_timeout: float = stop_timeout
+        self.__ready = context.Event()
+        self.__status = context.Value('b', SysShdNodeStatusE.STOP.value)
+        self.__process = context.Process(target= _run_node, daemon= True,
+                        name= node_args.get('name', DEFAULT_NODE_NAME),
+                        args= (self.working_flag, self.__ready, self.__status,
+                               cpu, nice, rt_priority, node_args))
+
+    @property
+    def status(self) -> SysShdNodeStatusE:
+        '''Last status of the node forwarded by its process.
+        '''
+        return SysShdNodeStatusE(self.__status.value)
+
+    @property
+    def pid(self) -> int|None:
+        '''Id of the process of the node, None if it has not been started.
+        '''
+        return self.__process.pid
+
+    def is_alive(self) -> bool:
+        '''Check if the process of the node is running.
+
+        Returns:
+            bool: True if it is running.
+        '''
+        return self.__process.is_alive()
+
+    def start(self) -> None:
+        '''Start the process and wait until the node is running.
+
+        Raises:
+            SysShdErrorC: Raised when the node can not be created or does not start in time.
+        '''
+        self.working_flag.set()
+        self.__process.start()
+        if not self.__ready.wait(self.start_timeout):
+            self.stop()
+            log.error(f"CAN node process did not start in {self.start_timeout} s")
+            raise SysShdErrorC(f"CAN node process did not start in {self.start_timeout} s")
+        if self.status is SysShdNodeStatusE.INTERNAL_ERROR:
+            self.__process.join(self.stop_timeout)
+            log.error("CAN node could not be created in its process")
+            raise SysShdErrorC("CAN node could not be created in its process")
+        log.info(f"CAN node running in process {self.pid}")
+
+    def stop(self) -> None:
+        '''Stop the node and wait until its process finishes. If it does not finish in time,
+        the process is killed.
+        '''
+        self.working_flag.clear()
+        self.__process.join(self.stop_timeout)
+        if self.__process.is_alive():
+            log.warning(f"CAN node process did not stop in {self.stop_timeout} s, killing it")
+            self.__process.kill()
+            self.__process.join()
+
+#######################            FUNCTIONS             #######################
+def _set_scheduling(cpu: int|None, nice: int|None, rt_priority: int|None) -> None:
+    '''Pin the current process to a core and set its priority. If any of them can not be
+    applied, for example for lack of privileges, the process keeps running without it.
+
+    Args:
+        cpu (int|None): Core where the process is pinned, None to skip it.
+        nice (int|None): Nice value, None to skip it.
+        rt_priority (int|None): Real time priority (SCHED_FIFO), None to skip it.
+    '''
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError as err:
+            log.warning(f"CAN node process can not be pinned to core {cpu}: {err}")
+    if nice is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+        except OSError as err:
+            log.warning(f"Nice value {nice} can not be set in the CAN node process: {err}")
+    if rt_priority is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(rt_priority))
+        except OSError as err:
+            log.warning(f"Real time priority {rt_priority} can not be set in the CAN node "+
+                        f"process: {err}")
+
+def _run_node(working_flag, ready, status, # pylint: disable= too-many-arguments
+              cpu: int|None, nice: int|None, rt_priority: int|None, node_args: dict) -> None:
+    '''Main function of the process of the CAN node. It creates and starts the node, and
+    forwards its status to the parent until the node stops.
+
+    Args:
+        working_flag (Event): Working flag of the node, cleared by the parent to stop it.
+        ready (Event): Set when the node has started or could not be created.
+        status (Value): Status of the node shared with the parent.
+        cpu (int|None): Core where the process is pinned.
+        nice (int|None): Nice value of the process.
+        rt_priority (int|None): Real time priority of the process.
+        node_args (dict): Arguments of DrvCanNodeC.
+    '''
+    # The parent stops the node, so Ctrl+C in the terminal does not kill it halfway
+    signal(SIGINT, SIG_IGN)
+    _set_scheduling(cpu, nice, rt_priority)
+    try:
+        node = DrvCanNodeC(working_flag= working_flag, **node_args)
+    except Exception as err: # pylint: disable= broad-exception-caught
+        log.error(f"Error creating the CAN node: {err}")
+        status.value = SysShdNodeStatusE.INTERNAL_ERROR.value
+        ready.set()
+        return
+    node.start()
+    status.value = SysShdNodeStatusE.INIT.value
+    ready.set()
+    while node.is_alive():
+        node.join(DEFAULT_PROCESS_STATUS_PERIOD)
+        status.value = node.status.value
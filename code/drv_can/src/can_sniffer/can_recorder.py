@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+"""
+This module contains the flight recorder of the CAN node, a ring in memory with the last
+frames of the buses that is written to a file when something goes wrong.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from os import path as os_path
+from struct import Struct
+from threading import Lock, Thread
+from time import time, strftime, localtime
+from typing import List
+
+#######################       THIRD PARTY IMPORTS        #######################
+from can import Message, Logger as CanLogger
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+from .can_common import _Constants, DrvCanTriggerC
+
+######################             CONSTANTS              ######################
+from .context import (DEFAULT_RECORD_TIME, DEFAULT_RECORD_SLOTS, DEFAULT_RECORD_PATH,
+                      DEFAULT_RECORD_HOLDOFF)
+
+# Frame: timestamp, id, dlc, bus, flags, payload
+_RECORD_FMT = Struct('<dIBBB8s')
+# Header of the files: magic, version, number of frames
+_FILE_HEADER_FMT = Struct('<4sBI')
+_FILE_MAGIC: bytes = b'CANR'
+_FILE_VERSION: int = 1
+# Suffix of the compact binary files, any other suffix is written with the python-can logger
+_BIN_SUFFIX: str = '.bin'
+# Flags of each frame
+_FLAG_EXTENDED: int = 0x01
+_FLAG_ERROR: int = 0x02
+_FLAG_REMOTE: int = 0x04
+_FLAG_TX: int = 0x08
+_WRITER_JOIN_TIMEOUT: float = 5.0 # s
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvCanRecorderC:
+    """Flight recorder of the CAN node. Each frame received or sent by the node is copied to
+    the next slot of a ring preallocated in memory, with its timestamp. When a trigger happens,
+    an error frame, a frame that matches a trigger or a call to dump, a background thread
+    copies the ring and writes the frames of the last record_time seconds to a file, so the
+    node never waits for the ring to be copied nor for the disk.
+    """
+    def __init__(self, record_time: float = DEFAULT_RECORD_TIME, # pylint: disable= too-many-arguments
+                 n_slots: int = DEFAULT_RECORD_SLOTS, file_path: str = DEFAULT_RECORD_PATH,
+                 holdoff: float = DEFAULT_RECORD_HOLDOFF,
+                 triggers: List[DrvCanTriggerC]|None = None) -> None:
+        '''
+        Allocate the ring of the recorder.
+
+        Args:
+            record_time (float, optional): Seconds before the trigger written to the file.
+                Defaults to DEFAULT_RECORD_TIME.
+            n_slots (int, optional): Max number of frames stored, it must hold the frames
+                of record_time seconds. Defaults to DEFAULT_RECORD_SLOTS.
+            file_path (str, optional): Base name of the files, the time of the trigger is
+                appended to it. With the suffix .bin the compact binary layout is used, with
+                any suffix supported by python-can, as .asc, .blf or .log, its logger is used.
+                Defaults to DEFAULT_RECORD_PATH.
+            holdoff (float, optional): Min seconds between two files, the triggers in between
+                are ignored. Defaults to DEFAULT_RECORD_HOLDOFF.
+            triggers (List[DrvCanTriggerC]|None, optional): Frames that trigger the recorder,
+                besides the error frames. Defaults to None.
+        '''
+        self.record_time: float = record_time
+        self.n_slots: int = n_slots
+        self.file_path: str = file_path
+        self.holdoff: float = holdoff
+        self.triggers: List[DrvCanTriggerC] = [] if triggers is None else triggers
+        # Number of files written and path of the last one
+        self.dumps: int = 0
+        self.last_file: str|None = None
+        self.__buf: bytearray = bytearray(_RECORD_FMT.size * n_slots)
+        self.__head: int = 0
+        # The frames are recorded by the node and by the TX threads of the buses
+        self.__lock: Lock = Lock()
+        self.__last_dump: float = 0.0
+        self.__writer: Thread|None = None
+
+    def record(self, msg: Message, bus: int, sent: bool = False) -> None:
+        '''Copy a frame to the ring and trigger the recorder if it is an error frame or
+        matches a trigger.
+
+        Args:
+            msg (Message): Frame received or sent.
+            bus (int): Index of the bus of the frame.
+            sent (bool, optional): True if the frame was sent by the node. Defaults to False.
+        '''
+        # The frames sent by the node have not timestamp, and only classic frames are stored
+        timestamp = msg.timestamp if msg.timestamp > 0 else time()
+        flags = ((_FLAG_EXTENDED if msg.is_extended_id else 0)
+                 | (_FLAG_ERROR if msg.is_error_frame else 0)
+                 | (_FLAG_REMOTE if msg.is_remote_frame else 0) | (_FLAG_TX if sent else 0))
+        with self.__lock:
+            _RECORD_FMT.pack_into(self.__buf, (self.__head % self.n_slots) * _RECORD_FMT.size,
+                                  timestamp, msg.arbitration_id,
+                                  min(msg.dlc, _Constants.MAX_DLC_SIZE), bus, flags,
+                                  bytes(msg.data))
+            self.__head += 1
+        if msg.is_error_frame:
+            self.dump(f"error frame in bus {bus}")
+        elif not sent:
+            for trigger in self.triggers:
+                if trigger.match(msg.arbitration_id, msg.data, bus):
+                    self.dump(f"frame {hex(msg.arbitration_id)} in bus {bus}")
+                    break
+
+    def add_trigger(self, trigger: DrvCanTriggerC) -> None:
+        '''Add a trigger, if it is not already added.
+
+        Args:
+            trigger (DrvCanTriggerC): Trigger to add.
+        '''
+        if all(vars(trigger) != vars(act_trigger) for act_trigger in self.triggers):
+            self.triggers.append(trigger)
+
+    def remove_trigger(self, trigger: DrvCanTriggerC) -> None:
+        '''Remove a trigger.
+
+        Args:
+            trigger (DrvCanTriggerC): Trigger to remove.
+        '''
+        self.triggers = [act_trigger for act_trigger in self.triggers
+                         if vars(trigger) != vars(act_trigger)]
+
+    def dump(self, reason: str) -> str|None:
+        '''Write the frames recorded until now to a new file in a background thread. If the
+        previous file is still being written or it was triggered less than holdoff seconds ago,
+        the trigger is ignored.
+
+        Args:
+            reason (str): Reason of the trigger, written in the log.
+
+        Returns:
+            str|None: Path of the file, None if the trigger has been ignored.
+        '''
+        now = time()
+        if ((self.__writer is not None and self.__writer.is_alive())
+            or now - self.__last_dump < self.holdoff):
+            log.debug(f"Flight recorder trigger ignored: {reason}")
+            return None
+        with self.__lock:
+            head = self.__head
+        self.__last_dump = now
+        base, suffix = os_path.splitext(self.file_path)
+        file_path = (f"{base}_{strftime('%Y%m%d_%H%M%S', localtime(now))}"+
+                     f"_{int(now*1000)%1000:03d}{suffix}")
+        log.warning(f"Flight recorder triggered by {reason}, writing {file_path}")
+        self.__writer = Thread(target= self.__write, args= (head, now, file_path),
+                               daemon= True, name= 'CAN_RECORDER')
+        self.__writer.start()
+        self.dumps += 1
+        self.last_file = file_path
+        return file_path
+
+    def __write(self, head: int, trigger_time: float, file_path: str) -> None:
+        '''Write the frames of the last record_time seconds before the trigger to a file.
+        The ring is copied without the lock, as the frames keep being recorded, and the frames
+        overwritten since the trigger are discarded.
+
+        Args:
+            head (int): Number of frames recorded when the recorder was triggered.
+            trigger_time (float): Time of the trigger.
+            file_path (str): Path of the file.
+        '''
+        # The copy and the frames recorded hold the GIL, so no frame is copied half written
+        frames = bytes(self.__buf)
+        with self.__lock:
+            first = max(head, self.__head) - self.n_slots
+        first = max(first, 0)
+        records = []
+        for index in range(first, head):
+            offset = (index % self.n_slots) * _RECORD_FMT.size
+            record = frames[offset:offset + _RECORD_FMT.size]
+            if _RECORD_FMT.unpack_from(record)[0] >= trigger_time - self.record_time:
+                records.append(record)
+        try:
+            if os_path.splitext(file_path)[1] == _BIN_SUFFIX:
+                with open(file_path, 'wb') as file:
+                    file.write(_FILE_HEADER_FMT.pack(_FILE_MAGIC, _FILE_VERSION, len(records)))
+                    file.write(b''.join(records))
+            else:
+                writer = CanLogger(file_path)
+                for record in records:
+                    writer.on_message_received(_build_message(record))
+                writer.stop()
+            log.info(f"Flight recorder wrote {len(records)} frames to {file_path}")
+        except OSError as err:
+            log.error(f"Flight recorder could not write {file_path}: {err}")
+
+    def close(self) -> None:
+        '''Wait until the file being written, if any, is finished.
+        '''
+        if self.__writer is not None:
+            self.__writer.join(_WRITER_JOIN_TIMEOUT)
+
+#######################            FUNCTIONS             #######################
+def _build_message(record: bytes) -> Message:
+    '''Build the python-can message of a frame of the recorder.
+
+    Args:
+        record (bytes): Frame with the layout of the ring.
+
+    Returns:
+        Message: Message of python-can, with the index of the bus as channel.
+    '''
+    timestamp, addr, dlc, bus, flags, payload = _RECORD_FMT.unpack(record)
+    return Message(timestamp= timestamp, arbitration_id= addr, dlc= dlc,
+                   data= payload[:dlc], channel= bus,
+                   is_extended_id= bool(flags & _FLAG_EXTENDED),
+                   is_error_frame= bool(flags & _FLAG_ERROR),
+                   is_remote_frame= bool(flags & _FLAG_REMOTE), is_rx= not flags & _FLAG_TX)
+
+def read_record(file_path: str) -> List[Message]:
+    '''Read a file written by the flight recorder with the compact binary layout. The files
+    written with the python-can logger are read with can.LogReader.
+
+    Args:
+        file_path (str): Path of the file.
+
+    Raises:
+        ValueError: Raised when the file has not the layout of the recorder.
+
+    Returns:
+        List[Message]: Frames of the file, from the oldest.
+    '''
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    magic, version, n_frames = _FILE_HEADER_FMT.unpack_from(data)
+    if magic != _FILE_MAGIC or version != _FILE_VERSION:
+        log.error(f"The file {file_path} has not been written by the flight recorder")
+        raise ValueError(f"The file {file_path} has not been written by the flight recorder")
+    offset = _FILE_HEADER_FMT.size
+    return [_build_message(data[offset + index*_RECORD_FMT.size:
+                                offset + (index+1)*_RECORD_FMT.size])
+            for index in range(n_frames)]
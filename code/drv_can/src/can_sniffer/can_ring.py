@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+"""
+This module contains the ring buffer of the CAN node, a buffer in shared memory where
+the node writes each message once and every process reads it with its own cursor.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from typing import List
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+from .can_common import DrvCanMessageC, DrvCanFilterC
+from .can_shm import open_shared_memory, close_shared_memory
+
+######################             CONSTANTS              ######################
+from .context import DEFAULT_RING_NAME, DEFAULT_RING_SLOTS
+
+# Header: number of messages written, number of slots
+_HEADER_FMT = Struct('<QI4x')
+_HEAD_FMT = Struct('<Q')
+# Slot of each message: sequence counter, addr, dlc, bus, timestamp, payload
+_SEQ_FMT = Struct('<Q')
+_SLOT_FMT = Struct('<QHBB4xd8s')
+_DATA_FMT = Struct('<HBB4xd8s')
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvCanRingC:
+    """Ring buffer in shared memory with fixed size slots, written only by the CAN node
+    and read by any number of processes.
+    The node writes each message once in the next slot, and each reader keeps its own
+    cursor and only gets the messages that match its filters. The sequence counter of
+    each slot identifies the message written in it, and is odd while the node is writing
+    it, so the readers detect the messages overwritten before they could read them.
+    """
+    def __init__(self, name: str = DEFAULT_RING_NAME, n_slots: int = DEFAULT_RING_SLOTS,
+                 create: bool = False, filters: List[DrvCanFilterC]|None = None) -> None:
+        '''
+        Create or open the ring buffer.
+
+        Args:
+            name (str, optional): Name of the shared memory. Defaults to DEFAULT_RING_NAME.
+            n_slots (int, optional): Number of messages stored, only used when it is
+                created. Defaults to DEFAULT_RING_SLOTS.
+            create (bool, optional): True to create it, only done by the CAN node,
+                False to open the one created by the node. Defaults to False.
+            filters (List[DrvCanFilterC]|None, optional): Filters of the messages read,
+                None to read all of them. Defaults to None.
+        '''
+        self.name: str = name
+        self.__owner: bool = create
+        self.__shm: SharedMemory
+        self.__shm, created = open_shared_memory(name,
+                                    _HEADER_FMT.size + _SLOT_FMT.size * n_slots, create)
+        if created:
+            _HEADER_FMT.pack_into(self.__shm.buf, 0, 0, n_slots)
+        self.__buf: memoryview = self.__shm.buf
+        self.__head, self.n_slots = _HEADER_FMT.unpack_from(self.__buf, 0)
+        # The readers start with the next message written
+        self.__cursor: int = self.__head
+        self.filters: List[DrvCanFilterC] = [] if filters is None else filters
+        # Messages overwritten before this reader could read them
+        self.lost: int = 0
+
+    def write(self, message: DrvCanMessageC) -> None:
+        '''Write a message in the next slot. Only the CAN node writes in the ring buffer.
+
+        Args:
+            message (DrvCanMessageC): Message received from CAN.
+        '''
+        index = self.__head
+        offset = _HEADER_FMT.size + (index % self.n_slots) * _SLOT_FMT.size
+        _SEQ_FMT.pack_into(self.__buf, offset, 2*index + 1)
+        _DATA_FMT.pack_into(self.__buf, offset + _SEQ_FMT.size, message.addr, message.dlc,
+                            message.bus, message.timestamp, bytes(message.payload))
+        _SEQ_FMT.pack_into(self.__buf, offset, 2*index + 2)
+        self.__head = index + 1
+        _HEAD_FMT.pack_into(self.__buf, 0, self.__head)
+
+    def __match(self, addr: int, bus: int) -> bool:
+        '''Check if an id matches the filters of the reader.
+
+        Args:
+            addr (int): CAN id.
+            bus (int): Index of the bus where the message was received.
+
+        Returns:
+            bool: True if it matches any filter or there are not filters.
+        '''
+        if len(self.filters) == 0:
+            return True
+        for read_filter in self.filters:
+            if (bus == read_filter.bus
+                and (addr & read_filter.mask) == (read_filter.addr & read_filter.mask)):
+                return True
+        return False
+
+    def read(self, max_msgs: int|None = None) -> List[DrvCanMessageC]:
+        '''Read the messages written since the last read that match the filters of the reader.
+        If the node has overwritten some of them, they are counted in lost.
+
+        Args:
+            max_msgs (int|None, optional): Max number of messages checked, None to check all
+                the messages written. Defaults to None.
+
+        Returns:
+            List[DrvCanMessageC]: Messages read, from the oldest.
+        '''
+        head = _HEAD_FMT.unpack_from(self.__buf, 0)[0]
+        if head - self.__cursor > self.n_slots:
+            self.lost += head - self.__cursor - self.n_slots
+            self.__cursor = head - self.n_slots
+        if max_msgs is not None:
+            head = min(head, self.__cursor + max_msgs)
+        messages = []
+        for index in range(self.__cursor, head):
+            offset = _HEADER_FMT.size + (index % self.n_slots) * _SLOT_FMT.size
+            seq, addr, dlc, bus, timestamp, payload = _SLOT_FMT.unpack_from(self.__buf, offset)
+            if seq != 2*index + 2 or _SEQ_FMT.unpack_from(self.__buf, offset)[0] != seq:
+                self.lost += 1
+            elif self.__match(addr, bus):
+                messages.append(DrvCanMessageC(addr, dlc, bytearray(payload[:dlc]), timestamp,
+                                               bus))
+        self.__cursor = head
+        return messages
+
+    def close(self) -> None:
+        '''Close the ring buffer, the node also removes it.
+        '''
+        self.__buf.release()
+        close_shared_memory(self.__shm, self.__owner)
+
+#######################            FUNCTIONS             #######################
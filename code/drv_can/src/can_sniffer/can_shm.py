@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""
+This module contains the functions used to create and open the shared memory
+of the mailbox and the ring buffer of the CAN node.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Set, Tuple
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+
+######################             CONSTANTS              ######################
+# Names of the shared memories created by this process
+_CREATED: Set[str] = set()
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+
+#######################            FUNCTIONS             #######################
+def open_shared_memory(name: str, size: int, create: bool) -> Tuple[SharedMemory, bool]:
+    '''Create or open a shared memory. If it is created and already exists, because
+    a previous node did not finish correctly, it is reused, or created again if its size
+    is different.
+
+    Args:
+        name (str): Name of the shared memory.
+        size (int): Size in bytes, only used when it is created.
+        create (bool): True to create it, False to open an existing one.
+
+    Returns:
+        Tuple[SharedMemory, bool]: Shared memory and True if it has been created now.
+    '''
+    created = False
+    if create:
+        try:
+            shm = SharedMemory(name= name, create= True, size= size)
+            created = True
+        except FileExistsError:
+            shm = SharedMemory(name= name)
+            if shm.size == size:
+                log.warning(f"Shared memory {name} already exists, it will be reused")
+            else:
+                log.warning(f"Shared memory {name} already exists with {shm.size} bytes "+
+                            f"instead of {size}, it will be created again")
+                shm.close()
+                shm.unlink()
+                shm = SharedMemory(name= name, create= True, size= size)
+                created = True
+        _CREATED.add(name)
+    else:
+        shm = SharedMemory(name= name)
+        # Only the creator removes it, so it must not be removed when a reader exits
+        if name not in _CREATED:
+            resource_tracker.unregister(shm._name, 'shared_memory') # pylint: disable= protected-access
+    return shm, created
+
+def close_shared_memory(shm: SharedMemory, owner: bool) -> None:
+    '''Close a shared memory, and remove it if it was created by this object.
+
+    Args:
+        shm (SharedMemory): Shared memory.
+        owner (bool): True if the object that closes it created it.
+    '''
+    shm.close()
+    if owner:
+        _CREATED.discard(shm.name)
+        shm.unlink()
@@ -5,13 +5,17 @@ in order to configure channels and send/received messages.
 """
 #######################        MANDATORY IMPORTS         #######################
 from __future__ import annotations
-from typing import List
 #######################         GENERIC IMPORTS          #######################
-from threading import Event
-from enum import Enum
-from can import ThreadSafeBus, Message, CanOperationError
+from itertools import count
+from threading import BoundedSemaphore, Event, Lock, Thread
+from queue import PriorityQueue, Empty
+from time import time
+from typing import Callable, Dict, Iterator, List
+from can import (BusABC, ThreadSafeBus, Message, CanOperationError, Listener, Notifier,
+                 CyclicSendTaskABC, ModifiableCyclicTaskABC)
 
 #######################       THIRD PARTY IMPORTS        #######################
+import posix_ipc as ipc
 
 #######################    SYSTEM ABSTRACTION IMPORTS    #######################
 from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
@@ -21,87 +25,91 @@ if __name__ == '__main__':
     cycler_logger = SysLogLoggerC(file_log_levels='../log_config.yaml')
 log: Logger = sys_log_logger_get_module_logger(__name__)
 
-from system_shared_tool import SysShdIpcChanC, SysShdNodeC, SysShdNodeParamsC, SysShdNodeStatusE
+from system_shared_tool import SysShdNodeC, SysShdNodeParamsC, SysShdNodeStatusE
 #######################          PROJECT IMPORTS         #######################
 
 #######################          MODULE IMPORTS          #######################
+from .can_common import (_Constants, DrvCanCmdTypeE, DrvCanMessageC, DrvCanFilterC,
+                         DrvCanCmdDataC, DrvCanOverflowE, DrvCanDeliveryE, DrvCanPeriodicC,
+                         DrvCanPriorityE, DrvCanRequestC, DrvCanResponseC, DrvCanTriggerC)
+from .can_codec import (DrvCanChanC, DrvCanTxChanC, decode_can_data, encode_can_msg, is_pickled,
+                        pickle_legacy_msg)
+from .can_filter_index import DrvCanFilterIndexC
+from .can_mailbox import DrvCanMailboxC
+from .can_ring import DrvCanRingC
+from .can_stats import DrvCanNodeStatsC, DrvCanFilterStatsC, DrvCanBusLoadC, frame_bits
+from .can_recorder import DrvCanRecorderC
 
 ######################             CONSTANTS              ######################
 from .context import (DEFAULT_CHAN_NUM_MSG, DEFAULT_MAX_MSG_SIZE, DEFAULT_TIMEOUT_SEND_MSG,
                       DEFAULT_TIMEOUT_RX_MSG, DEFAULT_NODE_PERIOD, DEFAULT_NODE_NAME,
-                      DEFAULT_TX_NAME, DEFAULT_IFACE_NAME, DEFAULT_IFACE_CHAN_NAME)
+                      DEFAULT_TX_NAME, DEFAULT_IFACE_NAME, DEFAULT_IFACE_CHAN_NAME,
+                      DEFAULT_IFACE_BITRATE, DEFAULT_IFACE_FD, DEFAULT_IFACE_RX_OWN,
+                      DEFAULT_RX_BURST_MAX, DEFAULT_RX_BURST_TIME, DEFAULT_TX_BURST_MAX,
+                      DEFAULT_TX_BURST_TIME, DEFAULT_KERNEL_FILTERS, DEFAULT_EVENT_DRIVEN,
+                      DEFAULT_STATS_NAME, DEFAULT_STATS_PERIOD, DEFAULT_STATS_MSG_SIZE,
+                      DEFAULT_STATS_TOP_IDS, DEFAULT_MAILBOX_NAME, DEFAULT_RING_NAME,
+                      DEFAULT_RING_SLOTS, DEFAULT_BUS_LOAD_MAX)
+_TO_S: int = 1000 # Conversion from ms to s
+# The priority queues of the node return first the lowest rank, so the rank of each entry is
+# the priority negated. The messages received and the errors of the buses are not delayed
+# by the commands, and the TX threads stop after sending every message queued.
+_RX_RANK: int = -DrvCanPriorityE.CONTROL.value
+_STOP_RANK: int = 1
 
 
 #######################              ENUMS               #######################
 
 
 #######################             CLASSES              #######################
-class _Constants:
+class DrvCanBusParamsC: # pylint: disable= too-few-public-methods
+    """Parameters used by the CAN node to open the bus with python-can.
     """
-    Class to store constants used in the module.
-    """
-    MAX_DLC_SIZE : int = 8
-    MIN_ID          = 0x000     # As the last 4 bits will identify the messages are reserved
-    MAX_ID          = 0x7FF     # In standard mode the can id max value is 0x7FF
-class DrvCanCmdTypeE(Enum):
-    """
-    Type of command for the CAN
-    """
-    MESSAGE = 0
-    ADD_FILTER = 1
-    REMOVE_FILTER = 2
-
-class DrvCanMessageC:
-    """The class to create messages correctly to be send by can .
-    """
-    def __init__(self, addr : int, size : int, payload : int | bytearray) -> None:
+    def __init__(self, interface: str = DEFAULT_IFACE_NAME, # pylint: disable= too-many-arguments
+                 channel: str = DEFAULT_IFACE_CHAN_NAME, bitrate: int = DEFAULT_IFACE_BITRATE,
+                 fd: bool = DEFAULT_IFACE_FD,
+                 receive_own_messages: bool = DEFAULT_IFACE_RX_OWN) -> None:
         '''
-        Initialize a CAN message.
+        Initialize the parameters of the bus.
 
         Args:
-            addr (int): CAN datafrane addres.
-            size (int): Message payload size on bytes.
-            data (int): Can message payload.
-
-        Raises:
-            BytesWarning: Throw an exception if the payload size of message is too long (size > 8).
-        '''
-        self.addr = addr
-        self.dlc = size
-        if self.dlc > _Constants.MAX_DLC_SIZE:
-            log.error(f"Message payload size on bytes (size = {self.dlc}) \
-                      is higher than {_Constants.MAX_DLC_SIZE}")
-            raise BytesWarning("To many element for a CAN message")
-        if isinstance(payload,int):
-            self.payload = payload.to_bytes(size, byteorder='little', signed = False)
-        else:
-            self.payload = payload
-
-class DrvCanFilterC:
-    """This class is used to create objects that
-    works as messages to make write or erase filters in can .
-    """
-    def __init__(self, addr : int, mask : int, chan_name: str):
-        if _Constants.MIN_ID <= addr <= _Constants.MAX_ID:
-            self.addr = addr
-        else:
-            log.error("Wrong value for address, value must be between 0-0x7ff")
-            raise ValueError("Wrong value for address, value must be between 0-0x7ff")
-
-        if _Constants.MIN_ID <= mask <= _Constants.MAX_ID:
-            self.mask = mask
-        else:
-            log.error("Wrong value for mask, value must be between 0 and 0x7ff")
-            raise ValueError("Wrong value for mask, value must be between 0 and 0x7ff")
-
-        self.chan_name = chan_name
+            interface (str, optional): Name of the python-can interface, for example
+                socketcan or virtual. Defaults to DEFAULT_IFACE_NAME.
+            channel (str, optional): Channel of the interface. Defaults to DEFAULT_IFACE_CHAN_NAME.
+            bitrate (int, optional): Bitrate in bit/s. Defaults to DEFAULT_IFACE_BITRATE.
+            fd (bool, optional): Use CAN FD. Defaults to DEFAULT_IFACE_FD.
+            receive_own_messages (bool, optional): Receive the messages sent by the node.
+                Defaults to DEFAULT_IFACE_RX_OWN.
+        '''
+        self.interface: str = interface
+        self.channel: str = channel
+        self.bitrate: int = bitrate
+        self.fd: bool = fd # pylint: disable= invalid-name
+        self.receive_own_messages: bool = receive_own_messages
 
 class _CanActiveFilterC(DrvCanFilterC):
     """This class is used to create objects that contains active filters.
+    The filters added with a pickled command, by drivers that use a SysShdIpcChanC, receive
+    the messages pickled as the versions before the binary encoding, as they read them with a
+    SysShdIpcChanC too.
     """
-    def __init__(self, addr : int, mask : int, chan_name: str):
-        super().__init__(addr, mask, chan_name)
-        self.chan: SysShdIpcChanC = SysShdIpcChanC(name= self.chan_name, max_message_size= 150)
+    def __init__(self, addr : int, mask : int, chan_name: str, # pylint: disable= too-many-arguments
+                 overflow: DrvCanOverflowE = DrvCanOverflowE.BLOCK,
+                 delivery: DrvCanDeliveryE = DrvCanDeliveryE.QUEUE,
+                 multicast: bool = False, bus: int = 0,
+                 shared: DrvCanMailboxC|DrvCanRingC|None = None, pickled: bool = False):
+        super().__init__(addr, mask, chan_name, overflow, delivery, multicast, bus)
+        self.pickled: bool = pickled
+        self.chan: DrvCanChanC|None = None
+        # Mailbox or ring buffer where the messages are written instead of the channel
+        self.shared: DrvCanMailboxC|DrvCanRingC|None = None
+        if delivery is DrvCanDeliveryE.QUEUE:
+            # The pickled messages are longer than the encoded ones
+            self.chan = DrvCanChanC(name= self.chan_name,
+                                    max_message_size= DEFAULT_MAX_MSG_SIZE if pickled else 150)
+        else:
+            self.shared = shared
+        self.stats: DrvCanFilterStatsC = DrvCanFilterStatsC()
 
     def match(self, id_can: int) -> bool:
         """Checks if the id_can matches with the selected filter.
@@ -114,28 +122,411 @@ class _CanActiveFilterC(DrvCanFilterC):
             aux = True
         return aux
 
+    def forward(self, message: DrvCanMessageC, encoded_data: bytes|None = None) -> None:
+        """Send a message to the channel of the filter. If the channel is full, wait until
+        there is space or discard messages, depending on the overflow policy of the filter.
+        Only used by the filters with queue delivery, the node writes the messages of the rest
+        in the mailbox or the ring buffer.
+
+        Args:
+            message (DrvCanMessageC): Message received from CAN.
+            encoded_data (bytes|None, optional): Message already encoded, so it is encoded
+                once when it is sent to several filters. Not used by the pickled filters.
+                Defaults to None.
+        """
+        timestamp = time()
+        if self.pickled:
+            encoded_data = pickle_legacy_msg(message)
+        elif encoded_data is None:
+            encoded_data = encode_can_msg(message)
+        if self.overflow is DrvCanOverflowE.BLOCK:
+            if self.chan.current_messages >= self.chan.max_messages:
+                self.stats.update_full()
+            self.chan.send_raw(encoded_data)
+            sent = True
+        else:
+            sent = self.chan.send_raw_unblocking(encoded_data)
+            if not sent:
+                self.stats.update_full()
+                if self.overflow is DrvCanOverflowE.COALESCE:
+                    self.__coalesce(message.addr, timestamp)
+                if self.overflow is not DrvCanOverflowE.DROP_NEWEST:
+                    if self.chan.current_messages >= self.chan.max_messages:
+                        self.__drop_oldest(timestamp)
+                    sent = self.chan.send_raw_unblocking(encoded_data)
+        if sent:
+            self.stats.update_forwarded(message.dlc, timestamp)
+        else:
+            self.stats.update_dropped(timestamp)
+
+    def __drop_oldest(self, timestamp: float) -> None:
+        """Discard the oldest message of the channel.
+
+        Args:
+            timestamp (float): Time when the message that did not fit was received.
+        """
+        try:
+            self.chan.receive(timeout= 0)
+            self.stats.update_dropped(timestamp)
+        except ipc.BusyError: #pylint: disable= c-extension-no-member
+            pass
+
+    def __coalesce(self, addr: int, timestamp: float) -> None:
+        """Keep in the channel only the newest message of each id, and none with the id of
+        the message that did not fit, as it is newer than all of them.
+        The messages kept are sent back without blocking, so if the consumer fills the channel
+        meanwhile they are dropped instead of blocking the node.
+
+        Args:
+            addr (int): Id of the message that did not fit.
+            timestamp (float): Time when the message that did not fit was received.
+        """
+        pending: Dict = {}
+        n_read = 0
+        while True:
+            try:
+                encoded_data, _ = self.chan.receive(timeout= 0)
+            except ipc.BusyError: #pylint: disable= c-extension-no-member
+                break
+            n_read += 1
+            data = decode_can_data(encoded_data)
+            key = data.addr if isinstance(data, DrvCanMessageC) else -n_read
+            pending.pop(key, None)
+            pending[key] = encoded_data
+        pending.pop(addr, None)
+        n_kept = 0
+        for encoded_data in pending.values():
+            if self.chan.send_raw_unblocking(encoded_data):
+                n_kept += 1
+        for _ in range(n_read - n_kept):
+            self.stats.update_dropped(timestamp)
+
+    def snapshot(self) -> Dict:
+        """Get the counters of the filter and the messages waiting in its channel.
+
+        Returns:
+            Dict: Counters of the filter.
+        """
+        data = {'addr': self.addr, 'mask': self.mask, 'chan_name': self.chan_name,
+                'bus': self.bus, 'delivery': self.delivery.name, 'multicast': self.multicast,
+                'depth': 0 if self.chan is None else self.chan.current_messages}
+        data.update(vars(self.stats))
+        return data
+
     def close_chan(self):
         """Closes the communication channel.
         """
-        log.debug(f"Closing channel {self.chan_name}")
-        self.chan.terminate()
+        if self.chan is not None:
+            log.debug(f"Closing channel {self.chan_name}")
+            self.chan.terminate()
+
+class _CanCommandEventC: # pylint: disable= too-few-public-methods
+    """Command read from the TX channel in event driven mode, pending to be applied. It holds
+    a slot of its lane until it is applied.
+    """
+    def __init__(self, command: DrvCanCmdDataC, pickled: bool, slots: BoundedSemaphore) -> None:
+        self.command: DrvCanCmdDataC = command
+        self.pickled: bool = pickled
+        self.slots: BoundedSemaphore = slots
 
-class DrvCanCmdDataC:
+class _CanPendingRequestC:
+    """Request sent by the CAN node that is waiting for its response.
     """
-    Returns a function that can be called when the command is not available .
+    def __init__(self, request: DrvCanRequestC, chan: DrvCanChanC, deadline: float) -> None:
+        '''
+        Initialize the pending request when it is sent.
+
+        Args:
+            request (DrvCanRequestC): Request sent.
+            chan (DrvCanChanC): Channel where the response is sent.
+            deadline (float): Time when the timeout expires, in timestamp.
+        '''
+        self.request: DrvCanRequestC = request
+        self.chan: DrvCanChanC = chan
+        self.deadline: float = deadline
+        self.sent: float = time()
+
+    def match(self, id_can: int) -> bool:
+        '''Check if a message is the response of the request.
+
+        Args:
+            id_can (int): Complete id of the message received by CAN.
+
+        Returns:
+            bool: True if the id matches the response id.
+        '''
+        return (id_can & self.request.resp_mask) == (self.request.resp_addr
+                                                     & self.request.resp_mask)
+
+    def reply(self, message: DrvCanMessageC|None) -> None:
+        '''Send the result of the request to its channel. If the channel is full the result
+        is discarded, so a caller that does not read its channel does not block the node.
+
+        Args:
+            message (DrvCanMessageC|None): Response received, None if the timeout expired.
+        '''
+        response = DrvCanResponseC(self.request.req_id, message, time() - self.sent)
+        if not self.chan.send_data_unblocking(response):
+            log.warning(f"Response of the request {self.request.req_id} discarded, channel "+
+                        f"{self.request.chan_name} is full")
+
+class _CanBusC:
+    """Bus managed by the CAN node, with its own filters and stats, and its own queue and
+    thread to send the messages, so a bus that is busy does not delay the rest of them.
     """
-    def __init__(self, data_type: DrvCanCmdTypeE, payload: DrvCanMessageC|DrvCanFilterC):
-        self.data_type = data_type
-        self.payload = payload
+    def __init__(self, index: int, can_bus: BusABC, node_stats: DrvCanNodeStatsC, # pylint: disable= too-many-arguments
+                 node_lock: Lock, bitrate: int = DEFAULT_IFACE_BITRATE, count_tx: bool = True,
+                 recorder: DrvCanRecorderC|None = None) -> None:
+        '''
+        Initialize the bus and start its TX thread.
+
+        Args:
+            index (int): Index of the bus in the node, used in the messages and filters.
+            can_bus (BusABC): Bus already opened.
+            node_stats (DrvCanNodeStatsC): Stats of the node, that aggregate all the buses.
+            node_lock (Lock): Lock of the stats of the node, shared by the TX threads of all
+                the buses.
+            bitrate (int, optional): Bitrate of the bus in bit/s, used to estimate its load.
+                Defaults to DEFAULT_IFACE_BITRATE.
+            count_tx (bool, optional): Count the messages sent in the load of the bus, False
+                when the bus receives its own messages, as they are counted when received.
+                Defaults to True.
+            recorder (DrvCanRecorderC|None, optional): Flight recorder of the node, where the
+                messages sent are recorded if they are counted. Defaults to None.
+        '''
+        self.index: int = index
+        self.can_bus: BusABC = can_bus
+        self.load: DrvCanBusLoadC = DrvCanBusLoadC(bitrate)
+        self.__count_tx: bool = count_tx
+        self.__recorder: DrvCanRecorderC|None = recorder if count_tx else None
+        self.filters: DrvCanFilterIndexC = DrvCanFilterIndexC()
+        # Requests sent through the bus waiting for their response
+        self.requests: List[_CanPendingRequestC] = []
+        self.stats: DrvCanNodeStatsC = DrvCanNodeStatsC()
+        self.__node_stats: DrvCanNodeStatsC = node_stats
+        self.__node_lock: Lock = node_lock
+        # Message read from the bus but not processed because the budget of the cycle was spent
+        self.rx_carry: Message|None = None
+        # Messages to send ordered by the priority of their commands, the counter keeps
+        # the order of the messages with the same priority
+        self.__tx_queue: PriorityQueue = PriorityQueue()
+        self.__tx_seq: Iterator[int] = count()
+        # Last error sending a message, raised again in the thread of the node
+        self.__tx_error: CanOperationError|None = None
+        # Messages sent periodically by python-can, by id
+        self.__periodic: Dict[int, CyclicSendTaskABC] = {}
+        try:
+            self.can_bus.flush_tx_buffer()
+        except NotImplementedError:
+            log.debug("The CAN interface does not support flushing the TX buffer")
+        self.__tx_thread: Thread = Thread(target= self.__write_msgs, daemon= True,
+                                          name= f"CAN_BUS{index}_TX")
+        self.__tx_thread.start()
+
+    def send(self, data: DrvCanMessageC,
+             priority: DrvCanPriorityE = DrvCanPriorityE.CONFIG) -> None:
+        '''Queue a message to be sent by the TX thread of the bus, after the messages
+        already queued with the same or higher priority.
+
+        Args:
+            data (DrvCanMessageC): Message to send.
+            priority (DrvCanPriorityE, optional): Priority of the command of the message.
+                Defaults to DrvCanPriorityE.CONFIG.
+        '''
+        self.__tx_queue.put((-priority.value, next(self.__tx_seq), data))
+
+    def __write_msgs(self) -> None:
+        '''
+        TX thread of the bus. It sends the messages queued until it receives None.
+        An error sending a message is kept to be raised in the thread of the node, and the
+        thread goes on with the next message, so the messages queued later are still sent.
+        '''
+        data: DrvCanMessageC|None = self.__tx_queue.get()[2]
+        while data is not None:
+            try:
+                msg = _build_msg(data)
+                self.can_bus.send(msg, timeout=DEFAULT_TIMEOUT_SEND_MSG)
+                if self.__count_tx:
+                    self.load.update_tx(data.dlc)
+                if self.__recorder is not None:
+                    self.__recorder.record(msg, self.index, sent= True)
+                self.stats.update_tx_msg()
+                with self.__node_lock:
+                    self.__node_stats.update_tx_msg()
+                log.debug("Message correctly send")
+            except CanOperationError as err:
+                log.error(err)
+                self.__tx_error = err
+            except Exception as err: # pylint: disable= broad-exception-caught
+                log.error(f"Message {hex(data.addr)} can not be sent in bus {self.index}: {err}")
+                self.__tx_error = CanOperationError(f"Message {hex(data.addr)} can not be "+
+                                                    f"sent in bus {self.index}: {err}")
+            data = self.__tx_queue.get()[2]
+
+    def start_periodic(self, data: DrvCanPeriodicC) -> None:
+        '''Start sending a message periodically with the broadcast manager of python-can, which
+        uses the one of the kernel in SocketCAN, so no command is needed for each message.
+        If a message with the same id is already being sent, it is replaced.
+
+        Args:
+            data (DrvCanPeriodicC): Message and period.
+        '''
+        task = self.__periodic.pop(data.addr, None)
+        if task is not None:
+            log.warning(f"Periodic message {hex(data.addr)} already started, it is replaced")
+            task.stop()
+        log.info(f"Starting periodic message {hex(data.addr)} every {data.period} ms "+
+                 f"in bus {self.index}")
+        self.__periodic[data.addr] = self.can_bus.send_periodic(_build_msg(data),
+                                                                data.period/_TO_S)
+
+    def modify_periodic(self, data: DrvCanPeriodicC) -> None:
+        '''Change the payload or the period of a message sent periodically. If only the
+        payload changes and the task supports it, it is changed without stopping the task.
+
+        Args:
+            data (DrvCanPeriodicC): Message and period.
+        '''
+        task = self.__periodic.get(data.addr)
+        if task is None:
+            log.warning(f"Periodic message {hex(data.addr)} not started, it is started now")
+            self.start_periodic(data)
+        elif isinstance(task, ModifiableCyclicTaskABC) and task.period == data.period/_TO_S:
+            task.modify_data(_build_msg(data))
+        else:
+            task.stop()
+            self.__periodic[data.addr] = self.can_bus.send_periodic(_build_msg(data),
+                                                                    data.period/_TO_S)
+
+    def stop_periodic(self, addr: int) -> None:
+        '''Stop sending a message periodically.
+
+        Args:
+            addr (int): Id of the message.
+        '''
+        task = self.__periodic.pop(addr, None)
+        if task is None:
+            log.warning(f"Periodic message {hex(addr)} already stopped")
+        else:
+            log.info(f"Stopping periodic message {hex(addr)} in bus {self.index}")
+            task.stop()
+
+    def update_load(self, timestamp: float) -> None:
+        '''Estimate the load of the bus if its window has finished, including the messages
+        sent periodically, which are sent without the TX thread.
+
+        Args:
+            timestamp (float): Current time.
+        '''
+        periodic_rate = 0.0
+        if self.__count_tx:
+            periodic_rate = sum(frame_bits(task.messages[0].dlc) / task.period
+                                for task in self.__periodic.values())
+        self.load.update(timestamp, periodic_rate)
+
+    def check_error(self) -> None:
+        '''Raise the last error sending a message, if there has been any since the last check.
+
+        Raises:
+            err (CanOperationError): Raised when error with CAN connection occurred
+        '''
+        err, self.__tx_error = self.__tx_error, None
+        if err is not None:
+            raise err
+
+    def update_filters(self) -> None:
+        '''Install the active filters of the bus in the CAN interface, so the messages that
+        do not match any of them are dropped before reaching the node. If the interface does
+        not support it, python-can filters them when they are read, and in any case the node
+        checks the filters again before forwarding the message.
+        The responses of the pending requests are also installed, unless there are no active
+        filters, as with no active filters the interface receives all the messages.
+        '''
+        # Filters of several channels with the same id and mask are installed once
+        keys = [(act_filter.addr, act_filter.mask) for act_filter in self.filters]
+        if len(keys) > 0:
+            keys.extend((pending.request.resp_addr, pending.request.resp_mask)
+                        for pending in self.requests)
+        bus_filters = [{'can_id': addr, 'can_mask': mask, 'extended': False}
+                       for addr, mask in dict.fromkeys(keys)]
+        try:
+            self.can_bus.set_filters(bus_filters)
+        except CanOperationError as err:
+            log.warning(f"Filters can not be installed in the CAN interface: {err}")
+
+    def is_received(self, addr: int, mask: int) -> bool:
+        '''Check if the active filters of the bus let every id that matches an address and
+        mask reach the node.
+
+        Args:
+            addr (int): Address.
+            mask (int): Mask applied to the address.
+
+        Returns:
+            bool: True if there is a filter that matches all those ids, or there are not
+            filters.
+        '''
+        return len(self.filters) == 0 or any(
+            (act_filter.mask & ~mask) == 0
+            and (addr & act_filter.mask) == (act_filter.addr & act_filter.mask)
+            for act_filter in self.filters)
+
+    def snapshot(self) -> Dict:
+        '''Get the counters of the bus.
+
+        Returns:
+            Dict: Counters of the bus, with its index and channel.
+        '''
+        data = {'bus': self.index, 'channel': str(self.can_bus.channel_info),
+                'periodic_msgs': len(self.__periodic), 'pending_requests': len(self.requests),
+                'load': self.load.snapshot()}
+        data.update(self.stats.snapshot(DEFAULT_STATS_TOP_IDS))
+        return data
+
+    def stop(self) -> None:
+        '''Send the messages already queued, stop the TX thread and shut down the bus.
+        '''
+        self.__tx_queue.put((_STOP_RANK, next(self.__tx_seq), None))
+        self.__tx_thread.join()
+        for task in self.__periodic.values():
+            task.stop()
+        self.__periodic.clear()
+        self.can_bus.shutdown()
+
+class _CanEventListenerC(Listener):
+    """Listener used in event driven mode, it pushes the messages received from a bus,
+    with the bus, and the errors of the bus to the queue of events of the node.
+    """
+    def __init__(self, push: Callable[[int, object], None], bus: _CanBusC) -> None:
+        self.push: Callable[[int, object], None] = push
+        self.bus: _CanBusC = bus
+
+    def on_message_received(self, msg: Message) -> None:
+        self.push(_RX_RANK, (self.bus, msg))
+
+    def on_error(self, exc: Exception) -> None:
+        self.push(_RX_RANK, exc)
 
 class DrvCanNodeC(SysShdNodeC): #pylint: disable= abstract-method
     """Class to manage the CAN communication.
     """
 
-    def __init__(self, working_flag : Event, tx_buffer_size: int= DEFAULT_CHAN_NUM_MSG,
+    def __init__(self, # pylint: disable= too-many-arguments
+                 working_flag : Event, tx_buffer_size: int= DEFAULT_CHAN_NUM_MSG,
                  name: str= DEFAULT_NODE_NAME,
                 cycle_period: int = DEFAULT_NODE_PERIOD,
-                can_params: SysShdNodeParamsC = SysShdNodeParamsC()) -> None:
+                can_params: SysShdNodeParamsC = SysShdNodeParamsC(),
+                rx_burst_max: int = DEFAULT_RX_BURST_MAX,
+                rx_burst_time: float = DEFAULT_RX_BURST_TIME,
+                tx_burst_max: int = DEFAULT_TX_BURST_MAX,
+                tx_burst_time: float = DEFAULT_TX_BURST_TIME,
+                kernel_filters: bool = DEFAULT_KERNEL_FILTERS,
+                event_driven: bool = DEFAULT_EVENT_DRIVEN,
+                bus_params: DrvCanBusParamsC|List[DrvCanBusParamsC]|None = None,
+                can_bus: BusABC|List[BusABC]|None = None,
+                stats_period: float = DEFAULT_STATS_PERIOD,
+                bus_load_max: float = DEFAULT_BUS_LOAD_MAX,
+                recorder: DrvCanRecorderC|None = None) -> None:
         """ Initialize the CAN node.
 
         Args:
@@ -144,110 +535,367 @@ class DrvCanNodeC(SysShdNodeC): #pylint: disable= abstract-method
             name (str, optional): [description]. Defaults to "CAN_NODE".
             cycle_period (int, optional): [Period in miliseconds]. Defaults to 100.
             can_params (SysShdNodeParamsC, optional): [description]. Defaults to SysShdNodeParamsC()
+            rx_burst_max (int, optional): [Max number of messages read from the bus per cycle].
+                Defaults to DEFAULT_RX_BURST_MAX.
+            rx_burst_time (float, optional): [Max time in seconds spent reading messages from
+                the bus per cycle]. Defaults to DEFAULT_RX_BURST_TIME.
+            tx_burst_max (int, optional): [Max number of commands applied per cycle].
+                Defaults to DEFAULT_TX_BURST_MAX.
+            tx_burst_time (float, optional): [Max time in seconds spent applying commands
+                per cycle]. Defaults to DEFAULT_TX_BURST_TIME.
+            kernel_filters (bool, optional): [Install the active filters in the CAN interface,
+                so the messages that do not match any filter are dropped by the kernel or the
+                hardware]. Defaults to DEFAULT_KERNEL_FILTERS.
+            event_driven (bool, optional): [Process each message and command as soon as it
+                arrives instead of once per cycle. The cycle period is only used to check
+                the working flag]. Defaults to DEFAULT_EVENT_DRIVEN.
+            bus_params (DrvCanBusParamsC|List[DrvCanBusParamsC]|None, optional): [Parameters
+                used to open the bus, a list to open several buses, which are identified by
+                their index in the list, or None to use the ones of the configuration].
+                Defaults to None.
+            can_bus (BusABC|List[BusABC]|None, optional): [Bus or list of buses already opened
+                to use instead of opening them, the node shuts them down when it stops].
+                Defaults to None.
+            stats_period (float, optional): [Period in seconds to publish the stats in the
+                channel DEFAULT_STATS_NAME, 0 to disable it]. Defaults to DEFAULT_STATS_PERIOD.
+            bus_load_max (float, optional): [Estimated load of a bus, from 0 to 1, above which
+                the bulk commands are not applied until the load goes down, 0 to disable it].
+                Defaults to DEFAULT_BUS_LOAD_MAX.
+            recorder (DrvCanRecorderC|None, optional): [Flight recorder where the messages
+                received and sent are recorded, None to disable it]. Defaults to None.
         """
         super().__init__(name=name, cycle_period=cycle_period, working_flag=working_flag,
                         node_params=can_params)
         self.working_flag = working_flag
         # cmd_can_down = 'sudo ip link set down can0'
-        self.__can_bus : ThreadSafeBus = ThreadSafeBus(interface=DEFAULT_IFACE_NAME,
-                                channel=DEFAULT_IFACE_CHAN_NAME, bitrate=125000,
-                                receive_own_messages=False, fd=True)
-        self.__can_bus.flush_tx_buffer()
+        if can_bus is None:
+            if bus_params is None:
+                bus_params = DrvCanBusParamsC()
+            if isinstance(bus_params, DrvCanBusParamsC):
+                bus_params = [bus_params]
+            can_bus = []
+            for params in bus_params:
+                log.info(f"Opening CAN bus {params.interface} in channel {params.channel}")
+                can_bus.append(ThreadSafeBus(interface=params.interface, channel=params.channel,
+                                    bitrate=params.bitrate, fd=params.fd,
+                                    receive_own_messages=params.receive_own_messages))
+        else:
+            if isinstance(can_bus, BusABC):
+                can_bus = [can_bus]
+            # The bitrate of the buses already opened is unknown, the default one is used
+            bus_params = [DrvCanBusParamsC() for _ in can_bus]
+        # Stats of all the buses, each bus also has its own stats
+        self.stats: DrvCanNodeStatsC = DrvCanNodeStatsC()
+        self.recorder: DrvCanRecorderC|None = recorder
+        # The TX threads of all the buses count the messages sent in the stats of the node
+        stats_lock = Lock()
+        self.__buses: List[_CanBusC] = [_CanBusC(index, bus, self.stats, stats_lock,
+                                                 params.bitrate, not params.receive_own_messages,
+                                                 recorder)
+                                        for index, (bus, params)
+                                        in enumerate(zip(can_bus, bus_params))]
+        self.bus_load_max: float = bus_load_max
+        # Cleared while the bulk commands are throttled
+        self.__bulk_allowed: Event = Event()
+        self.__bulk_allowed.set()
 
-        self.tx_buffer: SysShdIpcChanC = SysShdIpcChanC(name= DEFAULT_TX_NAME,
+        self.tx_buffer: DrvCanTxChanC = DrvCanTxChanC(name= DEFAULT_TX_NAME,
                                             max_msg = tx_buffer_size,
                                             max_message_size= DEFAULT_MAX_MSG_SIZE)
 
-        self.__active_filter: List[_CanActiveFilterC] = []
+        self.rx_burst_max: int = rx_burst_max
+        self.rx_burst_time: float = rx_burst_time
+        self.tx_burst_max: int = tx_burst_max
+        self.tx_burst_time: float = tx_burst_time
+        self.kernel_filters: bool = kernel_filters
+        self.event_driven: bool = event_driven
+        # Messages, commands and bus errors pending to process in event driven mode, ordered
+        # by priority
+        self.__events: PriorityQueue = PriorityQueue()
+        self.__events_seq: Iterator[int] = count()
+        self.stats_period: float = stats_period
+        self.__stats_chan: DrvCanChanC|None = None
+        if stats_period > 0:
+            self.__stats_chan = DrvCanChanC(name= DEFAULT_STATS_NAME, max_msg= 1,
+                                            max_message_size= DEFAULT_STATS_MSG_SIZE)
+        self.__stats_next: float = time() + stats_period
+        # Mailbox and ring buffer, created with the first filter that uses each of them
+        self.__shared: Dict[DrvCanDeliveryE, DrvCanMailboxC|DrvCanRingC] = {}
+        # Channels where the responses of the requests are sent, by name
+        self.__resp_chans: Dict[str, DrvCanChanC] = {}
+
+    def __get_bus(self, index: int) -> _CanBusC:
+        '''Get a bus of the node.
+
+        Args:
+            index (int): Index of the bus.
+
+        Raises:
+            ValueError: Raised when the node does not have a bus with that index.
+
+        Returns:
+            _CanBusC: Bus.
+        '''
+        if not 0 <= index < len(self.__buses):
+            log.error(f"Wrong bus {index}, the node has {len(self.__buses)} buses")
+            raise ValueError(f"Wrong bus {index}, the node has {len(self.__buses)} buses")
+        return self.__buses[index]
+
+    def __iter_filters(self) -> Iterator[_CanActiveFilterC]:
+        '''Iterate over the active filters of all the buses.
+
+        Returns:
+            Iterator[_CanActiveFilterC]: Active filters.
+        '''
+        for bus in self.__buses:
+            yield from bus.filters
 
-    def __parse_msg(self, message: DrvCanMessageC) -> None:
+    def __parse_msg(self, bus: _CanBusC, message: DrvCanMessageC) -> None:
         '''
         Check if the received message matches any of the active filter, in case it matches will
         add that message to the specific queue of the filter
 
         Args:
+            bus (_CanBusC): Bus where the message was received.
             message (DrvCanMessageC): Message received from CAN
         '''
-        #Search if the message id match any active filter
-        # if true, add the message to that queue
-        for act_filter in self.__active_filter:
-            if act_filter.match(message.addr):
-                act_filter.chan.send_data(message)
-                break
+        #Search the active filters of the bus that receive the message id,
+        # the first one that matches and the multicast ones
+        act_filters: List[_CanActiveFilterC] = bus.filters.match_all(message.addr)
+        if len(act_filters) == 1 and act_filters[0].shared is None:
+            act_filters[0].forward(message)
+        elif len(act_filters) > 0:
+            self.__deliver(act_filters, message)
+        else:
+            self.stats.update_unmatched(message.addr)
+            bus.stats.update_unmatched(message.addr)
+        # The response is sent after forwarding the message, so when the caller receives it
+        # the message is already in the channels of the filters
+        if len(bus.requests) > 0:
+            self.__answer_requests(bus, message)
+
+    def __deliver(self, act_filters: List[_CanActiveFilterC], message: DrvCanMessageC) -> None:
+        '''Deliver a message to several filters, or to a filter with shared delivery.
+        The message is encoded once for all the channels, and written once in the mailbox and
+        the ring buffer, even if several of their filters match it, as they are shared by all
+        the readers.
 
-    def __apply_filter(self, add_filter : _CanActiveFilterC) -> None:
+        Args:
+            act_filters (List[_CanActiveFilterC]): Filters that receive the message.
+            message (DrvCanMessageC): Message received from CAN.
+        '''
+        encoded_data: bytes|None = None
+        written: List[DrvCanMailboxC|DrvCanRingC] = []
+        timestamp = time()
+        for act_filter in act_filters:
+            if act_filter.shared is None:
+                if encoded_data is None and not act_filter.pickled:
+                    encoded_data = encode_can_msg(message)
+                act_filter.forward(message, encoded_data)
+            else:
+                if all(shared is not act_filter.shared for shared in written):
+                    act_filter.shared.write(message)
+                    written.append(act_filter.shared)
+                act_filter.stats.update_forwarded(message.dlc, timestamp)
+
+    def __answer_requests(self, bus: _CanBusC, message: DrvCanMessageC) -> None:
+        '''Send a message received to the channels of the pending requests of the bus
+        waiting for it.
+
+        Args:
+            bus (_CanBusC): Bus where the message was received.
+            message (DrvCanMessageC): Message received from CAN.
+        '''
+        answered = [pending for pending in bus.requests if pending.match(message.addr)]
+        for pending in answered:
+            bus.requests.remove(pending)
+            pending.reply(message)
+        if len(answered) > 0 and self.kernel_filters:
+            bus.update_filters()
+
+    def __send_request(self, request: DrvCanRequestC, priority: DrvCanPriorityE,
+                       cmd_ts: float|None) -> None:
+        '''Send a request and keep it pending until its response is received or the timeout
+        expires.
+
+        Args:
+            request (DrvCanRequestC): Request to send.
+            priority (DrvCanPriorityE): Priority of the command of the request.
+            cmd_ts (float|None): Time when the command was created, the timeout starts then.
+        '''
+        bus = self.__get_bus(request.bus)
+        chan = self.__resp_chans.get(request.chan_name)
+        if chan is None:
+            chan = DrvCanChanC(name= request.chan_name, max_message_size= 150)
+            self.__resp_chans[request.chan_name] = chan
+        deadline = (time() if cmd_ts is None else cmd_ts) + request.timeout/_TO_S
+        # The request is pending before it is sent, so the response can not arrive before
+        bus.requests.append(_CanPendingRequestC(request, chan, deadline))
+        if self.kernel_filters and not bus.is_received(request.resp_addr, request.resp_mask):
+            bus.update_filters()
+        bus.send(request, priority)
+
+    def __expire_requests(self) -> None:
+        '''Send a timeout result to the channels of the pending requests whose timeout has
+        expired.
+        '''
+        now = time()
+        for bus in self.__buses:
+            expired = [pending for pending in bus.requests if pending.deadline <= now]
+            for pending in expired:
+                log.warning(f"Timeout of the request {pending.request.req_id} to "+
+                            f"{hex(pending.request.addr)} in bus {bus.index}")
+                bus.requests.remove(pending)
+                pending.reply(None)
+            if len(expired) > 0 and self.kernel_filters:
+                bus.update_filters()
+
+    def __build_filter(self, new_filter: DrvCanFilterC, pickled: bool = False
+                       ) -> _CanActiveFilterC:
+        '''Create the active filter of a filter received in a command, creating the mailbox
+        or the ring buffer the first time a filter uses them.
+
+        Args:
+            new_filter (DrvCanFilterC): Filter received.
+            pickled (bool, optional): The command was pickled, so the messages are sent
+                pickled. Defaults to False.
+
+        Returns:
+            _CanActiveFilterC: Active filter.
+        '''
+        # Filters sent by older versions of the package do not have delivery
+        delivery = getattr(new_filter, 'delivery', DrvCanDeliveryE.QUEUE)
+        if delivery is DrvCanDeliveryE.MAILBOX and delivery not in self.__shared:
+            self.__shared[delivery] = DrvCanMailboxC(name= DEFAULT_MAILBOX_NAME, create= True,
+                                                     n_buses= len(self.__buses))
+        elif delivery is DrvCanDeliveryE.RING and delivery not in self.__shared:
+            self.__shared[delivery] = DrvCanRingC(name= DEFAULT_RING_NAME,
+                                                  n_slots= DEFAULT_RING_SLOTS, create= True)
+        return _CanActiveFilterC(**new_filter.__dict__, shared= self.__shared.get(delivery),
+                                 pickled= pickled)
+
+    def __apply_filter(self, add_filter : _CanActiveFilterC, update: bool = True) -> bool:
         '''Created a shared object and added it to the active filter list
 
         Args:
             data_frame (DrvCanFilterC): Filter to apply.
+            update (bool, optional): Update the filters of the interface. Defaults to True.
+
+        Returns:
+            bool: True if the filter has been added, False if it was already added.
         '''
-        already_in = False
-        for act_filter in self.__active_filter:
-            if act_filter.addr == add_filter.addr and act_filter.mask == add_filter.mask:
-                already_in = True
-                if act_filter.chan_name == add_filter.chan_name:
-                    log.warning("Filter already added")
-                else:
-                    log.error("Filter already added with different channel name")
-                    raise ValueError("Filter already added with different channel name")
-        if not already_in:
-            log.info(f"Adding new filter with id {hex(add_filter.addr)} "+
-            f"and mask {hex(add_filter.mask)}")
-            self.__active_filter.append(add_filter)
-            log.debug("Filter added correctly")
-
-    def __remove_filter(self, del_filter : DrvCanFilterC) -> None:
+        bus = self.__get_bus(add_filter.bus)
+        same_filters: List[_CanActiveFilterC] = bus.filters.find(add_filter.addr,
+                                                                 add_filter.mask)
+        if any(act_filter.chan_name == add_filter.chan_name for act_filter in same_filters):
+            log.warning("Filter already added")
+            return False
+        if not add_filter.multicast and any(not act_filter.multicast
+                                            for act_filter in same_filters):
+            log.error("Filter already added with different channel name")
+            raise ValueError("Filter already added with different channel name")
+        log.info(f"Adding new filter with id {hex(add_filter.addr)} "+
+        f"and mask {hex(add_filter.mask)} in bus {bus.index}")
+        bus.filters.add(add_filter)
+        if self.kernel_filters and update:
+            bus.update_filters()
+        log.debug("Filter added correctly")
+        return True
+
+    def __apply_filter_batch(self, filters: List[DrvCanFilterC], pickled: bool = False) -> None:
+        '''Add a list of filters at once. If any of them can not be added, the ones of the
+        list already added are removed, so either all of them are added or none.
+
+        Args:
+            filters (List[DrvCanFilterC]): Filters to apply.
+            pickled (bool, optional): The command was pickled. Defaults to False.
+
+        Raises:
+            ValueError: Raised when a filter is already added with different channel name.
+        '''
+        added: List[_CanActiveFilterC] = []
+        try:
+            for new_filter in filters:
+                act_filter = self.__build_filter(new_filter, pickled)
+                if self.__apply_filter(act_filter, update= False):
+                    added.append(act_filter)
+        except ValueError:
+            for act_filter in added:
+                self.__get_bus(act_filter.bus).filters.remove(act_filter.addr, act_filter.mask,
+                                                              act_filter.chan_name)
+                act_filter.close_chan()
+            raise
+        if self.kernel_filters:
+            for bus_index in {act_filter.bus for act_filter in added}:
+                self.__get_bus(bus_index).update_filters()
+
+    def __remove_filter(self, del_filter : DrvCanFilterC, update: bool = True) -> None:
         '''Delete a shared object from the active filter list
 
         Args:
             del_filter (DrvCanFilterC): Filter to remove.
+            update (bool, optional): Update the filters of the interface. Defaults to True.
         '''
-        already_out = True
-        filter_pos=0
-        for act_filter in self.__active_filter:
-            if act_filter.addr == del_filter.addr and act_filter.mask == del_filter.mask:
-                already_out = False
-                if act_filter.chan_name == del_filter.chan_name:
-                    log.info(f"Removing filter with id {hex(del_filter.addr)} "+
-                        f"and mask {hex(del_filter.mask)}")
-                    filter_chn: _CanActiveFilterC = self.__active_filter.pop(filter_pos)
-                    filter_chn.close_chan()
-                    log.debug("Filter removed correctly")
-                else:
-                    log.error("Filter in with different channel name")
-                    raise ValueError("Filter already added with different channel name")
-            else:
-                filter_pos += 1
-        if already_out:
+        # Filters sent by older versions of the package do not have bus
+        bus = self.__get_bus(getattr(del_filter, 'bus', 0))
+        same_filters: List[_CanActiveFilterC] = bus.filters.find(del_filter.addr,
+                                                                 del_filter.mask)
+        act_filter: _CanActiveFilterC|None = bus.filters.remove(del_filter.addr,
+                                                        del_filter.mask, del_filter.chan_name)
+        if act_filter is None and len(same_filters) == 0:
             log.warning("Filter already removed")
+        elif act_filter is not None:
+            log.info(f"Removing filter with id {hex(del_filter.addr)} "+
+                f"and mask {hex(del_filter.mask)} in bus {bus.index}")
+            if self.kernel_filters and update:
+                bus.update_filters()
+            act_filter.close_chan()
+            log.debug("Filter removed correctly")
+        else:
+            log.error("Filter in with different channel name")
+            raise ValueError("Filter already added with different channel name")
 
-    def __send_message(self, data : DrvCanMessageC) -> None:
-        '''Send a CAN message
+    def __remove_filter_batch(self, filters: List[DrvCanFilterC]) -> None:
+        '''Remove a list of filters at once. All of them are checked before removing any,
+        so either all of them are removed or none.
 
         Args:
-            data (DrvCanMessageC): Messsage to send.
+            filters (List[DrvCanFilterC]): Filters to remove.
 
         Raises:
-            err (CanOperationError): Raised when error with CAN connection occurred
+            ValueError: Raised when a filter is added with different channel name.
         '''
-        msg = Message(arbitration_id=data.addr, is_extended_id=False,
-                    dlc=data.dlc, data=bytes(data.payload))
-        try:
-            self.__can_bus.send(msg, timeout=DEFAULT_TIMEOUT_SEND_MSG)
-            log.debug("Message correctly send")
-        except CanOperationError as err:
-            log.error(err)
-            raise err
-        # log.debug(f"CAN Message sent: \tarbitration_id :
-        # {msg.arbitration_id:04X} \tdlc : {msg.dlc} \tdata :
-        # 0x{data_frame.data}, 0x{data_frame.data.hex()}")
+        for del_filter in filters:
+            same_filters = self.__get_bus(del_filter.bus).filters.find(del_filter.addr,
+                                                                       del_filter.mask)
+            if (len(same_filters) > 0 and all(act_filter.chan_name != del_filter.chan_name
+                                              for act_filter in same_filters)):
+                log.error("Filter in with different channel name")
+                raise ValueError("Filter already added with different channel name")
+        for del_filter in filters:
+            self.__remove_filter(del_filter, update= False)
+        if self.kernel_filters:
+            for bus_index in {del_filter.bus for del_filter in filters}:
+                self.__get_bus(bus_index).update_filters()
+
+    def __send_message(self, data : DrvCanMessageC, priority: DrvCanPriorityE) -> None:
+        '''Send a CAN message through the TX thread of its bus.
+
+        Args:
+            data (DrvCanMessageC): Messsage to send.
+            priority (DrvCanPriorityE): Priority of the command of the message.
+        '''
+        # Messages sent by older versions of the package do not have bus
+        self.__get_bus(getattr(data, 'bus', 0)).send(data, priority)
 
-    def __apply_command(self, command : DrvCanCmdDataC) -> None:
+    def __apply_command(self, command : DrvCanCmdDataC, pickled: bool = False) -> None:
         '''Apply a command to the CAN drv of the device.
 
         Args:
             command (DrvCanCmdDataC): Data to process, does not know if its for the channel or
             a message to a device
+            pickled (bool, optional): The command was pickled, so the filters it adds send
+                the messages pickled. Defaults to False.
 
         Raises:
             err (CanOperationError): Raised when error with CAN connection occurred
@@ -255,28 +903,339 @@ class DrvCanNodeC(SysShdNodeC): #pylint: disable= abstract-method
         #Check which type of command has been received and matchs the payload type
         if (command.data_type == DrvCanCmdTypeE.MESSAGE
             and isinstance(command.payload,DrvCanMessageC)):
-            self.__send_message(command.payload)
+            # Commands sent by older versions of the package do not have priority
+            self.__send_message(command.payload,
+                                getattr(command, 'priority', DrvCanPriorityE.CONFIG))
         elif (command.data_type == DrvCanCmdTypeE.ADD_FILTER
             and isinstance(command.payload,DrvCanFilterC)):
-            self.__apply_filter(_CanActiveFilterC(**command.payload.__dict__))
+            self.__apply_filter(self.__build_filter(command.payload, pickled))
         elif (command.data_type == DrvCanCmdTypeE.REMOVE_FILTER
             and isinstance(command.payload,DrvCanFilterC)):
             self.__remove_filter(command.payload)
+        elif (command.data_type == DrvCanCmdTypeE.START_PERIODIC
+            and isinstance(command.payload,DrvCanPeriodicC)):
+            self.__get_bus(command.payload.bus).start_periodic(command.payload)
+        elif (command.data_type == DrvCanCmdTypeE.MODIFY_PERIODIC
+            and isinstance(command.payload,DrvCanPeriodicC)):
+            self.__get_bus(command.payload.bus).modify_periodic(command.payload)
+        elif (command.data_type == DrvCanCmdTypeE.STOP_PERIODIC
+            and isinstance(command.payload,DrvCanPeriodicC)):
+            self.__get_bus(command.payload.bus).stop_periodic(command.payload.addr)
+        elif (command.data_type == DrvCanCmdTypeE.REQUEST
+            and isinstance(command.payload,DrvCanRequestC)):
+            self.__send_request(command.payload, command.priority, command.timestamp)
+        elif (command.data_type == DrvCanCmdTypeE.ADD_FILTER_BATCH
+            and _is_batch(command.payload, DrvCanFilterC)):
+            self.__apply_filter_batch(command.payload, pickled)
+        elif (command.data_type == DrvCanCmdTypeE.REMOVE_FILTER_BATCH
+            and _is_batch(command.payload, DrvCanFilterC)):
+            self.__remove_filter_batch(command.payload)
+        elif (command.data_type in (DrvCanCmdTypeE.ADD_TRIGGER, DrvCanCmdTypeE.REMOVE_TRIGGER)
+            and isinstance(command.payload, DrvCanTriggerC)):
+            if self.recorder is None:
+                log.debug("Trigger ignored, the flight recorder is disabled")
+            elif command.data_type is DrvCanCmdTypeE.ADD_TRIGGER:
+                self.recorder.add_trigger(command.payload)
+            else:
+                self.recorder.remove_trigger(command.payload)
+        elif (command.data_type == DrvCanCmdTypeE.DUMP_RECORD
+            and isinstance(command.payload, str)):
+            self.dump_record(command.payload)
+        elif (command.data_type == DrvCanCmdTypeE.MESSAGE_BATCH
+            and _is_batch(command.payload, DrvCanMessageC)):
+            # The messages are sent in order, as they have the same priority
+            for msg in command.payload:
+                if isinstance(msg, DrvCanRequestC):
+                    self.__send_request(msg, command.priority, command.timestamp)
+                else:
+                    self.__send_message(msg, command.priority)
         else:
             log.error("Can`t apply command. \
                       Error in command format, check command type and payload type")
 
 
+    def __apply_burst(self) -> None:
+        '''
+        Apply the commands queued in the TX channel, until the channel is empty or the budget
+        of commands or time of the cycle is spent. The commands with higher priority are
+        applied first.
+        '''
+        depth = self.tx_buffer.depth
+        self.stats.update_tx_depth(depth)
+        n_cmds = 0
+        deadline = time() + self.tx_burst_time
+        while (n_cmds < min(depth, self.tx_burst_max) and time() < deadline):
+            n_cmds += 1
+            encoded_data = self.tx_buffer.receive_raw_unblocking(
+                                            bulk= self.__bulk_allowed.is_set())
+            if encoded_data is None:
+                break
+            try:
+                # Ignore warning as decode_can_data return an object,
+                # which in this case must be of type DrvCanCmdDataC
+                command : DrvCanCmdDataC = decode_can_data(encoded_data) # type: ignore
+            except Exception as err: # pylint: disable= broad-exception-caught
+                log.error(f"Command of the TX channel {self.tx_buffer.name} can not be "+
+                          f"decoded: {err}")
+                continue
+            log.debug(f"Command to apply: {command.data_type.name}")
+            # Commands sent by older versions of the package do not have timestamp
+            cmd_ts = getattr(command, 'timestamp', None)
+            self.stats.update_tx_cmd(None if cmd_ts is None else time() - cmd_ts)
+            self.__apply_command(command, is_pickled(encoded_data))
+            self.status = SysShdNodeStatusE.OK
+
+    def __receive_msg(self, bus: _CanBusC, msg: Message) -> None:
+        '''Parse a message received from the bus.
+
+        Args:
+            bus (_CanBusC): Bus where the message was read.
+            msg (Message): Message read from the bus.
+        '''
+        if not msg.is_error_frame:
+            bus.load.update_rx(msg.dlc)
+        if self.recorder is not None:
+            self.recorder.record(msg, bus.index)
+        if (_Constants.MIN_ID <= msg.arbitration_id <= _Constants.MAX_ID
+            and not msg.is_error_frame):
+            # The timestamp of the interface is kept, the interfaces without it set 0
+            self.__parse_msg(bus, DrvCanMessageC(msg.arbitration_id,msg.dlc,msg.data,
+                                    msg.timestamp if msg.timestamp > 0 else time(), bus.index))
+        else:
+            if msg.is_error_frame:
+                self.stats.update_error_frame()
+                bus.stats.update_error_frame()
+            else:
+                self.stats.update_invalid()
+                bus.stats.update_invalid()
+            log.error(f"Message receive can`t be parsed, id: {hex(msg.arbitration_id)}"+
+                        f" and error in frame is: {msg.is_error_frame}")
+
+    def __receive_burst(self, bus: _CanBusC) -> None:
+        '''
+        Read all the messages already queued in a bus, until the bus is empty or the budget
+        of messages or time of the cycle is spent. If there are messages left in the bus, the
+        next one is kept to be processed first in the next cycle.
+
+        Args:
+            bus (_CanBusC): Bus to read.
+        '''
+        n_msgs = 0
+        backlog = False
+        deadline = time() + self.rx_burst_time
+        if bus.rx_carry is not None:
+            msg, bus.rx_carry = bus.rx_carry, None
+        else:
+            # The time waiting for messages is shared between all the buses
+            msg = bus.can_bus.recv(timeout=DEFAULT_TIMEOUT_RX_MSG/len(self.__buses))
+        while isinstance(msg, Message):
+            n_msgs += 1
+            self.__receive_msg(bus, msg)
+            msg = bus.can_bus.recv(timeout=0)
+            if isinstance(msg, Message) and (n_msgs >= self.rx_burst_max or time() >= deadline):
+                bus.rx_carry = msg
+                backlog = True
+                break
+        bus.stats.update_rx_cycle(n_msgs, backlog)
+        if backlog:
+            log.debug(f"Messages left in bus {bus.index} after reading {n_msgs} messages")
+
+    def __push_event(self, rank: int, event: object) -> None:
+        '''Push an event to the queue of events of the node.
+
+        Args:
+            rank (int): Rank of the event, the events with lower rank are processed first.
+            event (object): Message received with its bus, error of a bus or command.
+        '''
+        self.__events.put((rank, next(self.__events_seq), event))
+
+    def __read_commands(self, chan: DrvCanChanC, allowed: Event|None) -> None:
+        '''
+        Thread used in event driven mode. It waits for commands in a lane of the TX channel
+        and pushes them to the queue of events of the node with their priority.
+        At most tx_burst_max commands of the lane are pending to be applied, the rest wait in
+        the channel, so the producers keep the backpressure of the channel and the throttled
+        commands are not read.
+
+        Args:
+            chan (DrvCanChanC): Queue of the lane.
+            allowed (Event|None): Cleared while the commands of the lane are throttled, None
+                if they are never throttled.
+        '''
+        slots = BoundedSemaphore(self.tx_burst_max)
+        while self.working_flag.is_set():
+            if allowed is not None and not allowed.wait(self.cycle_period/_TO_S):
+                continue
+            if not slots.acquire(timeout= self.cycle_period/_TO_S):
+                continue
+            try:
+                encoded_data, _ = chan.receive(timeout= self.cycle_period/_TO_S)
+                command = decode_can_data(encoded_data)
+            except ipc.BusyError: #pylint: disable= c-extension-no-member
+                slots.release()
+                continue
+            except Exception as err: # pylint: disable= broad-exception-caught
+                log.error(f"Command of the TX channel {chan.name} can not be decoded: {err}")
+                slots.release()
+                continue
+            # Commands sent by older versions of the package do not have priority
+            self.__push_event(-getattr(command, 'priority', DrvCanPriorityE.CONFIG).value,
+                              _CanCommandEventC(command, is_pickled(encoded_data), slots))
+
+    def __process_events(self) -> None:
+        '''
+        Wait until a message or a command arrives and process it, together with the rest
+        of events already pending, up to the budget of messages of a cycle.
+        If nothing arrives in a cycle period, or before the timeout of a pending request
+        expires, return to check the working flag and the requests.
+        '''
+        timeout = self.cycle_period/_TO_S
+        deadlines = [pending.deadline for bus in self.__buses for pending in bus.requests]
+        if len(deadlines) > 0:
+            timeout = max(min(timeout, min(deadlines) - time()), 0)
+        try:
+            event = self.__events.get(timeout= timeout)[2]
+        except Empty:
+            return
+        n_msgs = [0] * len(self.__buses)
+        n_events = 0
+        while event is not None:
+            n_events += 1
+            if isinstance(event, tuple):
+                bus, msg = event
+                n_msgs[bus.index] += 1
+                self.__receive_msg(bus, msg)
+            elif isinstance(event, Exception):
+                raise event
+            else:
+                cmd_ts = getattr(event.command, 'timestamp', None)
+                self.stats.update_tx_cmd(None if cmd_ts is None else time() - cmd_ts)
+                try:
+                    self.__apply_command(event.command, event.pickled)
+                finally:
+                    event.slots.release()
+                self.status = SysShdNodeStatusE.OK
+            try:
+                event = self.__events.get_nowait()[2] if n_events < self.rx_burst_max else None
+            except Empty:
+                event = None
+        backlog = not self.__events.empty()
+        self.stats.update_rx_cycle(sum(n_msgs), backlog)
+        for bus in self.__buses:
+            bus.stats.update_rx_cycle(n_msgs[bus.index], backlog)
+
+    def run(self) -> None:
+        '''
+        Main method executed by the CAN thread. In event driven mode, the messages of each bus
+        are read by its own python-can notifier and the commands by a thread per lane of the TX
+        channel, and all of them are processed by this thread as soon as they arrive, the ones
+        with higher priority first. Otherwise, the node runs periodically.
+        '''
+        if not self.event_driven:
+            super().run()
+            return
+        log.info("Start running process in event driven mode")
+        self.status = SysShdNodeStatusE.INIT
+        notifiers = [Notifier(bus.can_bus, [_CanEventListenerC(self.__push_event, bus)],
+                              timeout= DEFAULT_TIMEOUT_RX_MSG) for bus in self.__buses]
+        cmd_readers = [Thread(target= self.__read_commands, args= (chan, allowed), daemon= True,
+                              name= f"{self.name}_TX{lane}")
+                       for lane, (chan, allowed) in enumerate(((self.tx_buffer, None),
+                                            (self.tx_buffer.bulk, self.__bulk_allowed)))]
+        for cmd_reader in cmd_readers:
+            cmd_reader.start()
+        while self.working_flag.is_set():
+            self.process_iteration()
+        for notifier in notifiers:
+            notifier.stop()
+        for cmd_reader in cmd_readers:
+            cmd_reader.join()
+        self.stop()
+
+    def __update_load(self) -> None:
+        '''Estimate the load of the buses and throttle the bulk commands while the load of
+        any of them is above bus_load_max.
+        '''
+        now = time()
+        throttle = False
+        for bus in self.__buses:
+            bus.update_load(now)
+            throttle = throttle or 0 < self.bus_load_max < bus.load.load
+        if throttle and self.__bulk_allowed.is_set():
+            log.warning(f"Bus load above {self.bus_load_max:.0%}, throttling bulk commands")
+            self.__bulk_allowed.clear()
+            self.stats.update_throttled()
+        elif not throttle and not self.__bulk_allowed.is_set():
+            log.info("Bus load back to normal, applying bulk commands")
+            self.__bulk_allowed.set()
+
+    def dump_record(self, reason: str = 'user request') -> str|None:
+        '''Write the frames recorded by the flight recorder to a file, in a background thread.
+
+        Args:
+            reason (str, optional): Reason written in the log. Defaults to 'user request'.
+
+        Returns:
+            str|None: Path of the file, None if the recorder is disabled or the trigger has been
+            ignored.
+        '''
+        if self.recorder is None:
+            log.warning("The flight recorder is disabled")
+            return None
+        return self.recorder.dump(reason)
+
+    def get_stats(self) -> Dict:
+        '''
+        Get a snapshot of the stats of the node, of each bus and of each active filter.
+
+        Returns:
+            Dict: Time of the snapshot in timestamp, counters of all the buses in node, with
+            the rates measured since the last snapshot, counters of each bus in buses and
+            counters of each filter in filters.
+        '''
+        now = time()
+        self.stats.update_rates(now)
+        for bus in self.__buses:
+            bus.stats.update_rates(now)
+        return {'timestamp': now, 'node': self.stats.snapshot(DEFAULT_STATS_TOP_IDS),
+                'buses': [bus.snapshot() for bus in self.__buses],
+                'filters': [act_filter.snapshot() for act_filter in self.__iter_filters()]}
+
+    def __publish_stats(self) -> None:
+        '''
+        Publish a snapshot of the stats in the stats channel, replacing the previous one
+        if it has not been read yet, so other processes can read the last one.
+        '''
+        self.__stats_next = time() + self.stats_period
+        try:
+            if self.__stats_chan.current_messages > 0:
+                self.__stats_chan.receive(timeout= 0)
+            self.__stats_chan.send_data(self.get_stats())
+        except ipc.BusyError: #pylint: disable= c-extension-no-member
+            log.debug("Stats channel busy, stats not published")
+        except ValueError as err:
+            log.warning(f"Stats can not be published: {err}")
+
     def stop(self) -> None:
         """
         Stop the CAN thread .
         """
         log.critical("Stopping CAN thread.")
-        for filters in self.__active_filter:
+        for filters in self.__iter_filters():
             filters.close_chan()
         self.working_flag.clear()
         self.tx_buffer.terminate()
-        self.__can_bus.shutdown()
+        if self.__stats_chan is not None:
+            self.__stats_chan.terminate()
+        for shared in self.__shared.values():
+            shared.close()
+        # The channels of the responses belong to the callers, so they are not removed
+        for chan in self.__resp_chans.values():
+            chan.close()
+        for bus in self.__buses:
+            bus.stop()
+        if self.recorder is not None:
+            self.recorder.close()
         self.status = SysShdNodeStatusE.STOP
 
     def process_iteration(self) -> None:
@@ -286,21 +1245,20 @@ class DrvCanNodeC(SysShdNodeC): #pylint: disable= abstract-method
         '''
         log.debug(f"CAN thread status {self.status}")
         try:
-            if not self.tx_buffer.is_empty():
-                # Ignore warning as receive_data return an object,
-                # which in this case must be of type DrvCanCmdDataC
-                command : DrvCanCmdDataC = self.tx_buffer.receive_data() # type: ignore
-                log.debug(f"Command to apply: {command.data_type.name}")
-                self.__apply_command(command)
-                self.status = SysShdNodeStatusE.OK
-            msg : Message = self.__can_bus.recv(timeout=DEFAULT_TIMEOUT_RX_MSG)
-            if isinstance(msg,Message):
-                if (_Constants.MIN_ID <= msg.arbitration_id <= _Constants.MAX_ID
-                    and not msg.is_error_frame):
-                    self.__parse_msg(DrvCanMessageC(msg.arbitration_id,msg.dlc,msg.data))
-                else:
-                    log.error(f"Message receive can`t be parsed, id: {hex(msg.arbitration_id)}"+
-                                f" and error in frame is: {msg.is_error_frame}")
+            if self.event_driven:
+                self.__process_events()
+            else:
+                self.__apply_burst()
+                for bus in self.__buses:
+                    self.__receive_burst(bus)
+                self.stats.update_rx_cycle(sum(bus.stats.rx_drained_last for bus in self.__buses),
+                                           any(bus.stats.rx_backlog_last for bus in self.__buses))
+            self.__expire_requests()
+            self.__update_load()
+            for bus in self.__buses:
+                bus.check_error()
+            if self.__stats_chan is not None and time() >= self.__stats_next:
+                self.__publish_stats()
         except CanOperationError as err:
             log.error(f"Error while sending CAN message\n{err}")
             self.status = SysShdNodeStatusE.COMM_ERROR
@@ -312,3 +1270,27 @@ class DrvCanNodeC(SysShdNodeC): #pylint: disable= abstract-method
             self.status = SysShdNodeStatusE.INTERNAL_ERROR
             self.working_flag.clear()
 #######################            FUNCTIONS             #######################
+def _is_batch(payload: object, item_type: type) -> bool:
+    '''Check if the payload of a command is a batch of items of a type.
+
+    Args:
+        payload (object): Payload of the command.
+        item_type (type): Type of the items.
+
+    Returns:
+        bool: True if it is a list or tuple of items of the type.
+    '''
+    return (isinstance(payload, (list, tuple))
+            and all(isinstance(item, item_type) for item in payload))
+
+def _build_msg(data: DrvCanMessageC) -> Message:
+    '''Build the python-can message of a CAN message.
+
+    Args:
+        data (DrvCanMessageC): Message to send.
+
+    Returns:
+        Message: Message of python-can.
+    '''
+    return Message(arbitration_id=data.addr, is_extended_id=False,
+                   dlc=data.dlc, data=bytes(data.payload))
@@ -0,0 +1,313 @@
+#!/usr/bin/python3
+"""
+This module contains the counters the CAN node keeps about its own work.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+
+#######################         GENERIC IMPORTS          #######################
+from collections import Counter
+from time import time
+from typing import Dict, List, Tuple
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+
+######################             CONSTANTS              ######################
+from .context import DEFAULT_BUS_LOAD_WINDOW
+# Bits of a standard data frame that do not depend on the payload: SOF, id, RTR, IDE, r0, DLC,
+# CRC, CRC delimiter, ACK, EOF and the interframe space
+_FRAME_FIXED_BITS: int = 47
+# Bits of a standard data frame where bit stuffing applies, without the payload: from SOF to CRC
+_FRAME_STUFFED_BITS: int = 34
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+class DrvCanFilterStatsC:
+    """Counters of an active filter of the CAN node.
+    """
+    def __init__(self) -> None:
+        # Messages forwarded to the channel of the filter
+        self.forwarded: int = 0
+        # Messages that matched the filter but were not forwarded
+        self.dropped: int = 0
+        # Times the channel of the filter was full when a message had to be forwarded
+        self.full: int = 0
+        # Bytes of payload forwarded
+        self.n_bytes: int = 0
+        # Time when the last message that matched the filter was received, 0 if none
+        self.last_seen: float = 0.0
+
+    def update_forwarded(self, n_bytes: int, timestamp: float) -> None:
+        '''Update the counters with a message forwarded to the channel.
+
+        Args:
+            n_bytes (int): Bytes of payload of the message.
+            timestamp (float): Time when the message was received.
+        '''
+        self.forwarded += 1
+        self.n_bytes += n_bytes
+        self.last_seen = timestamp
+
+    def update_full(self) -> None:
+        '''Update the counters when the channel was found full.
+        '''
+        self.full += 1
+
+    def update_dropped(self, timestamp: float) -> None:
+        '''Update the counters with a message that was not forwarded.
+
+        Args:
+            timestamp (float): Time when the message was received.
+        '''
+        self.dropped += 1
+        self.last_seen = timestamp
+
+class DrvCanNodeStatsC: # pylint: disable= too-many-instance-attributes
+    """Counters of the CAN node.
+    """
+    def __init__(self) -> None:
+        # Messages read from the bus in the last cycle
+        self.rx_drained_last: int = 0
+        # Max number of messages read from the bus in one cycle
+        self.rx_drained_max: int = 0
+        # Total number of messages read from the bus
+        self.rx_msgs: int = 0
+        # Number of cycles that finished with messages still pending in the bus
+        self.rx_backlog_cycles: int = 0
+        # True if the last cycle finished with messages still pending in the bus
+        self.rx_backlog_last: bool = False
+        # Total number of commands applied
+        self.tx_cmds: int = 0
+        # Commands waiting in the TX channel at the beginning of the last cycle
+        self.tx_depth_last: int = 0
+        # Max number of commands waiting in the TX channel at the beginning of a cycle
+        self.tx_depth_max: int = 0
+        # Time in seconds from the creation of the last command applied until it was applied
+        self.tx_latency_last: float = 0.0
+        # Max time in seconds from the creation of a command until it was applied
+        self.tx_latency_max: float = 0.0
+        # Sum of the latencies of the commands applied, used to calculate the mean
+        self.tx_latency_sum: float = 0.0
+        # Total number of messages sent to the bus
+        self.tx_msgs: int = 0
+        # Times the bulk commands have been throttled because the bus load was too high
+        self.tx_throttled: int = 0
+        # Error frames received from the bus
+        self.rx_error_frames: int = 0
+        # Messages received with an id that can not be parsed (extended ids)
+        self.rx_invalid: int = 0
+        # Messages received that did not match any filter, in total and by id
+        self.rx_unmatched: int = 0
+        self.unmatched_ids: Counter = Counter()
+        # Messages received and sent per second, measured between the two last snapshots
+        self.rx_rate: float = 0.0
+        self.tx_rate: float = 0.0
+        self.__rate_time: float = time()
+        self.__rate_rx_msgs: int = 0
+        self.__rate_tx_msgs: int = 0
+
+    def update_rx_cycle(self, n_msgs: int, backlog: bool) -> None:
+        '''Update the counters with the result of a reception cycle.
+
+        Args:
+            n_msgs (int): Number of messages read from the bus in the cycle.
+            backlog (bool): True if there were messages left in the bus.
+        '''
+        self.rx_drained_last = n_msgs
+        self.rx_drained_max = max(self.rx_drained_max, n_msgs)
+        self.rx_msgs += n_msgs
+        self.rx_backlog_last = backlog
+        if backlog:
+            self.rx_backlog_cycles += 1
+
+    def update_tx_depth(self, depth: int) -> None:
+        '''Update the counters with the number of commands waiting in the TX channel.
+
+        Args:
+            depth (int): Number of commands in the TX channel.
+        '''
+        self.tx_depth_last = depth
+        self.tx_depth_max = max(self.tx_depth_max, depth)
+
+    def update_tx_cmd(self, latency: float|None) -> None:
+        '''Update the counters with a command applied.
+
+        Args:
+            latency (float|None): Time in seconds since the command was created,
+                None if it is unknown.
+        '''
+        self.tx_cmds += 1
+        if latency is not None:
+            self.tx_latency_last = latency
+            self.tx_latency_max = max(self.tx_latency_max, latency)
+            self.tx_latency_sum += latency
+
+    def update_tx_msg(self) -> None:
+        '''Update the counters with a message sent to the bus.
+        '''
+        self.tx_msgs += 1
+
+    def update_throttled(self) -> None:
+        '''Update the counters when the bulk commands start to be throttled.
+        '''
+        self.tx_throttled += 1
+
+    def update_error_frame(self) -> None:
+        '''Update the counters with an error frame received.
+        '''
+        self.rx_error_frames += 1
+
+    def update_invalid(self) -> None:
+        '''Update the counters with a message received that can not be parsed.
+        '''
+        self.rx_invalid += 1
+
+    def update_unmatched(self, addr: int) -> None:
+        '''Update the counters with a message that did not match any filter.
+
+        Args:
+            addr (int): Id of the message.
+        '''
+        self.rx_unmatched += 1
+        self.unmatched_ids[addr] += 1
+
+    def update_rates(self, timestamp: float) -> None:
+        '''Update the rates of messages received and sent since the last update.
+
+        Args:
+            timestamp (float): Current time.
+        '''
+        elapsed = timestamp - self.__rate_time
+        if elapsed > 0.0:
+            self.rx_rate = (self.rx_msgs - self.__rate_rx_msgs) / elapsed
+            self.tx_rate = (self.tx_msgs - self.__rate_tx_msgs) / elapsed
+            self.__rate_time = timestamp
+            self.__rate_rx_msgs = self.rx_msgs
+            self.__rate_tx_msgs = self.tx_msgs
+
+    def top_unmatched(self, n_ids: int) -> List[Tuple[int, int]]:
+        '''Get the ids of the messages received more times without matching any filter.
+
+        Args:
+            n_ids (int): Max number of ids.
+
+        Returns:
+            List[Tuple[int, int]]: Id and number of messages, from the most received.
+        '''
+        return self.unmatched_ids.most_common(n_ids)
+
+    def snapshot(self, n_ids: int) -> Dict:
+        '''Get a copy of the counters that can be sent to other processes.
+
+        Args:
+            n_ids (int): Max number of unmatched ids included.
+
+        Returns:
+            Dict: Counters, with the most received unmatched ids in top_unmatched.
+        '''
+        data = {name: value for name, value in vars(self).items()
+                if not name.startswith('_') and name != 'unmatched_ids'}
+        data['tx_latency_mean'] = self.tx_latency_mean
+        data['top_unmatched'] = self.top_unmatched(n_ids)
+        return data
+
+    @property
+    def tx_latency_mean(self) -> float:
+        '''Mean time in seconds from the creation of a command until it was applied.
+        '''
+        return self.tx_latency_sum / self.tx_cmds if self.tx_cmds > 0 else 0.0
+
+class DrvCanBusLoadC:
+    """Estimation of the load of a CAN bus from the messages the node receives and sends.
+    Each message counts as the bits of a standard data frame with its payload, including the
+    worst case of bit stuffing, so the load is an upper bound of the real one. The messages
+    dropped by the filters of the interface are not seen by the node, so they are not counted.
+    """
+    def __init__(self, bitrate: int, window: float = DEFAULT_BUS_LOAD_WINDOW) -> None:
+        '''
+        Initialize the estimation.
+
+        Args:
+            bitrate (int): Bitrate of the bus in bit/s.
+            window (float, optional): Time in seconds between two estimations.
+                Defaults to DEFAULT_BUS_LOAD_WINDOW.
+        '''
+        self.bitrate: int = bitrate
+        self.window: float = window
+        # Bits of the messages received and sent
+        self.rx_bits: int = 0
+        self.tx_bits: int = 0
+        # Fraction of the bitrate used in the last window and max of all the windows
+        self.load: float = 0.0
+        self.load_max: float = 0.0
+        self.__window_time: float = time()
+        self.__window_bits: int = 0
+
+    def update_rx(self, dlc: int) -> None:
+        '''Update the counters with a message received.
+
+        Args:
+            dlc (int): Bytes of payload of the message.
+        '''
+        self.rx_bits += frame_bits(dlc)
+
+    def update_tx(self, dlc: int) -> None:
+        '''Update the counters with a message sent.
+
+        Args:
+            dlc (int): Bytes of payload of the message.
+        '''
+        self.tx_bits += frame_bits(dlc)
+
+    def update(self, timestamp: float, periodic_rate: float = 0.0) -> bool:
+        '''Estimate the load of the bus if the window has finished.
+
+        Args:
+            timestamp (float): Current time.
+            periodic_rate (float, optional): Bits per second of the messages sent periodically
+                without the node. Defaults to 0.0.
+
+        Returns:
+            bool: True if the load has been estimated.
+        '''
+        elapsed = timestamp - self.__window_time
+        if elapsed < self.window:
+            return False
+        n_bits = self.rx_bits + self.tx_bits
+        self.load = ((n_bits - self.__window_bits) / elapsed + periodic_rate) / self.bitrate
+        self.load_max = max(self.load_max, self.load)
+        self.__window_time = timestamp
+        self.__window_bits = n_bits
+        return True
+
+    def snapshot(self) -> Dict:
+        '''Get a copy of the estimation that can be sent to other processes.
+
+        Returns:
+            Dict: Bitrate, counters of bits and loads.
+        '''
+        return {name: value for name, value in vars(self).items() if not name.startswith('_')}
+
+#######################            FUNCTIONS             #######################
+def frame_bits(dlc: int) -> int:
+    '''Get the max number of bits a standard CAN data frame takes in the bus, that is with the
+    worst case of bit stuffing, one stuff bit each 4 bits after the first one.
+
+    Args:
+        dlc (int): Bytes of payload of the frame.
+
+    Returns:
+        int: Bits of the frame, including the interframe space.
+    '''
+    return _FRAME_FIXED_BITS + 8*dlc + (_FRAME_STUFFED_BITS + 8*dlc - 1) // 4
@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+"""
+This module reads traces of CAN frames, the files of the flight recorder or any log of python-can,
+in chunks of columnar numpy arrays for the offline analysis of long tests.
+numpy is an optional dependency of the package, installed with the extra trace, so this module is
+not imported by the package and has to be imported as can_sniffer.can_trace.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from os import path as os_path
+from typing import Iterator, List
+
+#######################       THIRD PARTY IMPORTS        #######################
+import numpy as np
+from can import LogReader
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          PROJECT IMPORTS         #######################
+
+#######################          MODULE IMPORTS          #######################
+from .can_common import _Constants
+from .can_recorder import (_RECORD_FMT, _FILE_HEADER_FMT, _FILE_MAGIC, _FILE_VERSION,
+                           _BIN_SUFFIX, _FLAG_ERROR, _FLAG_REMOTE, _FLAG_TX)
+
+######################             CONSTANTS              ######################
+from .context import DEFAULT_TRACE_CHUNK
+
+# Layout of the frames of the flight recorder, as _RECORD_FMT
+_RECORD_DTYPE = np.dtype([('timestamp', '<f8'), ('addr', '<u4'), ('dlc', 'u1'), ('bus', 'u1'),
+                          ('flags', 'u1'), ('payload', 'u1', (_Constants.MAX_DLC_SIZE,))])
+
+#######################             CLASSES              #######################
+class DrvCanTraceC:
+    """Chunk of frames of a trace as columns, one row per frame. The payloads are padded with
+    zeros to 8 bytes, so each row of payload can be read with the layouts of the devices.
+    """
+    def __init__(self, timestamp: np.ndarray, addr: np.ndarray, dlc: np.ndarray, # pylint: disable= too-many-arguments
+                 bus: np.ndarray, payload: np.ndarray) -> None:
+        '''
+        Args:
+            timestamp (np.ndarray): Time of reception of each frame in seconds, float64.
+            addr (np.ndarray): Id of each frame, uint32.
+            dlc (np.ndarray): Size of the payload of each frame, uint8.
+            bus (np.ndarray): Index of the bus of each frame, uint8.
+            payload (np.ndarray): Payloads of the frames, uint8 with shape (frames, 8).
+        '''
+        self.timestamp: np.ndarray = timestamp
+        self.addr: np.ndarray = addr
+        self.dlc: np.ndarray = dlc
+        self.bus: np.ndarray = bus
+        self.payload: np.ndarray = payload
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+#######################            FUNCTIONS             #######################
+def read_trace(file_path: str, chunk_size: int = DEFAULT_TRACE_CHUNK,
+               rx_only: bool = True) -> Iterator[DrvCanTraceC]:
+    '''Read a trace of CAN frames in chunks, so the memory used does not depend on the length of
+    the trace. The files of the flight recorder with the suffix .bin are read directly, any other
+    file is read with can.LogReader, as .asc, .blf, .csv or .log. The error and remote frames are
+    skipped.
+
+    Args:
+        file_path (str): Path of the trace.
+        chunk_size (int, optional): Max number of frames of each chunk.
+            Defaults to DEFAULT_TRACE_CHUNK.
+        rx_only (bool, optional): Skip the frames sent by the node, which have the ids of the
+            devices the commands are sent to. Defaults to True.
+
+    Raises:
+        ValueError: Raised when a .bin file has not been written by the flight recorder.
+
+    Yields:
+        DrvCanTraceC: Next chunk of frames, from the oldest.
+    '''
+    if os_path.splitext(file_path)[1] == _BIN_SUFFIX:
+        yield from _read_record_chunks(file_path, chunk_size, rx_only)
+    else:
+        yield from _read_log_chunks(file_path, chunk_size, rx_only)
+
+def _read_record_chunks(file_path: str, chunk_size: int,
+                        rx_only: bool) -> Iterator[DrvCanTraceC]:
+    '''Read a file of the flight recorder in chunks.
+    '''
+    skip_flags = _FLAG_ERROR | _FLAG_REMOTE | (_FLAG_TX if rx_only else 0)
+    with open(file_path, 'rb') as file:
+        magic, version, _ = _FILE_HEADER_FMT.unpack(file.read(_FILE_HEADER_FMT.size))
+        if magic != _FILE_MAGIC or version != _FILE_VERSION:
+            log.error(f"The file {file_path} has not been written by the flight recorder")
+            raise ValueError(f"The file {file_path} has not been written by the flight recorder")
+        while True:
+            data = file.read(chunk_size * _RECORD_FMT.size)
+            if len(data) < _RECORD_FMT.size:
+                break
+            records = np.frombuffer(data, dtype= _RECORD_DTYPE,
+                                    count= len(data) // _RECORD_FMT.size)
+            records = records[(records['flags'] & skip_flags) == 0]
+            if len(records) > 0:
+                yield DrvCanTraceC(records['timestamp'].copy(), records['addr'].copy(),
+                                   records['dlc'].copy(), records['bus'].copy(),
+                                   records['payload'].copy())
+
+def _read_log_chunks(file_path: str, chunk_size: int, rx_only: bool) -> Iterator[DrvCanTraceC]:
+    '''Read a log of python-can in chunks, the reader parses the file frame by frame.
+    '''
+    timestamps: List[float] = []
+    addrs: List[int] = []
+    dlcs: List[int] = []
+    buses: List[int] = []
+    payloads = bytearray()
+    for msg in LogReader(file_path):
+        if msg.is_error_frame or msg.is_remote_frame or (rx_only and not msg.is_rx):
+            continue
+        dlc = min(msg.dlc, _Constants.MAX_DLC_SIZE)
+        timestamps.append(msg.timestamp)
+        addrs.append(msg.arbitration_id)
+        dlcs.append(dlc)
+        buses.append(msg.channel if isinstance(msg.channel, int) else 0)
+        payloads += bytes(msg.data[:dlc]).ljust(_Constants.MAX_DLC_SIZE, b'\x00')
+        if len(timestamps) == chunk_size:
+            yield _build_chunk(timestamps, addrs, dlcs, buses, payloads)
+            timestamps, addrs, dlcs, buses, payloads = [], [], [], [], bytearray()
+    if len(timestamps) > 0:
+        yield _build_chunk(timestamps, addrs, dlcs, buses, payloads)
+
+def _build_chunk(timestamps: List[float], addrs: List[int], dlcs: List[int], # pylint: disable= too-many-arguments
+                 buses: List[int], payloads: bytearray) -> DrvCanTraceC:
+    '''Build a chunk with the columns of the frames read.
+    '''
+    return DrvCanTraceC(np.array(timestamps, dtype= np.float64),
+                        np.array(addrs, dtype= np.uint32), np.array(dlcs, dtype= np.uint8),
+                        np.array(buses, dtype= np.uint8),
+                        np.frombuffer(bytes(payloads), dtype= np.uint8).reshape(
+                            -1, _Constants.MAX_DLC_SIZE))
@@ -27,15 +27,52 @@ DEFAULT_CHAN_NUM_MSG : int = 200 # Max number of allowed message per chan
 DEFAULT_MAX_MSG_SIZE : int = 250 # Size of message sent through IPC message queue
 DEFAULT_TIMEOUT_SEND_MSG : float = 0.2 # s # Timeout for sending a message
 DEFAULT_TIMEOUT_RX_MSG: float = 0.02 # s # Timeout for receiving a message
+DEFAULT_TIMEOUT_CHAN_RX: float = 1 # s # Timeout for receiving data from an IPC channel
 DEFAULT_NODE_PERIOD: int = 200 # ms # Period of the node
 DEFAULT_NODE_NAME: str = 'CAN_SNIFFER' # Name of the node
 DEFAULT_TX_NAME: str = 'TX_CAN' # Name of the TX channel
 DEFAULT_IFACE_NAME: str = 'socketcan' # Name of the CAN interface
 DEFAULT_IFACE_CHAN_NAME: str = 'can0' # Name of the CAN interface channel
+DEFAULT_IFACE_BITRATE: int = 125000 # bit/s # Bitrate of the CAN interface
+DEFAULT_IFACE_FD: bool = True # Use CAN FD in the CAN interface
+DEFAULT_IFACE_RX_OWN: bool = False # Receive the messages sent by the node
+DEFAULT_RX_BURST_MAX: int = 500 # Max number of messages read from the bus per cycle
+DEFAULT_RX_BURST_TIME: float = 0.1 # s # Max time spent reading messages from the bus per cycle
+DEFAULT_TX_BURST_MAX: int = 50 # Max number of commands applied per cycle
+DEFAULT_TX_BURST_TIME: float = 0.05 # s # Max time spent applying commands per cycle
+DEFAULT_KERNEL_FILTERS: bool = True # Install the active filters in the CAN interface
+DEFAULT_EVENT_DRIVEN: bool = False # Wake the node on each message and command instead of polling
+DEFAULT_STATS_NAME: str = 'CAN_STATS' # Name of the channel where the stats are published
+DEFAULT_STATS_PERIOD: float = 1.0 # s # Period to publish the stats, 0 to disable it
+DEFAULT_STATS_MSG_SIZE: int = 8192 # Max size of the stats published
+DEFAULT_STATS_TOP_IDS: int = 10 # Number of unmatched ids included in the stats
+DEFAULT_MAILBOX_NAME: str = 'CAN_MAILBOX' # Name of the shared memory with the last messages
+DEFAULT_RING_NAME: str = 'CAN_RING' # Name of the shared memory of the ring buffer
+DEFAULT_RING_SLOTS: int = 4096 # Number of messages stored in the ring buffer
+DEFAULT_PROCESS_START_TIMEOUT: float = 5.0 # s # Max time to wait the node process to start
+DEFAULT_PROCESS_STOP_TIMEOUT: float = 5.0 # s # Max time to wait the node process to stop
+DEFAULT_PROCESS_STATUS_PERIOD: float = 0.1 # s # Period to forward the status of the node process
+DEFAULT_BUS_LOAD_WINDOW: float = 0.5 # s # Time window used to estimate the load of the bus
+DEFAULT_BUS_LOAD_MAX: float = 0.0 # Load of the bus (0-1) to throttle bulk commands, 0 to disable it
+DEFAULT_RECORD_TIME: float = 5.0 # s # Time before a trigger written by the flight recorder
+DEFAULT_RECORD_SLOTS: int = 8192 # Number of frames stored by the flight recorder
+DEFAULT_RECORD_PATH: str = 'can_record.bin' # Base name of the files written by the recorder
+DEFAULT_RECORD_HOLDOFF: float = 5.0 # s # Min time between two files written by the recorder
+DEFAULT_TRACE_CHUNK: int = 65536 # Max number of frames of each chunk read from a trace
 
 CONSTANTS_NAMES = ('DEFAULT_CHAN_NUM_MSG', 'DEFAULT_MAX_MSG_SIZE',
-                'DEFAULT_TIMEOUT_SEND_MSG', 'DEFAULT_TIMEOUT_RX_MSG',
+                'DEFAULT_TIMEOUT_SEND_MSG', 'DEFAULT_TIMEOUT_RX_MSG', 'DEFAULT_TIMEOUT_CHAN_RX',
                 'DEFAULT_NODE_PERIOD', 'DEFAULT_NODE_NAME', 'DEFAULT_TX_NAME',
-                'DEFAULT_IFACE_NAME', 'DEFAULT_IFACE_CHAN_NAME')
+                'DEFAULT_IFACE_NAME', 'DEFAULT_IFACE_CHAN_NAME', 'DEFAULT_IFACE_BITRATE',
+                'DEFAULT_IFACE_FD', 'DEFAULT_IFACE_RX_OWN',
+                'DEFAULT_RX_BURST_MAX', 'DEFAULT_RX_BURST_TIME',
+                'DEFAULT_TX_BURST_MAX', 'DEFAULT_TX_BURST_TIME', 'DEFAULT_KERNEL_FILTERS',
+                'DEFAULT_EVENT_DRIVEN', 'DEFAULT_STATS_NAME', 'DEFAULT_STATS_PERIOD',
+                'DEFAULT_STATS_MSG_SIZE', 'DEFAULT_STATS_TOP_IDS', 'DEFAULT_MAILBOX_NAME',
+                'DEFAULT_RING_NAME', 'DEFAULT_RING_SLOTS', 'DEFAULT_PROCESS_START_TIMEOUT',
+                'DEFAULT_PROCESS_STOP_TIMEOUT', 'DEFAULT_PROCESS_STATUS_PERIOD',
+                'DEFAULT_BUS_LOAD_WINDOW', 'DEFAULT_BUS_LOAD_MAX', 'DEFAULT_RECORD_TIME',
+                'DEFAULT_RECORD_SLOTS', 'DEFAULT_RECORD_PATH', 'DEFAULT_RECORD_HOLDOFF',
+                'DEFAULT_TRACE_CHUNK')
 sys_conf_update_config_params(context=globals(),
                               constants_names=CONSTANTS_NAMES)
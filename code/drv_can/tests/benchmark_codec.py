@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Benchmark of the binary encoding of CAN messages and commands against pickle.
+It measures the size of the data, the time to encode and decode it, and the round-trip
+through a POSIX message queue, using SysShdIpcChanC (pickle) and DrvCanChanC (binary).
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import sys
+import os
+#######################         GENERIC IMPORTS          #######################
+from pickle import dumps, loads, HIGHEST_PROTOCOL
+from timeit import timeit
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels='code/log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+sys.path.append(os.getcwd()+'/code/drv_can/')
+from system_shared_tool import SysShdIpcChanC
+from src.can_sniffer import (DrvCanCmdDataC, DrvCanCmdTypeE, DrvCanFilterC, DrvCanMessageC,
+                             DrvCanChanC, encode_can_data, decode_can_data)
+
+######################             CONSTANTS              ######################
+_N_LOOPS = 20000
+_CHAN_NAME = 'BENCH_CAN_CODEC'
+
+#######################            FUNCTIONS             #######################
+def round_trip(chan: SysShdIpcChanC, data: object, n_loops: int) -> float:
+    """Send and receive the data through the channel.
+
+    Args:
+        chan (SysShdIpcChanC): Channel used.
+        data (object): Data to send.
+        n_loops (int): Number of round-trips.
+
+    Returns:
+        float: Mean time of each round-trip in seconds.
+    """
+    def _loop():
+        for _ in range(n_loops):
+            chan.send_data(data)
+            chan.receive_data()
+    return timeit(_loop, number=1) / n_loops
+
+if __name__ == '__main__':
+    samples = {
+        'message': DrvCanMessageC(addr=0x03C, size=6, payload=0x0FA01F4013880, timestamp=1.0),
+        'cmd message': DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                                      DrvCanMessageC(addr=0x031, size=1, payload=3)),
+        'cmd filter': DrvCanCmdDataC(DrvCanCmdTypeE.ADD_FILTER,
+                                     DrvCanFilterC(addr=0x030, mask=0x7F0,
+                                                   chan_name='RX_CAN_EPC0x30'))}
+    # The pickled filter is longer than the messages of the CAN channels
+    pickle_chan = SysShdIpcChanC(name=_CHAN_NAME+'_PICKLE', max_msg=10, max_message_size=500)
+    binary_chan = DrvCanChanC(name=_CHAN_NAME+'_BINARY', max_msg=10, max_message_size=250)
+    try:
+        for name, sample in samples.items():
+            pickled = dumps(sample, protocol=HIGHEST_PROTOCOL)
+            encoded = encode_can_data(sample)
+            t_pickle_enc = timeit(lambda: dumps(sample, protocol=HIGHEST_PROTOCOL), # pylint: disable=cell-var-from-loop
+                                  number=_N_LOOPS) / _N_LOOPS
+            t_binary_enc = timeit(lambda: encode_can_data(sample), # pylint: disable=cell-var-from-loop
+                                  number=_N_LOOPS) / _N_LOOPS
+            t_pickle_dec = timeit(lambda: loads(pickled), # pylint: disable=cell-var-from-loop
+                                  number=_N_LOOPS) / _N_LOOPS
+            t_binary_dec = timeit(lambda: decode_can_data(encoded), # pylint: disable=cell-var-from-loop
+                                  number=_N_LOOPS) / _N_LOOPS
+            t_pickle_ipc = round_trip(pickle_chan, sample, _N_LOOPS)
+            t_binary_ipc = round_trip(binary_chan, sample, _N_LOOPS)
+            log.info(f"{name}: size pickle {len(pickled)} B, binary {len(encoded)} B")
+            log.info(f"{name}: encode pickle {t_pickle_enc*1e6:.2f} us, "
+                     f"binary {t_binary_enc*1e6:.2f} us")
+            log.info(f"{name}: decode pickle {t_pickle_dec*1e6:.2f} us, "
+                     f"binary {t_binary_dec*1e6:.2f} us")
+            log.info(f"{name}: IPC round-trip pickle {t_pickle_ipc*1e6:.2f} us, "
+                     f"binary {t_binary_ipc*1e6:.2f} us")
+    finally:
+        pickle_chan.terminate()
+        binary_chan.terminate()
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""
+Benchmark of the latency of the CAN node in periodic and event driven mode.
+It measures the time from a frame sent to the bus until it is received from the channel
+of its filter, and the time from a command sent to the TX channel until the frame is read
+from the bus. It runs on the python-can virtual interface, so no CAN hardware is needed.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import sys
+import os
+#######################         GENERIC IMPORTS          #######################
+from statistics import mean, median, quantiles
+from threading import Event
+from time import perf_counter, sleep
+from typing import List
+#######################       THIRD PARTY IMPORTS        #######################
+from can import ThreadSafeBus, Message
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels='code/log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+sys.path.append(os.getcwd()+'/code/drv_can/')
+from src.can_sniffer import (DrvCanNodeC, DrvCanBusParamsC, DrvCanCmdDataC, DrvCanCmdTypeE,
+                             DrvCanFilterC, DrvCanMessageC, DrvCanChanC)
+from src.can_sniffer.context import DEFAULT_NODE_PERIOD, DEFAULT_TX_NAME
+
+######################             CONSTANTS              ######################
+_N_SAMPLES = 200
+_VIRTUAL_CHAN = 'bench_event_latency'
+_RX_CHAN_NAME = 'BENCH_RX_CAN'
+_FILTER_ADDR = 0x030
+_FILTER_MASK = 0x7F0
+
+#######################            FUNCTIONS             #######################
+def summary(samples: List[float]) -> str:
+    """Format the statistics of a list of latencies.
+
+    Args:
+        samples (List[float]): Latencies in seconds.
+
+    Returns:
+        str: Mean, median, 99th percentile and max in milliseconds.
+    """
+    p99 = quantiles(samples, n=100)[98]
+    return (f"mean {mean(samples)*1e3:7.2f} ms, p50 {median(samples)*1e3:7.2f} ms, "
+            f"p99 {p99*1e3:7.2f} ms, max {max(samples)*1e3:7.2f} ms")
+
+def measure(event_driven: bool) -> None:
+    """Run a CAN node and measure the latency of the reception and transmission.
+
+    Args:
+        event_driven (bool): Mode of the node.
+    """
+    working_flag = Event()
+    working_flag.set()
+    node = DrvCanNodeC(working_flag=working_flag, cycle_period=DEFAULT_NODE_PERIOD,
+                       event_driven=event_driven,
+                       bus_params=DrvCanBusParamsC(interface='virtual', channel=_VIRTUAL_CHAN))
+    node.start()
+    tx_chan = DrvCanChanC(name=DEFAULT_TX_NAME)
+    rx_chan = DrvCanChanC(name=_RX_CHAN_NAME, max_message_size=150)
+    peer = ThreadSafeBus(interface='virtual', channel=_VIRTUAL_CHAN)
+    try:
+        tx_chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.ADD_FILTER,
+                          DrvCanFilterC(addr=_FILTER_ADDR, mask=_FILTER_MASK,
+                                        chan_name=_RX_CHAN_NAME)))
+        sleep(2*DEFAULT_NODE_PERIOD/1000)
+        rx_latency = []
+        tx_latency = []
+        for i in range(_N_SAMPLES):
+            t_start = perf_counter()
+            peer.send(Message(arbitration_id=_FILTER_ADDR | 0xC, data=bytes([i%256]*6),
+                              is_extended_id=False))
+            rx_chan.receive_data(timeout=None)
+            rx_latency.append(perf_counter()-t_start)
+            t_start = perf_counter()
+            tx_chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                              DrvCanMessageC(addr=_FILTER_ADDR | 0x1, size=1, payload=i%256)))
+            peer.recv(timeout=None)
+            tx_latency.append(perf_counter()-t_start)
+        mode = 'event driven' if event_driven else 'periodic'
+        log.info(f"{mode:>12} RX: {summary(rx_latency)}")
+        log.info(f"{mode:>12} TX: {summary(tx_latency)}")
+    finally:
+        working_flag.clear()
+        node.join()
+        rx_chan.terminate()
+        tx_chan.close()
+        peer.shutdown()
+
+if __name__ == '__main__':
+    measure(event_driven=False)
+    measure(event_driven=True)
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark of the dispatch of received CAN messages to the active filters.
+It compares the linear scan of a list of filters with the filter index used by the node,
+while the number of filters grows from 1 to 256.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import sys
+import os
+#######################         GENERIC IMPORTS          #######################
+from random import Random
+from timeit import timeit
+from typing import List
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels='code/log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+sys.path.append(os.getcwd()+'/code/drv_can/')
+from src.can_sniffer import DrvCanFilterC
+from src.can_sniffer.can_filter_index import DrvCanFilterIndexC
+
+######################             CONSTANTS              ######################
+_FILTER_COUNTS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+_N_FRAMES = 20000
+_EPC_MASK = 0x7F0
+_BMS_MASK = 0x7FF
+
+#######################            FUNCTIONS             #######################
+def build_filters(n_filters: int) -> List[DrvCanFilterC]:
+    """Build a mix of EPC like filters (mask 0x7F0) and BMS like filters (mask 0x7FF).
+
+    Args:
+        n_filters (int): Number of filters to build.
+
+    Returns:
+        List[DrvCanFilterC]: Filters built.
+    """
+    filters = []
+    for i in range(n_filters):
+        if i % 2 == 0:
+            filters.append(DrvCanFilterC(addr=(i//2) << 4, mask=_EPC_MASK,
+                                         chan_name=f'RX_CAN_EPC{hex((i//2) << 4)}'))
+        else:
+            filters.append(DrvCanFilterC(addr=0x100 | (i//2), mask=_BMS_MASK,
+                                         chan_name=f'RX_CAN_BMS_{i//2:02x}'))
+    return filters
+
+def linear_match(filters: List[DrvCanFilterC], id_can: int) -> DrvCanFilterC|None:
+    """Dispatch as the node did before the index, walking every filter.
+
+    Args:
+        filters (List[DrvCanFilterC]): Active filters.
+        id_can (int): Id of the received message.
+
+    Returns:
+        DrvCanFilterC|None: First filter that matches the id.
+    """
+    for act_filter in filters:
+        if (id_can & act_filter.mask) == (act_filter.addr & act_filter.mask):
+            return act_filter
+    return None
+
+if __name__ == '__main__':
+    rnd = Random(0)
+    frames = [rnd.randrange(0, 0x800) for _ in range(_N_FRAMES)]
+    log.info(f"{'filters':>8} {'linear [ns/frame]':>18} {'index [ns/frame]':>17} {'speed-up':>9}")
+    for count in _FILTER_COUNTS:
+        list_filters = build_filters(count)
+        index = DrvCanFilterIndexC()
+        for filter_bench in list_filters:
+            index.add(filter_bench)
+        for frame_id in frames:
+            assert index.match(frame_id) is linear_match(list_filters, frame_id)
+        t_linear = timeit(lambda: [linear_match(list_filters, f) for f in frames], # pylint: disable=cell-var-from-loop
+                          number=3) / (3*_N_FRAMES)
+        t_index = timeit(lambda: [index.match(f) for f in frames], # pylint: disable=cell-var-from-loop
+                         number=3) / (3*_N_FRAMES)
+        log.info(f"{count:>8} {t_linear*1e9:>18.1f} {t_index*1e9:>17.1f} "
+                 f"{t_linear/t_index:>8.1f}x")
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""
+Test of the priority lanes of the TX channel of the CAN node.
+The bulk lane is filled with requests before starting the node, as many EPCs calling
+get_data(update=True) would do, and then a control frame is sent. With the lanes, the control
+frame is accepted even if the bulk lane is full and it is the first frame sent to the bus.
+Without them, sent with the same priority as the requests, it waits behind all of them.
+It runs on the python-can virtual interface, so no CAN hardware is needed.
+Run it from the root of the repository:
+    python code/drv_can/tests/benchmark_priority_lanes.py
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import sys
+import os
+#######################         GENERIC IMPORTS          #######################
+from threading import Event
+from time import perf_counter
+from typing import Tuple
+#######################       THIRD PARTY IMPORTS        #######################
+from can import ThreadSafeBus
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels='code/log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+sys.path.append(os.getcwd()+'/code/drv_can/')
+from src.can_sniffer import (DrvCanNodeC, DrvCanBusParamsC, DrvCanCmdDataC, DrvCanCmdTypeE,
+                             DrvCanMessageC, DrvCanTxChanC, DrvCanPriorityE)
+from src.can_sniffer.context import DEFAULT_TX_NAME
+
+######################             CONSTANTS              ######################
+_VIRTUAL_CHAN = 'bench_priority_lanes'
+_NODE_PERIOD = 10 # ms
+_TX_BUFFER_SIZE = 200
+_REQUEST_ADDR = 0x031 # Request of data of an EPC
+_CONTROL_ADDR = 0x030 # Mode of an EPC, as sent by disable()
+_RECV_TIMEOUT = 5.0 # s
+
+#######################            FUNCTIONS             #######################
+def run_case(event_driven: bool, lanes: bool) -> Tuple[int, float]:
+    """Fill the bulk lane with requests, send a control frame and start the node.
+
+    Args:
+        event_driven (bool): Run the node in event driven mode.
+        lanes (bool): Send the control frame with CONTROL priority, otherwise it is sent
+            with BULK priority as the requests.
+
+    Returns:
+        Tuple[int, float]: Position of the control frame in the bus and time in seconds since
+        the node started until it is in the bus.
+    """
+    working_flag = Event()
+    working_flag.set()
+    node = DrvCanNodeC(working_flag=working_flag, tx_buffer_size=_TX_BUFFER_SIZE,
+                       cycle_period=_NODE_PERIOD, event_driven=event_driven, stats_period=0,
+                       bus_params=DrvCanBusParamsC(interface='virtual', channel=_VIRTUAL_CHAN))
+    tx_chan = DrvCanTxChanC(name=DEFAULT_TX_NAME)
+    peer = ThreadSafeBus(interface='virtual', channel=_VIRTUAL_CHAN)
+    n_requests = _TX_BUFFER_SIZE if lanes else _TX_BUFFER_SIZE - 1
+    for i in range(n_requests):
+        assert tx_chan.send_data_unblocking(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                    DrvCanMessageC(addr=_REQUEST_ADDR, size=1, payload=i%5),
+                    DrvCanPriorityE.BULK))
+    control = DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                             DrvCanMessageC(addr=_CONTROL_ADDR, size=8, payload=0),
+                             DrvCanPriorityE.CONTROL if lanes else DrvCanPriorityE.BULK)
+    if lanes:
+        # The bulk lane is full, but the control frame does not wait for it
+        assert not tx_chan.send_data_unblocking(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                    DrvCanMessageC(addr=_REQUEST_ADDR, size=1, payload=0), DrvCanPriorityE.BULK))
+    assert tx_chan.send_data_unblocking(control)
+    position = None
+    t_start = perf_counter()
+    node.start()
+    try:
+        for index in range(n_requests + 1):
+            msg = peer.recv(timeout=_RECV_TIMEOUT)
+            assert msg is not None, "Frames lost by the node"
+            if msg.arbitration_id == _CONTROL_ADDR:
+                position = index
+                break
+        delay = perf_counter() - t_start
+    finally:
+        working_flag.clear()
+        node.join()
+        tx_chan.close()
+        tx_chan.bulk.close()
+        peer.shutdown()
+    mode = 'event driven' if event_driven else 'periodic'
+    case = 'lanes' if lanes else 'fifo'
+    log.info(f"{mode:>12} {case:>5}: control frame sent after {position} of {n_requests} "
+             f"requests, {delay*1e3:7.2f} ms after starting the node")
+    return position, delay
+
+if __name__ == '__main__':
+    for event_mode in (False, True):
+        fifo_position, _ = run_case(event_mode, lanes=False)
+        lanes_position, _ = run_case(event_mode, lanes=True)
+        assert fifo_position == _TX_BUFFER_SIZE - 1
+        assert lanes_position == 0
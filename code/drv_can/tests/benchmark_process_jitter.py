@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+"""
+Benchmark of the jitter of the latency of the CAN node when other threads of the same process
+are doing CPU bound work, with the node running as a thread and in its own process.
+Each frame is sent as a command to the node, which sends it to the bus, receives it back and
+forwards it to the channel of its filter. The latency is measured from a separate process, so
+only the node shares the GIL with the CPU bound threads in thread mode. It runs on the
+python-can virtual interface, so no CAN hardware is needed.
+Run it from the root of the repository:
+    python code/drv_can/tests/benchmark_process_jitter.py --cotenants 2 --cpu 1
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import sys
+import os
+#######################         GENERIC IMPORTS          #######################
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from statistics import median, pstdev, quantiles
+from threading import Event, Thread
+from time import perf_counter, sleep
+from typing import List
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels='code/log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+sys.path.append(os.getcwd()+'/code/drv_can/')
+from src.can_sniffer import (DrvCanNodeC, DrvCanProcessC, DrvCanBusParamsC, DrvCanCmdDataC,
+                             DrvCanCmdTypeE, DrvCanFilterC, DrvCanMessageC, DrvCanChanC)
+from src.can_sniffer.context import DEFAULT_NODE_PERIOD, DEFAULT_TX_NAME
+
+######################             CONSTANTS              ######################
+_VIRTUAL_CHAN = 'bench_process_jitter'
+_RX_CHAN_NAME = 'BENCH_RX_JITTER'
+_FILTER_ADDR = 0x030
+_FILTER_MASK = 0x7F0
+_MODES = ('thread', 'process')
+
+#######################            FUNCTIONS             #######################
+def cpu_load(stop: Event) -> None:
+    """Co-tenant of the node that keeps the GIL busy with pure python work.
+
+    Args:
+        stop (Event): Set to finish.
+    """
+    while not stop.is_set():
+        sum(i*i for i in range(10000))
+
+def measure_latency(n_samples: int, start, conn) -> None:
+    """Process that sends frames through the node and measures the time until each one is
+    received back from the channel of its filter.
+
+    Args:
+        n_samples (int): Number of frames.
+        start (Event): Set when the node and the co-tenants are running.
+        conn (Connection): Pipe where the latencies in seconds are sent.
+    """
+    start.wait()
+    tx_chan = DrvCanChanC(name=DEFAULT_TX_NAME)
+    rx_chan = DrvCanChanC(name=_RX_CHAN_NAME, max_message_size=150)
+    tx_chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.ADD_FILTER,
+                      DrvCanFilterC(addr=_FILTER_ADDR, mask=_FILTER_MASK,
+                                    chan_name=_RX_CHAN_NAME)))
+    sleep(2*DEFAULT_NODE_PERIOD/1000)
+    samples = []
+    for i in range(n_samples):
+        t_start = perf_counter()
+        tx_chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                          DrvCanMessageC(addr=_FILTER_ADDR | 0x1, size=1, payload=i%256)))
+        rx_chan.receive_data(timeout=None)
+        samples.append(perf_counter()-t_start)
+    conn.send(samples)
+    tx_chan.close()
+    rx_chan.close()
+
+def summary(samples: List[float]) -> str:
+    """Format the statistics of a list of latencies.
+
+    Args:
+        samples (List[float]): Latencies in seconds.
+
+    Returns:
+        str: Median, 99th percentile, max and standard deviation in milliseconds.
+    """
+    p99 = quantiles(samples, n=100)[98]
+    return (f"p50 {median(samples)*1e3:7.2f} ms, p99 {p99*1e3:7.2f} ms, "
+            f"max {max(samples)*1e3:7.2f} ms, jitter (std) {pstdev(samples)*1e3:7.2f} ms")
+
+def run_case(mode: str, n_cotenants: int, n_samples: int, # pylint: disable= too-many-arguments
+             cpu: int|None, nice: int|None) -> List[float]:
+    """Run the node with CPU bound co-tenants and measure the latency of the frames.
+
+    Args:
+        mode (str): thread or process.
+        n_cotenants (int): Number of CPU bound threads in the process of the application.
+        n_samples (int): Number of frames measured.
+        cpu (int|None): Core where the node process is pinned in process mode.
+        nice (int|None): Nice value of the node process in process mode.
+
+    Returns:
+        List[float]: Latencies in seconds.
+    """
+    node_args = {'cycle_period': DEFAULT_NODE_PERIOD, 'event_driven': True, 'stats_period': 0,
+                 'bus_params': DrvCanBusParamsC(interface='virtual', channel=_VIRTUAL_CHAN,
+                                                receive_own_messages=True)}
+    # The measuring process is forked before any other thread is running
+    context = get_context('fork')
+    start = context.Event()
+    recv_conn, send_conn = context.Pipe(duplex=False)
+    measurer = context.Process(target=measure_latency, args=(n_samples, start, send_conn))
+    measurer.start()
+    if mode == 'process':
+        node = DrvCanProcessC(cpu=cpu, nice=nice, **node_args)
+        node.start()
+    else:
+        working_flag = Event()
+        working_flag.set()
+        node = DrvCanNodeC(working_flag=working_flag, **node_args)
+        node.start()
+    stop = Event()
+    cotenants = [Thread(target=cpu_load, args=(stop,), daemon=True) for _ in range(n_cotenants)]
+    for cotenant in cotenants:
+        cotenant.start()
+    try:
+        start.set()
+        samples = recv_conn.recv()
+        measurer.join()
+    finally:
+        stop.set()
+        for cotenant in cotenants:
+            cotenant.join()
+        if mode == 'process':
+            node.stop()
+        else:
+            working_flag.clear()
+            node.join()
+    log.info(f"{mode:>7} co-tenants {n_cotenants}: {summary(samples)}")
+    return samples
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--cotenants', type=int, nargs='+', default=[0, 2],
+                        help='number of CPU bound threads of the application')
+    parser.add_argument('--samples', type=int, default=500, help='frames measured per case')
+    parser.add_argument('--cpu', type=int, default=None,
+                        help='core where the node process is pinned')
+    parser.add_argument('--nice', type=int, default=None, help='nice value of the node process')
+    args = parser.parse_args()
+    for cotenants_case in args.cotenants:
+        for mode_case in _MODES:
+            run_case(mode_case, cotenants_case, args.samples, args.cpu, args.nice)
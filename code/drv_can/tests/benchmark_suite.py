@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+"""
+Throughput and latency benchmark suite of the CAN node.
+It drives the node over the python-can virtual interface with synthetic EPC and BMS traffic,
+sweeping the frame rate, the number of filters and the number of consumers, in periodic and
+event driven mode, delivering the frames through the channels of the filters (queue) or through
+the ring buffer in shared memory (ring). For each case it reports the frames sent and received, the drops, the
+throughput and the latency from the bus to the channel of the consumer, and writes all the
+results to a JSON file so they can be compared between versions:
+    python code/drv_can/tests/benchmark_suite.py --output benchmark_can.json
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import sys
+import os
+#######################         GENERIC IMPORTS          #######################
+import json
+from argparse import ArgumentParser
+from datetime import datetime
+from itertools import product
+from platform import node as host_name, python_version
+from statistics import median, quantiles
+from struct import Struct
+from threading import Event, Thread
+from time import sleep, time
+from typing import Dict, List
+#######################       THIRD PARTY IMPORTS        #######################
+from can import ThreadSafeBus, Message
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels='code/log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+sys.path.append(os.getcwd()+'/code/drv_can/')
+from src.can_sniffer import (DrvCanNodeC, DrvCanBusParamsC, DrvCanCmdDataC, DrvCanCmdTypeE,
+                             DrvCanFilterC, DrvCanChanC, DrvCanDeliveryE, DrvCanMessageC,
+                             DrvCanRingC)
+from src.can_sniffer.context import DEFAULT_NODE_PERIOD, DEFAULT_TX_NAME
+
+######################             CONSTANTS              ######################
+_RATES = (1000, 4000, 16000) # frames/s
+_FILTER_COUNTS = (1, 8, 32)
+_CONSUMER_COUNTS = (1, 4)
+_MODES = ('periodic', 'event')
+_TRANSPORTS = {'queue': DrvCanDeliveryE.QUEUE, 'ring': DrvCanDeliveryE.RING}
+_DURATION = 1.0 # s # Time sending frames in each case
+_DRAIN_TIME = 2.0 # s # Max time waiting for the frames still in flight
+_CONSUMER_IDLE = 0.0005 # s # Sleep of a consumer when all its channels are empty
+_PACING_SLICE = 0.001 # s # The producer sends the frames due in each slice of time
+_EPC_MASK = 0x7F0
+_BMS_MASK = 0x7FF
+_EPC_MSG_TYPES = (0x2, 0x3, 0x4, 0x5) # Messages sent periodically by the EPC
+_BMS_MSG_TYPE = 0x100
+# The payload of each frame carries the time when it was sent
+_STAMP = Struct('<d')
+
+#######################             CLASSES              #######################
+class _ConsumerC(Thread):
+    """Thread that reads the channels of some filters, as the drivers do,
+    and keeps the latency of each frame.
+    """
+    def __init__(self, chans: List[DrvCanChanC], stop_flag: Event) -> None:
+        super().__init__(daemon=True)
+        self.chans: List[DrvCanChanC] = chans
+        self.stop_flag: Event = stop_flag
+        self.latency: List[float] = []
+        self.last_rx: float = 0.0
+
+    def read_msgs(self) -> List[DrvCanMessageC]:
+        """Read all the messages waiting in the channels.
+
+        Returns:
+            List[DrvCanMessageC]: Messages read.
+        """
+        msgs = []
+        for chan in self.chans:
+            msg = chan.receive_data_unblocking()
+            while msg is not None:
+                msgs.append(msg)
+                msg = chan.receive_data_unblocking()
+        return msgs
+
+    def run(self) -> None:
+        while not self.stop_flag.is_set():
+            msgs = self.read_msgs()
+            if len(msgs) > 0:
+                self.last_rx = time()
+                for msg in msgs:
+                    self.latency.append(self.last_rx - _STAMP.unpack(bytes(msg.payload))[0])
+            else:
+                sleep(_CONSUMER_IDLE)
+
+class _RingConsumerC(_ConsumerC):
+    """Thread that reads the messages of some filters from the ring buffer of the node.
+    """
+    def __init__(self, filters: List[DrvCanFilterC], stop_flag: Event) -> None:
+        super().__init__([], stop_flag)
+        self.ring: DrvCanRingC = DrvCanRingC(filters=filters)
+
+    def read_msgs(self) -> List[DrvCanMessageC]:
+        return self.ring.read()
+
+#######################            FUNCTIONS             #######################
+def build_traffic(n_filters: int) -> tuple[List[DrvCanFilterC], List[int]]:
+    """Build a mix of EPC filters (mask 0x7F0) and BMS filters (mask 0x7FF)
+    and the ids of the frames those devices send.
+
+    Args:
+        n_filters (int): Number of filters to build.
+
+    Returns:
+        tuple[List[DrvCanFilterC], List[int]]: Filters and ids of the frames.
+    """
+    filters = []
+    ids = []
+    for i in range(n_filters):
+        if i % 2 == 0:
+            addr = (i//2 + 1) << 4
+            filters.append(DrvCanFilterC(addr=addr, mask=_EPC_MASK,
+                                         chan_name=f'BENCH_RX_CAN_EPC{hex(addr)}'))
+            ids.extend(addr | msg_type for msg_type in _EPC_MSG_TYPES)
+        else:
+            addr = _BMS_MSG_TYPE | (i//2)
+            filters.append(DrvCanFilterC(addr=addr, mask=_BMS_MASK,
+                                         chan_name=f'BENCH_RX_CAN_BMS_{i//2:02x}'))
+            ids.append(addr)
+    return filters, ids
+
+def send_traffic(peer: ThreadSafeBus, ids: List[int], rate: int, duration: float) -> int:
+    """Send frames to the bus at a constant rate, cycling through the ids.
+
+    Args:
+        peer (ThreadSafeBus): Bus used to send the frames.
+        ids (List[int]): Ids of the frames.
+        rate (int): Frames per second.
+        duration (float): Time sending frames in seconds.
+
+    Returns:
+        int: Number of frames sent.
+    """
+    n_frames = int(rate*duration)
+    t_start = time()
+    for i in range(n_frames):
+        t_due = t_start + i/rate
+        t_wait = t_due - time()
+        if t_wait > _PACING_SLICE:
+            sleep(t_wait)
+        peer.send(Message(arbitration_id=ids[i % len(ids)], is_extended_id=False,
+                          data=_STAMP.pack(time())))
+    return n_frames
+
+def run_case(rate: int, n_filters: int, n_consumers: int, mode: str, # pylint: disable= too-many-locals, too-many-arguments
+             transport: str, duration: float, case_id: int) -> Dict:
+    """Run a CAN node and measure one case of the sweep.
+
+    Args:
+        rate (int): Frames per second sent to the bus.
+        n_filters (int): Number of filters added to the node.
+        n_consumers (int): Number of threads reading the channels of the filters.
+        mode (str): periodic or event.
+        transport (str): queue or ring.
+        duration (float): Time sending frames in seconds.
+        case_id (int): Number of the case, used to name the virtual channel.
+
+    Returns:
+        Dict: Results of the case.
+    """
+    virtual_chan = f'bench_suite_{case_id}'
+    working_flag = Event()
+    working_flag.set()
+    node = DrvCanNodeC(working_flag=working_flag, event_driven=mode == 'event',
+                       bus_params=DrvCanBusParamsC(interface='virtual', channel=virtual_chan))
+    node.start()
+    tx_chan = DrvCanChanC(name=DEFAULT_TX_NAME)
+    peer = ThreadSafeBus(interface='virtual', channel=virtual_chan)
+    filters, ids = build_traffic(n_filters)
+    for bench_filter in filters:
+        bench_filter.delivery = _TRANSPORTS[transport]
+    chans = []
+    if transport == 'queue':
+        chans = [DrvCanChanC(name=bench_filter.chan_name, max_message_size=150)
+                 for bench_filter in filters]
+    # Discard the frames left by a previous run that did not finish
+    for chan in chans:
+        while chan.receive_data_unblocking() is not None:
+            pass
+    stop_flag = Event()
+    n_consumers = min(n_consumers, n_filters)
+    consumers = []
+    try:
+        for bench_filter in filters:
+            tx_chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.ADD_FILTER, bench_filter))
+        sleep(2*DEFAULT_NODE_PERIOD/1000)
+        # The ring buffer is created by the node with the first filter that uses it
+        if transport == 'queue':
+            consumers = [_ConsumerC(chans[i::n_consumers], stop_flag)
+                         for i in range(n_consumers)]
+        else:
+            consumers = [_RingConsumerC(filters[i::n_consumers], stop_flag)
+                         for i in range(n_consumers)]
+        for consumer in consumers:
+            consumer.start()
+        t_start = time()
+        n_sent = send_traffic(peer, ids, rate, duration)
+        t_sent = time()
+        t_limit = t_sent + _DRAIN_TIME
+        while (sum(len(consumer.latency) for consumer in consumers) < n_sent
+               and time() < t_limit):
+            sleep(0.01)
+    finally:
+        # The node must stop before the consumers, as it blocks while a channel is full
+        working_flag.clear()
+        node.join()
+        stop_flag.set()
+        for consumer in consumers:
+            consumer.join()
+            if isinstance(consumer, _RingConsumerC):
+                consumer.ring.close()
+        for chan in chans:
+            chan.terminate()
+        tx_chan.close()
+        peer.shutdown()
+    latency = sorted(lat for consumer in consumers for lat in consumer.latency)
+    n_received = len(latency)
+    t_last = max((consumer.last_rx for consumer in consumers), default=t_sent)
+    result = {'rate': rate, 'filters': n_filters, 'consumers': n_consumers, 'mode': mode,
+              'transport': transport,
+              'sent': n_sent, 'received': n_received, 'dropped': n_sent - n_received,
+              'send_rate': n_sent/(t_sent-t_start),
+              'throughput': n_received/(max(t_last, t_sent)-t_start),
+              'latency_p50_ms': median(latency)*1e3 if n_received > 0 else None,
+              'latency_p99_ms': (quantiles(latency, n=100)[98]*1e3 if n_received > 1
+                                 else None),
+              'latency_max_ms': latency[-1]*1e3 if n_received > 0 else None,
+              'rx_backlog_cycles': node.stats.rx_backlog_cycles,
+              'rx_drained_max': node.stats.rx_drained_max}
+    return result
+
+def parse_args():
+    """Parse the arguments of the command line.
+    """
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rates', type=int, nargs='+', default=_RATES,
+                        help='Frames per second sent to the bus')
+    parser.add_argument('--filters', type=int, nargs='+', default=_FILTER_COUNTS,
+                        help='Number of filters added to the node')
+    parser.add_argument('--consumers', type=int, nargs='+', default=_CONSUMER_COUNTS,
+                        help='Number of threads reading the channels')
+    parser.add_argument('--modes', nargs='+', default=_MODES, choices=_MODES,
+                        help='Modes of the node')
+    parser.add_argument('--transports', nargs='+', default=tuple(_TRANSPORTS),
+                        choices=tuple(_TRANSPORTS), help='Delivery of the frames to the consumers')
+    parser.add_argument('--duration', type=float, default=_DURATION,
+                        help='Time sending frames in each case, in seconds')
+    parser.add_argument('--output', default='benchmark_can.json',
+                        help='JSON file where the results are written')
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    results = []
+    cases = product(args.transports, args.modes, args.filters, args.consumers, args.rates)
+    for n_case, (case_transport, case_mode, case_filters, case_consumers,
+                 case_rate) in enumerate(cases):
+        case_result = run_case(case_rate, case_filters, case_consumers, case_mode,
+                               case_transport, args.duration, n_case)
+        results.append(case_result)
+        log.info(f"{case_transport:>5} {case_mode:>8} filters {case_filters:>3} "
+                 f"consumers {case_consumers:>2} rate {case_rate:>6}: received "
+                 f"{case_result['received']}/{case_result['sent']}, "
+                 f"throughput {case_result['throughput']:.0f} frames/s, "
+                 f"p50 {case_result['latency_p50_ms']} ms, p99 {case_result['latency_p99_ms']} ms")
+    report = {'date': datetime.now().isoformat(), 'host': host_name(),
+              'python': python_version(), 'duration': args.duration, 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    log.info(f"Results written to {args.output}")
@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+"""
+Configuration of the pytest tests of the CAN driver. The modules of the driver read the logger
+and the configuration file when they are imported, so both are set here, before collecting the
+tests. The tests run on the python-can virtual interface, so no CAN hardware is needed.
+Run them from the root of the repository:
+    python -m pytest code/drv_can/tests
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import sys
+import os
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import SysLogLoggerC
+
+######################             CONSTANTS              ######################
+_TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+
+#######################       LOGGER CONFIGURATION       #######################
+os.environ.setdefault('CONFIG_FILE_PATH', os.path.join(_TESTS_PATH, 'config_test.yaml'))
+cycler_logger = SysLogLoggerC(file_log_levels=os.path.join(_TESTS_PATH, '..', '..',
+                                                           'log_config.yaml'))
+sys.path.append(os.path.dirname(_TESTS_PATH))
@@ -18,9 +18,8 @@ log: Logger = sys_log_logger_get_module_logger(__name__)
 
 #######################          MODULE IMPORTS          #######################
 sys.path.append(os.getcwd()+'/code/drv_can/')
-from system_shared_tool import SysShdIpcChanC
 from src.can_sniffer import DrvCanCmdDataC, DrvCanCmdTypeE, DrvCanFilterC, DrvCanNodeC,\
-                            DrvCanMessageC
+                            DrvCanMessageC, DrvCanChanC, DrvCanTxChanC
 
 #######################            FUNCTIONS             #######################
 def translate(msg_epc: DrvCanMessageC):
@@ -77,7 +76,7 @@ if __name__ == '__main__':
         # In order to apply the messages should be wrap
         # in the DrvCanCmdDataC to know which type is it
         cmd = DrvCanCmdDataC(data_type= DrvCanCmdTypeE.ADD_FILTER, payload= filter_cmd)
-        can_queue = SysShdIpcChanC(name= 'TX_CAN')
+        can_queue = DrvCanTxChanC(name= 'TX_CAN')
         time.sleep(1)
         can_queue.send_data(cmd)
         for i in range(0,6):
@@ -96,7 +95,7 @@ if __name__ == '__main__':
         cmd = DrvCanCmdDataC(data_type= DrvCanCmdTypeE.REMOVE_FILTER, payload= filter_cmd)
         can_queue.send_data(cmd)
         time.sleep(2)
-        rx_queue= SysShdIpcChanC(name='RX_CAN_0X3')
+        rx_queue= DrvCanChanC(name='RX_CAN_0X3')
         can_queue.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE, msg1))
         log.debug('Msg1 a cola enviado')
         can_queue.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE, msg2))
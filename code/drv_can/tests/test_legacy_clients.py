@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Tests of the drivers that send the commands to the CAN node and read their channels with a
+SysShdIpcChanC, as the drivers built with previous versions of the package, which pickle them.
+Run them from the root of the repository:
+    python -m pytest code/drv_can/tests
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from threading import Event
+
+#######################       THIRD PARTY IMPORTS        #######################
+import pytest
+from can import ThreadSafeBus, Message
+from system_shared_tool import SysShdIpcChanC
+
+#######################          MODULE IMPORTS          #######################
+from src.can_sniffer import (DrvCanNodeC, DrvCanBusParamsC, DrvCanCmdDataC, DrvCanCmdTypeE,
+                             DrvCanMessageC, DrvCanFilterC, DrvCanChanC, DrvCanTxChanC)
+from src.can_sniffer.can_codec import pickle_legacy_msg
+from src.can_sniffer.context import DEFAULT_TX_NAME
+
+######################             CONSTANTS              ######################
+_VIRTUAL_CHAN = 'test_legacy_clients'
+_NODE_PERIOD = 10 # ms
+_RECV_TIMEOUT = 2.0 # s
+_LEGACY_CHAN = 'TEST_RX_CAN_LEGACY'
+_BINARY_CHAN = 'TEST_RX_CAN_BINARY'
+
+#######################            FUNCTIONS             #######################
+def _legacy_command(data_type: DrvCanCmdTypeE, payload: object) -> DrvCanCmdDataC:
+    """Command with only the fields of the previous versions of the package, whose pickle fits
+    in a message of the TX channel.
+    """
+    command = DrvCanCmdDataC(data_type, payload)
+    for name in ('priority', 'timestamp'):
+        delattr(command, name)
+    return command
+
+def _legacy_filter(addr: int, mask: int, chan_name: str) -> DrvCanCmdDataC:
+    """Command to add a filter with only the fields of the previous versions of the package.
+    """
+    legacy_filter = DrvCanFilterC(addr, mask, chan_name)
+    for name in ('overflow', 'delivery', 'multicast', 'bus'):
+        delattr(legacy_filter, name)
+    return _legacy_command(DrvCanCmdTypeE.ADD_FILTER, legacy_filter)
+
+#######################              TESTS               #######################
+@pytest.mark.parametrize('event_driven', [False, True], ids= ['periodic', 'event driven'])
+def test_pickled_filter(event_driven: bool) -> None:
+    """A filter added with a pickled command receives the messages pickled, and a filter added
+    with the binary layout receives them encoded, even if both match the same message.
+    """
+    working_flag = Event()
+    working_flag.set()
+    node = DrvCanNodeC(working_flag= working_flag, cycle_period= _NODE_PERIOD,
+                       event_driven= event_driven, stats_period= 0,
+                       bus_params= DrvCanBusParamsC(interface= 'virtual', channel= _VIRTUAL_CHAN))
+    legacy_tx = SysShdIpcChanC(name= DEFAULT_TX_NAME)
+    binary_tx = DrvCanTxChanC(name= DEFAULT_TX_NAME)
+    peer = ThreadSafeBus(interface= 'virtual', channel= _VIRTUAL_CHAN)
+    legacy_rx, binary_rx = None, None
+    node.start()
+    try:
+        legacy_tx.send_data(_legacy_filter(0x030, 0x7F0, _LEGACY_CHAN))
+        binary_tx.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.ADD_FILTER,
+                            DrvCanFilterC(0x030, 0x7F0, _BINARY_CHAN, multicast= True)))
+        # The pickled commands have the lowest priority of the channel, so the message is
+        # sent after both filters are applied
+        legacy_tx.send_data(_legacy_command(DrvCanCmdTypeE.MESSAGE,
+                                            DrvCanMessageC(0x7FF, 1, 0)))
+        assert peer.recv(timeout= _RECV_TIMEOUT) is not None
+        legacy_rx = SysShdIpcChanC(name= _LEGACY_CHAN)
+        binary_rx = DrvCanChanC(name= _BINARY_CHAN)
+        peer.send(Message(arbitration_id= 0x03C, is_extended_id= False, data= b'\x01\x02'))
+        legacy_msg = legacy_rx.receive_data(timeout= _RECV_TIMEOUT)
+        binary_msg = binary_rx.receive_data(timeout= _RECV_TIMEOUT)
+        for msg in (legacy_msg, binary_msg):
+            assert isinstance(msg, DrvCanMessageC)
+            assert (msg.addr, bytes(msg.payload)) == (0x03C, b'\x01\x02')
+        # The class of the pickled message is the one of the previous versions
+        assert b'can_sniffer.can_sniffer\nDrvCanMessageC' in pickle_legacy_msg(legacy_msg)
+    finally:
+        working_flag.clear()
+        node.join()
+        for chan in (legacy_rx, binary_rx):
+            if chan is not None:
+                chan.terminate()
+        binary_tx.terminate()
+        peer.shutdown()
@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+"""
+Tests of the priority lanes of the TX channel of the CAN node and of the binary encoding of the
+data sent through the channels, which carries the priority of the commands.
+Run them from the root of the repository:
+    python -m pytest code/drv_can/tests
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from enum import Enum
+from pickle import dumps, HIGHEST_PROTOCOL
+from threading import Event
+from typing import List
+
+#######################       THIRD PARTY IMPORTS        #######################
+import pytest
+from can import ThreadSafeBus
+
+#######################          MODULE IMPORTS          #######################
+from src.can_sniffer import (DrvCanNodeC, DrvCanBusParamsC, DrvCanCmdDataC, DrvCanCmdTypeE,
+                             DrvCanMessageC, DrvCanTxChanC, DrvCanPriorityE, DrvCanFilterC,
+                             DrvCanPeriodicC, DrvCanRequestC, DrvCanResponseC, DrvCanTriggerC,
+                             DrvCanOverflowE, DrvCanDeliveryE, encode_can_data, decode_can_data)
+from src.can_sniffer.context import DEFAULT_TX_NAME
+
+######################             CONSTANTS              ######################
+_VIRTUAL_CHAN = 'test_priority_lanes'
+_NODE_PERIOD = 10 # ms
+_TX_BUFFER_SIZE = 50
+_REQUEST_ADDR = 0x031 # Request of data of an EPC
+_CONTROL_ADDR = 0x030 # Mode of an EPC, as sent by disable()
+_RECV_TIMEOUT = 5.0 # s
+_TIMESTAMP = 1234.5
+
+_FILTERS = [DrvCanFilterC(0x030, 0x7F0, 'RX_CAN_EPC0x30', DrvCanOverflowE.COALESCE),
+            DrvCanFilterC(0x040, 0x7F0, 'RX_CAN_EPC0x40', delivery= DrvCanDeliveryE.MAILBOX,
+                          multicast= True, bus= 1)]
+_REQUEST = DrvCanRequestC(0x031, 1, 0xA, 0x03A, 'RESP_CAN_EPC0x30', 300, req_id= 7, bus= 1)
+_COMMANDS = {
+    'message': (DrvCanCmdTypeE.MESSAGE,
+                DrvCanMessageC(0x030, 8, 0x0102030405060708, _TIMESTAMP, 1)),
+    'add filter': (DrvCanCmdTypeE.ADD_FILTER, _FILTERS[0]),
+    'remove filter': (DrvCanCmdTypeE.REMOVE_FILTER, _FILTERS[1]),
+    'start periodic': (DrvCanCmdTypeE.START_PERIODIC, DrvCanPeriodicC(0x031, 1, 2, 100, 1)),
+    'modify periodic': (DrvCanCmdTypeE.MODIFY_PERIODIC, DrvCanPeriodicC(0x031, 1, 3, 200)),
+    'stop periodic': (DrvCanCmdTypeE.STOP_PERIODIC, DrvCanPeriodicC(0x031, 1, 3, 200)),
+    'request': (DrvCanCmdTypeE.REQUEST, _REQUEST),
+    'add filter batch': (DrvCanCmdTypeE.ADD_FILTER_BATCH, _FILTERS),
+    'remove filter batch': (DrvCanCmdTypeE.REMOVE_FILTER_BATCH, _FILTERS),
+    'message batch': (DrvCanCmdTypeE.MESSAGE_BATCH,
+                      [_REQUEST, DrvCanMessageC(0x040, 3, 0x010203, bus= 1)]),
+    'add trigger': (DrvCanCmdTypeE.ADD_TRIGGER,
+                    DrvCanTriggerC(0x03C, 0x7FF, data_mask= 0xFF00000000000001, bus= 1)),
+    'remove trigger': (DrvCanCmdTypeE.REMOVE_TRIGGER, DrvCanTriggerC(0x03C)),
+    'dump record': (DrvCanCmdTypeE.DUMP_RECORD, 'EPC 0x3 in error')}
+
+#######################            FUNCTIONS             #######################
+def _fields(data: object) -> object:
+    """Fields of the data, comparable between the data sent and the data decoded.
+    """
+    if isinstance(data, (list, tuple)):
+        return [_fields(item) for item in data]
+    if hasattr(data, '__dict__') and not isinstance(data, Enum):
+        return {name: _fields(value) for name, value in vars(data).items()}
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    return data
+
+def _run_lanes(event_driven: bool, control_priority: DrvCanPriorityE) -> List[int]:
+    """Fill the TX channel with bulk requests, send a control frame and start the node.
+
+    Args:
+        event_driven (bool): Run the node in event driven mode.
+        control_priority (DrvCanPriorityE): Priority of the control frame.
+
+    Returns:
+        List[int]: Ids of the frames in the order they were sent to the bus.
+    """
+    working_flag = Event()
+    working_flag.set()
+    node = DrvCanNodeC(working_flag= working_flag, tx_buffer_size= _TX_BUFFER_SIZE,
+                       cycle_period= _NODE_PERIOD, event_driven= event_driven, stats_period= 0,
+                       bus_params= DrvCanBusParamsC(interface= 'virtual', channel= _VIRTUAL_CHAN))
+    tx_chan = DrvCanTxChanC(name= DEFAULT_TX_NAME)
+    peer = ThreadSafeBus(interface= 'virtual', channel= _VIRTUAL_CHAN)
+    try:
+        for i in range(_TX_BUFFER_SIZE - 1):
+            assert tx_chan.send_data_unblocking(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                        DrvCanMessageC(_REQUEST_ADDR, 1, i%5), DrvCanPriorityE.BULK))
+        assert tx_chan.send_data_unblocking(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                        DrvCanMessageC(_CONTROL_ADDR, 8, 0), control_priority))
+        node.start()
+        addrs = []
+        for _ in range(_TX_BUFFER_SIZE):
+            msg = peer.recv(timeout= _RECV_TIMEOUT)
+            assert msg is not None, "Frames lost by the node"
+            addrs.append(msg.arbitration_id)
+    finally:
+        working_flag.clear()
+        if node.is_alive():
+            node.join()
+        tx_chan.terminate()
+        peer.shutdown()
+    return addrs
+
+#######################              TESTS               #######################
+@pytest.mark.parametrize('event_driven', [False, True], ids= ['periodic', 'event driven'])
+def test_control_overtakes_bulk(event_driven: bool) -> None:
+    """A control frame sent after a burst of bulk requests is the first frame in the bus.
+    """
+    addrs = _run_lanes(event_driven, DrvCanPriorityE.CONTROL)
+    assert addrs[0] == _CONTROL_ADDR
+    assert addrs.count(_REQUEST_ADDR) == _TX_BUFFER_SIZE - 1
+
+@pytest.mark.parametrize('event_driven', [False, True], ids= ['periodic', 'event driven'])
+def test_bulk_keeps_order(event_driven: bool) -> None:
+    """A frame sent with the priority of the bulk requests waits behind them.
+    """
+    addrs = _run_lanes(event_driven, DrvCanPriorityE.BULK)
+    assert addrs[-1] == _CONTROL_ADDR
+
+def test_bulk_lane_full() -> None:
+    """A full bulk lane does not block the control and configuration commands.
+    """
+    tx_chan = DrvCanTxChanC(name= DEFAULT_TX_NAME+'_TEST_FULL', max_msg= 2)
+    try:
+        request = DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE, DrvCanMessageC(_REQUEST_ADDR, 1, 0),
+                                 DrvCanPriorityE.BULK)
+        assert tx_chan.send_data_unblocking(request)
+        assert tx_chan.send_data_unblocking(request)
+        assert not tx_chan.send_data_unblocking(request)
+        for priority in (DrvCanPriorityE.CONFIG, DrvCanPriorityE.CONTROL):
+            assert tx_chan.send_data_unblocking(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                                                DrvCanMessageC(_CONTROL_ADDR, 8, 0), priority))
+        assert tx_chan.receive_data_unblocking().priority is DrvCanPriorityE.CONTROL
+        assert tx_chan.receive_data_unblocking().priority is DrvCanPriorityE.CONFIG
+        assert tx_chan.receive_data_unblocking().priority is DrvCanPriorityE.BULK
+        assert tx_chan.depth == 1
+    finally:
+        tx_chan.terminate()
+
+@pytest.mark.parametrize('priority', list(DrvCanPriorityE), ids= lambda prio: prio.name)
+@pytest.mark.parametrize('name', list(_COMMANDS))
+def test_command_round_trip(name: str, priority: DrvCanPriorityE) -> None:
+    """Each command is decoded with the same fields and priority it was sent with.
+    """
+    cmd_type, payload = _COMMANDS[name]
+    command = DrvCanCmdDataC(cmd_type, payload, priority)
+    encoded = encode_can_data(command)
+    if encoded is None:
+        encoded = dumps(command, protocol= HIGHEST_PROTOCOL)
+    decoded = decode_can_data(encoded)
+    assert isinstance(decoded, DrvCanCmdDataC)
+    assert decoded.priority is priority
+    assert _fields(decoded) == _fields(command)
+
+def test_binary_layouts() -> None:
+    """The messages and the commands with a fixed layout are not pickled.
+    """
+    pickled = {DrvCanCmdTypeE.DUMP_RECORD}
+    for cmd_type, payload in _COMMANDS.values():
+        encoded = encode_can_data(DrvCanCmdDataC(cmd_type, payload))
+        assert (encoded is None) == (cmd_type in pickled), cmd_type
+    assert encode_can_data(DrvCanMessageC(0x030, 1, 0)) is not None
+    # Masks longer than the payload of a frame do not fit in the layout of the trigger
+    assert encode_can_data(DrvCanCmdDataC(DrvCanCmdTypeE.ADD_TRIGGER,
+                                          DrvCanTriggerC(0x03C, data_mask= 1 << 64))) is None
+
+def test_batch_split() -> None:
+    """The batches longer than the messages of the channel are sent in order as several batches,
+    and an item that does not fit in any raises ValueError.
+    """
+    chan = DrvCanTxChanC(name= DEFAULT_TX_NAME+'_TEST_SPLIT', max_msg= 100)
+    try:
+        requests = [DrvCanRequestC(0x031, 1, i%5, 0x03A, 'RESP_CAN_EPC0x30', 300, req_id= i)
+                    for i in range(300)]
+        chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE_BATCH, requests,
+                                      DrvCanPriorityE.BULK))
+        assert chan.depth > 1
+        received = []
+        while (batch := chan.receive_data_unblocking()) is not None:
+            assert batch.data_type is DrvCanCmdTypeE.MESSAGE_BATCH
+            assert batch.priority is DrvCanPriorityE.BULK
+            received.extend(batch.payload)
+        assert _fields(received) == _fields(requests)
+        # Without room for all the batches, none of them is sent
+        for _ in range(chan.bulk.max_messages - 1):
+            assert chan.send_data_unblocking(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                                DrvCanMessageC(_REQUEST_ADDR, 1, 0), DrvCanPriorityE.BULK))
+        assert not chan.send_data_unblocking(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE_BATCH,
+                                                requests, DrvCanPriorityE.BULK))
+        assert chan.depth == chan.bulk.max_messages - 1
+        while chan.receive_data_unblocking() is not None:
+            pass
+        with pytest.raises(ValueError):
+            chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.ADD_FILTER_BATCH,
+                                          [DrvCanFilterC(0x030, 0x7F0, 'R'*240)]))
+        assert chan.depth == 0
+    finally:
+        chan.terminate()
+
+def test_pickled_command_priority() -> None:
+    """Pickled commands keep their priority, and the ones without it are not downgraded.
+    """
+    command = DrvCanCmdDataC(DrvCanCmdTypeE.DUMP_RECORD, 'reason', DrvCanPriorityE.CONTROL)
+    assert decode_can_data(dumps(command)).priority is DrvCanPriorityE.CONTROL
+    del command.priority
+    assert not hasattr(decode_can_data(dumps(command)), 'priority')
+
+@pytest.mark.parametrize('message', [DrvCanMessageC(0x03C, 6, 0x0FA01F4013880, _TIMESTAMP, 1),
+                                     DrvCanMessageC(0x7FF, 0, b'', _TIMESTAMP)],
+                         ids= ['message', 'empty message'])
+def test_message_round_trip(message: DrvCanMessageC) -> None:
+    """The messages are decoded with the same fields.
+    """
+    assert _fields(decode_can_data(encode_can_data(message))) == _fields(message)
+
+@pytest.mark.parametrize('response', [
+        DrvCanResponseC(7, DrvCanMessageC(0x03A, 8, 0x1122334455667788, _TIMESTAMP, 1), 0.002),
+        DrvCanResponseC(8, None, 0.3)], ids= ['response', 'timed out response'])
+def test_response_round_trip(response: DrvCanResponseC) -> None:
+    """The responses of the requests are decoded with the same fields.
+    """
+    assert _fields(decode_can_data(encode_can_data(response))) == _fields(response)
+
+@pytest.mark.parametrize('event_driven', [False, True], ids= ['periodic', 'event driven'])
+def test_malformed_command(event_driven: bool) -> None:
+    """A command that can not be decoded is discarded and the next ones are still applied.
+    """
+    working_flag = Event()
+    working_flag.set()
+    node = DrvCanNodeC(working_flag= working_flag, cycle_period= _NODE_PERIOD,
+                       event_driven= event_driven, stats_period= 0,
+                       bus_params= DrvCanBusParamsC(interface= 'virtual', channel= _VIRTUAL_CHAN))
+    tx_chan = DrvCanTxChanC(name= DEFAULT_TX_NAME)
+    peer = ThreadSafeBus(interface= 'virtual', channel= _VIRTUAL_CHAN)
+    node.start()
+    try:
+        # Tag of a message truncated, read before the message
+        tx_chan.send(b'\x01\x00', priority= DrvCanPriorityE.CONTROL.value)
+        tx_chan.send_data(DrvCanCmdDataC(DrvCanCmdTypeE.MESSAGE,
+                                         DrvCanMessageC(_CONTROL_ADDR, 8, 0)))
+        msg = peer.recv(timeout= _RECV_TIMEOUT)
+        assert msg is not None and msg.arbitration_id == _CONTROL_ADDR
+        assert node.is_alive()
+    finally:
+        working_flag.clear()
+        node.join()
+        tx_chan.terminate()
+        peer.shutdown()
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+"""
+Tests of the flight recorder of the CAN node, from the frames recorded to the files written
+when it is triggered.
+Run them from the root of the repository:
+    python -m pytest code/drv_can/tests
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from pathlib import Path
+from time import time
+from typing import List
+
+#######################       THIRD PARTY IMPORTS        #######################
+import pytest
+from can import Message, LogReader
+
+#######################          MODULE IMPORTS          #######################
+from src.can_sniffer import DrvCanRecorderC, DrvCanTriggerC, read_record
+
+######################             CONSTANTS              ######################
+_RECORD_TIME = 5.0 # s
+_N_SLOTS = 16
+_TRIGGER_ADDR = 0x03B
+
+#######################            FUNCTIONS             #######################
+def _frames(now: float) -> List[Message]:
+    """Frames of the last seconds, with each kind of frame the recorder flags.
+    """
+    return [Message(timestamp= now - 1.0, arbitration_id= 0x030, data= b'\x01\x02',
+                    channel= 0),
+            Message(timestamp= now - 0.8, arbitration_id= 0x1ABCDEF0, data= b'\x03',
+                    is_extended_id= True, channel= 1),
+            Message(timestamp= now - 0.6, arbitration_id= 0x031, dlc= 4, is_remote_frame= True,
+                    channel= 0),
+            Message(timestamp= now - 0.4, arbitration_id= 0x040, data= bytes(range(8)),
+                    is_rx= False, channel= 1)]
+
+def _fields(msg: Message) -> tuple:
+    """Fields of a frame kept by the recorder.
+    """
+    return (round(msg.timestamp, 6), msg.arbitration_id, msg.dlc, bytes(msg.data), msg.channel,
+            msg.is_extended_id, msg.is_remote_frame, msg.is_rx)
+
+def _record(recorder: DrvCanRecorderC, now: float) -> List[Message]:
+    """Record an old frame, the frames of the last seconds and the trigger, and wait for the
+    file.
+
+    Returns:
+        List[Message]: Frames that must be in the file.
+    """
+    recorder.record(Message(timestamp= now - 2 * _RECORD_TIME, arbitration_id= 0x032), 0)
+    frames = _frames(now)
+    for msg in frames:
+        recorder.record(msg, msg.channel, sent= not msg.is_rx)
+    trigger = Message(timestamp= now, arbitration_id= _TRIGGER_ADDR, data= b'\x00\x10',
+                      channel= 0)
+    recorder.record(trigger, 0)
+    recorder.close()
+    return frames + [trigger]
+
+#######################              TESTS               #######################
+def test_dump_round_trip(tmp_path: Path) -> None:
+    """The frames of the last record_time seconds before the trigger are read back from the
+    binary file with the same fields.
+    """
+    recorder = DrvCanRecorderC(record_time= _RECORD_TIME, n_slots= _N_SLOTS, holdoff= 0,
+                               file_path= str(tmp_path / 'record.bin'),
+                               triggers= [DrvCanTriggerC(_TRIGGER_ADDR, data_mask= 0xFF00)])
+    expected = _record(recorder, time())
+    assert recorder.dumps == 1
+    assert [_fields(msg) for msg in read_record(recorder.last_file)] == \
+           [_fields(msg) for msg in expected]
+
+def test_dump_overwritten(tmp_path: Path) -> None:
+    """Only the last n_slots frames are written when more were recorded.
+    """
+    recorder = DrvCanRecorderC(record_time= _RECORD_TIME, n_slots= _N_SLOTS, holdoff= 0,
+                               file_path= str(tmp_path / 'record.bin'))
+    now = time()
+    for index in range(3 * _N_SLOTS):
+        recorder.record(Message(timestamp= now - 1.0 + index * 1e-3, arbitration_id= index,
+                                data= bytes([index])), 0)
+    recorder.dump('test')
+    recorder.close()
+    assert [msg.arbitration_id for msg in read_record(recorder.last_file)] == \
+           list(range(2 * _N_SLOTS, 3 * _N_SLOTS))
+
+def test_dump_python_can_log(tmp_path: Path) -> None:
+    """With other suffixes the file is written by the logger of python-can.
+    """
+    recorder = DrvCanRecorderC(record_time= _RECORD_TIME, n_slots= _N_SLOTS, holdoff= 0,
+                               file_path= str(tmp_path / 'record.asc'),
+                               triggers= [DrvCanTriggerC(_TRIGGER_ADDR)])
+    expected = _record(recorder, time())
+    read = list(LogReader(recorder.last_file))
+    assert [(msg.arbitration_id, bytes(msg.data)) for msg in read] == \
+           [(msg.arbitration_id, bytes(msg.data)) for msg in expected]
+
+def test_read_record_wrong_file(tmp_path: Path) -> None:
+    """A file not written by the recorder is rejected.
+    """
+    file_path = tmp_path / 'other.bin'
+    file_path.write_bytes(b'ABCD\x01\x00\x00\x00\x00')
+    with pytest.raises(ValueError):
+        read_record(str(file_path))
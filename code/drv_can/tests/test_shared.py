@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+"""
+Tests of the shared memory of the CAN node, where the mailbox and the ring buffer deliver the
+messages to the readers of any process.
+Run them from the root of the repository:
+    python -m pytest code/drv_can/tests
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from threading import Event, Thread
+
+#######################          MODULE IMPORTS          #######################
+from src.can_sniffer import DrvCanMessageC, DrvCanMailboxC, DrvCanRingC, DrvCanFilterC
+from src.can_sniffer.can_mailbox import _SLOT_FMT, _SEQ_FMT
+from src.can_sniffer.can_shm import open_shared_memory, close_shared_memory
+
+######################             CONSTANTS              ######################
+_SHM_NAME = 'TEST_CAN_SHM'
+_MAILBOX_NAME = 'TEST_CAN_MAILBOX'
+_RING_NAME = 'TEST_CAN_RING'
+_N_WRITES = 20000
+_RING_SLOTS = 8
+
+#######################            FUNCTIONS             #######################
+def _counter_msg(counter: int, addr: int = 0x030, bus: int = 0) -> DrvCanMessageC:
+    """Message whose timestamp and payload are both derived from a counter, so a message
+    mixed from two writes is detected.
+    """
+    return DrvCanMessageC(addr, 8, bytearray([counter & 0xFF] * 8), float(counter), bus)
+
+def _is_consistent(message: DrvCanMessageC) -> bool:
+    """Check that the payload of a message written by _counter_msg matches its timestamp.
+    """
+    return bytes(message.payload) == bytes([int(message.timestamp) & 0xFF] * 8)
+
+#######################              TESTS               #######################
+def test_shared_memory_resized() -> None:
+    """A shared memory left by a previous node is reused if it has the same size, and created
+    again with the new size otherwise.
+    """
+    left, created = open_shared_memory(_SHM_NAME, 100, True)
+    assert created
+    left.buf[0] = 0xAA
+    left.close()
+    shm = left
+    try:
+        shm, created = open_shared_memory(_SHM_NAME, 100, True)
+        assert not created and shm.buf[0] == 0xAA
+        shm.close()
+        shm, created = open_shared_memory(_SHM_NAME, 300, True)
+        assert created and shm.size == 300 and shm.buf[0] == 0
+    finally:
+        close_shared_memory(shm, True)
+
+def test_mailbox_wrong_bus() -> None:
+    """A message of a bus without slots in the mailbox is dropped, and a mailbox left by a
+    previous node with less buses is created again with all of them.
+    """
+    mailbox = DrvCanMailboxC(_MAILBOX_NAME, create= True, n_buses= 1)
+    try:
+        mailbox.write(DrvCanMessageC(0x030, 1, 0x05, bus= 1))
+        assert mailbox.get_seq(0x030, 0) == 0
+    finally:
+        mailbox.close()
+    left, _ = open_shared_memory(_MAILBOX_NAME, 1, True)
+    left.close()
+    mailbox = DrvCanMailboxC(_MAILBOX_NAME, create= True, n_buses= 2)
+    try:
+        assert mailbox.n_buses == 2
+        mailbox.write(DrvCanMessageC(0x030, 1, 0x05, bus= 1))
+        assert mailbox.read(0x030, 1)[1].bus == 1
+    finally:
+        mailbox.close()
+
+def test_mailbox_slot_being_written() -> None:
+    """A slot whose sequence counter is odd is being written by the node, so the reader
+    retries and gives up without returning a message mixed from two writes.
+    """
+    mailbox = DrvCanMailboxC(_MAILBOX_NAME, create= True)
+    reader = DrvCanMailboxC(_MAILBOX_NAME)
+    try:
+        mailbox.write(_counter_msg(1))
+        seq, message = reader.read(0x030)
+        assert seq == 2 and _is_consistent(message)
+        # The node stopped in the middle of the next write
+        shm, _ = open_shared_memory(_MAILBOX_NAME, 0, False)
+        _SEQ_FMT.pack_into(shm.buf, 0x030 * _SLOT_FMT.size, seq + 1)
+        assert reader.read(0x030) == (seq + 1, None)
+        _SEQ_FMT.pack_into(shm.buf, 0x030 * _SLOT_FMT.size, seq + 2)
+        shm.close()
+        seq, message = reader.read(0x030)
+        assert seq == 4 and _is_consistent(message)
+    finally:
+        reader.close()
+        mailbox.close()
+
+def test_mailbox_concurrent_reads() -> None:
+    """The reader only gets whole messages while the node keeps writing the same slot.
+    """
+    mailbox = DrvCanMailboxC(_MAILBOX_NAME, create= True)
+    reader = DrvCanMailboxC(_MAILBOX_NAME)
+    done = Event()
+    def _write() -> None:
+        for counter in range(1, _N_WRITES + 1):
+            mailbox.write(_counter_msg(counter))
+        done.set()
+    writer = Thread(target= _write)
+    try:
+        writer.start()
+        last_seq = 0
+        while not done.is_set():
+            seq, message = reader.read(0x030)
+            if message is not None:
+                assert _is_consistent(message)
+                assert seq >= last_seq
+                last_seq = seq
+        writer.join()
+        seq, message = reader.read(0x030)
+        assert seq == 2 * _N_WRITES and message.timestamp == _N_WRITES
+    finally:
+        writer.join()
+        reader.close()
+        mailbox.close()
+
+def test_ring_overrun() -> None:
+    """A reader that falls behind more than the slots of the ring gets the last messages, and
+    counts the overwritten ones as lost.
+    """
+    ring = DrvCanRingC(_RING_NAME, n_slots= _RING_SLOTS, create= True)
+    reader = DrvCanRingC(_RING_NAME)
+    bus_reader = DrvCanRingC(_RING_NAME, filters= [DrvCanFilterC(0x040, 0x7F0, 'RING', bus= 1)])
+    try:
+        assert reader.n_slots == _RING_SLOTS
+        for counter in range(3):
+            ring.write(_counter_msg(counter))
+        assert [msg.timestamp for msg in reader.read()] == [0.0, 1.0, 2.0]
+        # Half of the messages are received in the bus 1
+        n_writes = 3 + 2 * _RING_SLOTS + 4
+        for counter in range(3, n_writes):
+            ring.write(_counter_msg(counter, *((0x041, 1) if counter % 2 else (0x030, 0))))
+        messages = reader.read()
+        assert [msg.timestamp for msg in messages] == \
+               [float(counter) for counter in range(n_writes - _RING_SLOTS, n_writes)]
+        assert all(_is_consistent(msg) for msg in messages)
+        assert reader.lost == n_writes - 3 - _RING_SLOTS
+        assert reader.read() == []
+        # The lost messages are counted whatever the filters of the reader
+        bus_messages = bus_reader.read()
+        assert {(msg.addr, msg.bus) for msg in bus_messages} == {(0x041, 1)}
+        assert len(bus_messages) == _RING_SLOTS // 2
+        assert bus_reader.lost == n_writes - _RING_SLOTS
+    finally:
+        bus_reader.close()
+        reader.close()
+        ring.close()
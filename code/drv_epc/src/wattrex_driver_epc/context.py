@@ -37,7 +37,9 @@ DEFAULT_MAX_MSG : int           = 100 # Max number of allowed message per chan
 DEFAULT_MAX_MESSAGE_SIZE : int  = 150 # Size of message sent through IPC message queue
 DEFAULT_TX_CHAN : str           = 'TX_CAN' # Name of the TX channel in CAN
 DEFAULT_RX_CHAN: str            = 'RX_CAN_EPC'  #Name of the RX channel for epc
+DEFAULT_RESP_CHAN: str          = 'RESP_CAN_EPC' # Name of the channel of the responses for epc
 DEFAULT_MAX_READS: int          = 3000 # Max number of reads to get data
+DEFAULT_KEEPALIVE_PERIOD: int   = 100 # Period in ms of the keepalive requests of set_keepalive
 
 
 CONSTANTS_NAMES = ('DEFAULT_MAX_HS_VOLT', 'DEFAULT_MIN_HS_VOLT',
@@ -46,7 +48,7 @@ CONSTANTS_NAMES = ('DEFAULT_MAX_HS_VOLT', 'DEFAULT_MIN_HS_VOLT',
                    'DEFAULT_MAX_LS_PWR', 'DEFAULT_MIN_LS_PWR',
                    'DEFAULT_MAX_TEMP', 'DEFAULT_MIN_TEMP',
                    'DEFAULT_MAX_MSG', 'DEFAULT_MAX_MESSAGE_SIZE',
-                   'DEFAULT_TX_CHAN', 'DEFAULT_RX_CHAN',
-                   'DEFAULT_MAX_READS')
+                   'DEFAULT_TX_CHAN', 'DEFAULT_RX_CHAN', 'DEFAULT_RESP_CHAN',
+                   'DEFAULT_MAX_READS', 'DEFAULT_KEEPALIVE_PERIOD')
 sys_conf_update_config_params(context=globals(),
                               constants_names=CONSTANTS_NAMES)
@@ -249,22 +249,27 @@ class DrvEpcDataElectC:
     """
     Data that stores power measurements
     """
-    def __init__(self, ls_voltage: int|None = None, ls_current: int|None = None,
-                ls_power: int|None = None, hs_voltage: int|None = None) -> None:
+    def __init__(self, ls_voltage: int|None = None, ls_current: int|None = None, # pylint: disable= too-many-arguments
+                ls_power: int|None = None, hs_voltage: int|None = None,
+                elect_timestamp: float = 0.0) -> None:
         self.ls_voltage = ls_voltage
         self.ls_current = ls_current
         self.ls_power = ls_power
         self.hs_voltage = hs_voltage
+        # Time when the CAN interface received the measures, 0 if they have not been received
+        self.elect_timestamp: float = elect_timestamp
 
 class DrvEpcDataTempC:
     """
     Data that stores temp measurements
     """
     def __init__(self, temp_body: int|None = None, temp_amb: int|None = None,
-                 temp_anod: int|None = None) -> None:
+                 temp_anod: int|None = None, temp_timestamp: float = 0.0) -> None:
         self.temp_body = temp_body
         self.temp_amb = temp_amb
         self.temp_anod = temp_anod
+        # Time when the CAN interface received the measures, 0 if they have not been received
+        self.temp_timestamp: float = temp_timestamp
 
 class DrvEpcDataCtrlC:
     """
@@ -291,3 +296,5 @@ class DrvEpcDataC(DrvEpcDataElectC, # pylint: disable= too-many-instance-attribu
         DrvEpcDataTempC.__init__(self, temp_body, temp_amb, temp_anod)
         DrvEpcDataCtrlC.__init__(self, mode)
         self.status = status
+        # Time when the CAN interface received the last message that updated the data
+        self.timestamp: float = 0.0
@@ -0,0 +1,259 @@
+#!/usr/bin/python3
+"""
+This module decodes the messages received from the epc devices and updates their live data and
+properties.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+
+#######################         GENERIC IMPORTS          #######################
+from enum import Enum
+from functools import partial
+from logging import DEBUG
+from struct import Struct
+from typing import Callable, List, Set, Tuple
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import SysLogLoggerC, sys_log_logger_get_module_logger
+if __name__ == '__main__':
+    cycler_logger = SysLogLoggerC()
+log = sys_log_logger_get_module_logger(__name__)
+
+#######################       THIRD PARTY IMPORTS        #######################
+from bitarray.util import ba2int, int2ba
+from can_sniffer import DrvCanMessageC
+
+#######################          MODULE IMPORTS          #######################
+from .drv_epc_common import (DrvEpcDataC, DrvEpcPropertiesC, DrvEpcStatusC, DrvEpcLimitE,
+                             DrvEpcModeE, EpcConstC)
+#######################          PROJECT IMPORTS         #######################
+
+######################             CONSTANTS              ######################
+_PAYLOAD_SIZE: int = 8 # Bytes of the payload of the messages, the shorter ones are padded
+_MSG_TYPE_MASK: int = 0x00F # Bits of the id with the type of message
+# Layouts of the payloads, little endian as sent by the device
+_MODE_FMT = Struct('<Bxhi') # flags, reference, limit reference
+_LIMITS_FMT = Struct('<HH') # max, min
+_SIGNED_LIMITS_FMT = Struct('<hh') # max, min
+_ELEC_FMT = Struct('<HhI') # ls voltage, ls current, hs voltage
+_TEMP_FMT = Struct('<hhh') # body, anode, ambient
+# Error flags of the status register
+_STATUS_ERRORS: Tuple[str, ...] = ("HS voltage error", "LS voltage error", "LS current error",
+                                   "Communication error", "Temperature error", "Internal error")
+#######################              ENUMS               #######################
+
+class _EpcMsgTypeE(Enum):
+    """
+    Internal class for the message type epc.
+    """
+    MODE = 0x0
+    REQUEST = 0x1
+    LS_VOLT_LIM = 0x2
+    LS_CURR_LIM = 0x3
+    HS_VOLT_LIM = 0x4
+    LS_PWR_LIM = 0x5
+    TEMP_LIM = 0x6
+    PERIODIC = 0x7
+    INFO = 0xA
+    STATUS = 0xB
+    ELEC_MEAS = 0xC
+    TEMP_MEAS = 0xD
+
+# Messages that update the live data
+_LIVE_DATA_MSGS: Tuple[int, ...] = (_EpcMsgTypeE.MODE.value, _EpcMsgTypeE.STATUS.value,
+                                    _EpcMsgTypeE.ELEC_MEAS.value, _EpcMsgTypeE.TEMP_MEAS.value)
+# Periodic measures, whose last one replaces all the previous ones until the next info message
+_SUPERSEDED_MSGS: Tuple[int, ...] = (_EpcMsgTypeE.ELEC_MEAS.value, _EpcMsgTypeE.TEMP_MEAS.value)
+
+#######################             CLASSES              #######################
+class DrvEpcDecoderC:
+    """Decoder of the messages of an epc device. The payloads are read with precompiled struct
+    layouts and integer masks, and each type of message has its decoder in a table indexed by
+    the type, so decoding a message is a lookup and a single unpack.
+    """
+    def __init__(self, live_data: DrvEpcDataC, properties: DrvEpcPropertiesC) -> None:
+        '''
+        Build the table of decoders of the device.
+
+        Args:
+            live_data (DrvEpcDataC): Live data of the device updated by the messages.
+            properties (DrvEpcPropertiesC): Properties of the device updated by the messages.
+        '''
+        self.__live_data: DrvEpcDataC = live_data
+        self.__properties: DrvEpcPropertiesC = properties
+        # Decoder of each type of message, None for the types the device does not send
+        self.__decoders: List[Callable[[DrvCanMessageC, bytes], None]|None] = \
+            [None] * (_MSG_TYPE_MASK + 1)
+        for msg_type, decoder in (
+                (_EpcMsgTypeE.MODE, self.__decode_mode),
+                (_EpcMsgTypeE.REQUEST, self.__decode_request),
+                (_EpcMsgTypeE.LS_VOLT_LIM, partial(self.__decode_limits, 'ls_volt_limit',
+                                                   _LIMITS_FMT, 'LS Voltage', 'mV')),
+                (_EpcMsgTypeE.LS_CURR_LIM, partial(self.__decode_limits, 'ls_curr_limit',
+                                                   _SIGNED_LIMITS_FMT, 'LS Current', 'mA')),
+                (_EpcMsgTypeE.HS_VOLT_LIM, partial(self.__decode_limits, 'hs_volt_limit',
+                                                   _LIMITS_FMT, 'HS Voltage', 'mV')),
+                (_EpcMsgTypeE.LS_PWR_LIM, partial(self.__decode_limits, 'ls_pwr_limit',
+                                                  _SIGNED_LIMITS_FMT, 'LS Power', 'dW')),
+                (_EpcMsgTypeE.TEMP_LIM, partial(self.__decode_limits, 'temp_limit',
+                                                _SIGNED_LIMITS_FMT, 'Temperature', 'dºC')),
+                (_EpcMsgTypeE.PERIODIC, self.__decode_periodic),
+                (_EpcMsgTypeE.INFO, self.__decode_info),
+                (_EpcMsgTypeE.STATUS, self.__decode_status),
+                (_EpcMsgTypeE.ELEC_MEAS, self.__decode_elec),
+                (_EpcMsgTypeE.TEMP_MEAS, self.__decode_temp)):
+            self.__decoders[msg_type.value] = decoder
+        # Sensors of temperature of the hardware version, body, anode and ambient.
+        # They are computed again only when the hardware version changes.
+        self.__hw_version = None
+        self.__temp_sensors: Tuple[bool, bool, bool] = (False, False, False)
+
+    def decode(self, msg: DrvCanMessageC) -> None:
+        '''Update the live data or the properties with a message of the device.
+
+        Args:
+            msg (DrvCanMessageC): Message received from the device.
+        '''
+        msg_id = msg.addr & _MSG_TYPE_MASK
+        decoder = self.__decoders[msg_id]
+        if decoder is None:
+            log.error(f"The id of the message can not be interpreted by the epc {hex(msg_id)}")
+        else:
+            if msg_id in _LIVE_DATA_MSGS:
+                self.__live_data.timestamp = max(self.__live_data.timestamp, msg.timestamp)
+            decoder(msg, msg.payload.ljust(_PAYLOAD_SIZE, b'\x00'))
+
+    def decode_batch(self, msgs: List[DrvCanMessageC]) -> None:
+        '''Update the live data and the properties with the messages received since the last
+        update, in order. Of the periodic measures only the last one of each type before the
+        next info message is decoded, as the info message changes the sensors of temperature
+        of the device. The rest of messages are rare and are all decoded.
+
+        Args:
+            msgs (List[DrvCanMessageC]): Messages received from the device, from the oldest.
+        '''
+        skip: List[bool] = [False] * len(msgs)
+        later: Set[int] = set() # Measures received after each message and before an info one
+        for index in range(len(msgs) - 1, -1, -1):
+            msg_id = msgs[index].addr & _MSG_TYPE_MASK
+            if msg_id == _EpcMsgTypeE.INFO.value:
+                later.clear()
+            elif msg_id in _SUPERSEDED_MSGS:
+                skip[index] = msg_id in later
+                later.add(msg_id)
+        for msg, skipped in zip(msgs, skip):
+            if not skipped:
+                self.decode(msg)
+
+    def __decode_mode(self, _: DrvCanMessageC, payload: bytes) -> None:
+        '''Mode, output enable in bit 0, mode in bits 1-3 and type of limit in bits 4-5,
+        followed by the reference and the limit reference.
+        '''
+        flags, ref, lim_ref = _MODE_FMT.unpack_from(payload)
+        self.__live_data.mode = DrvEpcModeE((flags >> 1) & 0x7)
+        self.__live_data.lim_mode = DrvEpcLimitE((flags >> 4) & 0x3)
+        self.__live_data.ref = ref
+        self.__live_data.lim_ref = lim_ref
+
+    def __decode_request(self, _: DrvCanMessageC, payload: bytes) -> None:
+        '''The device only sends a request back when it has a format error.
+        '''
+        log.error(("The message send to request data has a format error, "
+                   f"receive {hex(int.from_bytes(payload, 'little'))}"))
+
+    def __decode_limits(self, attr: str, layout: Struct, name: str, unit: str, # pylint: disable= too-many-arguments
+                        _: DrvCanMessageC, payload: bytes) -> None:
+        '''Limits of a magnitude, max followed by min.
+
+        Args:
+            attr (str): Name of the limits in the properties.
+            layout (Struct): Layout of the limits, signed or unsigned.
+            name (str): Name of the magnitude, for the log.
+            unit (str): Unit of the magnitude, for the log.
+        '''
+        limits = getattr(self.__properties, attr)
+        limits.max, limits.min = layout.unpack_from(payload)
+        log.info(f"{name} limits are Max:{limits.max} {unit} Min: {limits.min} {unit}")
+
+    def __decode_periodic(self, _: DrvCanMessageC, payload: bytes) -> None:
+        '''Configuration of the periodic messages, only logged.
+        '''
+        value = int.from_bytes(payload, 'little')
+        log.info(f"Enable user ACK: {value & 0x1}")
+        log.info(f"Period user ACK: {(value >> 1) & 0x7FFF}")
+        log.info(f"Enable periodic electric meas: {(value >> 16) & 0x1}")
+        log.info(f"Period periodic electric meas: {(value >> 16) & 0xFFFF}")
+        log.info(f"Enable periodic temp meas: {(value >> 32) & 0x1}")
+        log.info(f"Period periodic temp meas: {value >> 32}")
+
+    def __decode_info(self, _: DrvCanMessageC, payload: bytes) -> None:
+        '''Info of the device, can id in bits 0-5, fw version in bits 6-10, hw version in
+        bits 11-23 and serial number in bits 24-31.
+        '''
+        value = int.from_bytes(payload, 'little')
+        can_id = value & 0x3F
+        self.__properties.can_id = can_id << 4
+        log.info(f"Device ID: {can_id}")
+        fw_ver = (value >> 6) & 0x1F
+        self.__properties.sw_version = fw_ver
+        log.info(f"Device fw version: {fw_ver}")
+        # The hw version is kept as a bitarray, as in the properties built by the user
+        hw_ver = (value >> 11) & 0x1FFF
+        self.__properties.hw_version = int2ba(hw_ver, length=13, endian='little')
+        log.info(f"Device hw version: {hw_ver}")
+        self.__properties.serial_number = str((value >> 24) & 0xFF)
+
+    def __decode_status(self, _: DrvCanMessageC, payload: bytes) -> None:
+        '''Status register, error flags in bits 0-5 followed by the last error raised.
+        '''
+        value = int.from_bytes(payload, 'little')
+        error = value & 0x3F
+        self.__live_data.status = DrvEpcStatusC(error)
+        if error > 0:
+            for bit, error_name in enumerate(_STATUS_ERRORS):
+                if error & (1 << bit):
+                    log.error(error_name)
+            log.error(f"Last rised error: {value >> 6}")
+
+    def __decode_elec(self, msg: DrvCanMessageC, payload: bytes) -> None:
+        '''Electrical measures, ls voltage, ls current and hs voltage. The power is obtained
+        from the ls voltage and current.
+        '''
+        volt, curr, hs_volt = _ELEC_FMT.unpack_from(payload)
+        live_data = self.__live_data
+        live_data.ls_voltage = volt
+        live_data.ls_current = curr
+        live_data.hs_voltage = hs_volt
+        live_data.ls_power = int(curr * volt / EpcConstC.TO_DECI_WATS)
+        live_data.elect_timestamp = msg.timestamp
+        if log.isEnabledFor(DEBUG):
+            log.debug((f"LS Voltage [mV]: {volt} LS Current [mA]: {curr} "
+                       f"HS Voltage [mV]: {hs_volt} LS Power [dW]: {live_data.ls_power}"))
+
+    def __decode_temp(self, msg: DrvCanMessageC, payload: bytes) -> None:
+        '''Temperature measures, body, anode and ambient. Only the sensors the hardware version
+        has are updated.
+        '''
+        if self.__properties.hw_version is not self.__hw_version:
+            self.__update_temp_sensors()
+        body, anod, amb = _TEMP_FMT.unpack_from(payload)
+        has_body, has_anod, has_amb = self.__temp_sensors
+        live_data = self.__live_data
+        if has_body:
+            live_data.temp_body = body
+        if has_anod:
+            live_data.temp_anod = anod
+        if has_amb:
+            live_data.temp_amb = amb
+        live_data.temp_timestamp = msg.timestamp
+        if log.isEnabledFor(DEBUG):
+            log.debug((f"Temperature [dºC] body: {live_data.temp_body} "
+                       f"anode: {live_data.temp_anod} ambient: {live_data.temp_amb}"))
+
+    def __update_temp_sensors(self) -> None:
+        '''Compute the sensors of temperature of the hardware version, bit 9 for the body,
+        bits 7-8 for the anode and bit 10 for the ambient.
+        '''
+        self.__hw_version = self.__properties.hw_version
+        hw_ver = ba2int(self.__hw_version)
+        self.__temp_sensors = (bool(hw_ver & (1 << 9)), bool(hw_ver & (0x3 << 7)),
+                               bool(hw_ver & (1 << 10)))
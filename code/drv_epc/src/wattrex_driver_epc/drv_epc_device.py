@@ -8,232 +8,157 @@ the device and request info from it.
 from __future__ import annotations
 
 #######################         GENERIC IMPORTS          #######################
-from enum import Enum
+from time import time
+from typing import Dict, List, Tuple
 #######################    SYSTEM ABSTRACTION IMPORTS    #######################
 from system_logger_tool import SysLogLoggerC, sys_log_logger_get_module_logger
 if __name__ == '__main__':
     cycler_logger = SysLogLoggerC()
 log = sys_log_logger_get_module_logger(__name__)
-from system_shared_tool import SysShdIpcChanC
 
 #######################       THIRD PARTY IMPORTS        #######################
 from bitarray.util import ba2int, int2ba
-from can_sniffer import DrvCanMessageC, DrvCanCmdDataC, DrvCanCmdTypeE, DrvCanFilterC
+from can_sniffer import (DrvCanMessageC, DrvCanCmdDataC, DrvCanCmdTypeE, DrvCanFilterC,
+                         DrvCanChanC, DrvCanTxChanC, DrvCanOverflowE, DrvCanPeriodicC,
+                         DrvCanPriorityE, DrvCanRequestC, DrvCanResponseC, DrvCanTriggerC)
 
 #######################          MODULE IMPORTS          #######################
 from .drv_epc_common import (DrvEpcDataC, DrvEpcDataCtrlC, DrvEpcPropertiesC, DrvEpcStatusC,
                 DrvEpcLimitsC, DrvEpcDataTempC, DrvEpcDataElectC, DrvEpcPropInfoC,
                 DrvEpcLimitE, DrvEpcModeE, EpcConstC)
+from .drv_epc_decoder import DrvEpcDecoderC, _EpcMsgTypeE
 #######################          PROJECT IMPORTS         #######################
 
 ######################             CONSTANTS              ######################
 from .context import (DEFAULT_MAX_MSG, DEFAULT_TX_CHAN, DEFAULT_RX_CHAN, DEFAULT_MAX_READS,
-                        DEFAULT_MAX_MESSAGE_SIZE)
+                        DEFAULT_MAX_MESSAGE_SIZE, DEFAULT_RESP_CHAN, DEFAULT_KEEPALIVE_PERIOD)
+_TO_MS: int = 1000 # Conversion from s to ms
+_MIN_KEEPALIVE_PERIOD: int = 20 # Min period in ms of the keepalive, to not saturate the bus
+_STATUS_ERROR_MASK: int = 0x3F # Error flags of the status register
 #######################              ENUMS               #######################
 
-class _EpcMsgTypeE(Enum):
-    """
-    Internal class for the message type epc.
-    """
-    MODE = 0x0
-    REQUEST = 0x1
-    LS_VOLT_LIM = 0x2
-    LS_CURR_LIM = 0x3
-    HS_VOLT_LIM = 0x4
-    LS_PWR_LIM = 0x5
-    TEMP_LIM = 0x6
-    PERIODIC = 0x7
-    INFO = 0xA
-    STATUS = 0xB
-    ELEC_MEAS = 0xC
-    TEMP_MEAS = 0xD
+# Type of the message the device answers to each request of data
+_EPC_RESPONSES: Dict[int, _EpcMsgTypeE] = {0x0: _EpcMsgTypeE.INFO, 0x1: _EpcMsgTypeE.MODE,
+    0x2: _EpcMsgTypeE.STATUS, 0x3: _EpcMsgTypeE.ELEC_MEAS, 0x4: _EpcMsgTypeE.TEMP_MEAS,
+    0x6: _EpcMsgTypeE.LS_VOLT_LIM, 0x7: _EpcMsgTypeE.LS_CURR_LIM, 0x8: _EpcMsgTypeE.HS_VOLT_LIM,
+    0x9: _EpcMsgTypeE.LS_PWR_LIM, 0xA: _EpcMsgTypeE.TEMP_LIM}
+# Requests of data sent by get_data and get_properties when they update the data
+_DATA_REQUESTS: Tuple[int, ...] = (0x3, 0x4, 0x1, 0x2)
+_PROPERTIES_REQUESTS: Tuple[int, ...] = (0x0, 0xA, 0x8, 0x7, 0x9, 0x6)
 
 class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
     """Class to create epc devices with all the properties needed.
 
     """
     def __init__(self, can_id: int) -> None:
-        self.__device_handler: SysShdIpcChanC
-        self.__tx_can = SysShdIpcChanC(DEFAULT_TX_CHAN)
+        self.__device_handler: DrvCanChanC
+        self.__resp_handler: DrvCanChanC
+        self.__tx_can = DrvCanTxChanC(DEFAULT_TX_CHAN)
         self.__live_data : DrvEpcDataC = DrvEpcDataC()
         self.__properties: DrvEpcPropertiesC = DrvEpcPropertiesC(can_id = can_id)
-
-    def __send_to_can(self, type_msg: DrvCanCmdTypeE, msg: DrvCanMessageC|DrvCanFilterC)-> None:
+        # Decoder of the messages of the device, updates the live data and the properties
+        self.__decoder: DrvEpcDecoderC = DrvEpcDecoderC(self.__live_data, self.__properties)
+        # True while the CAN node is sending the keepalive requests of the device
+        self.__keepalive: bool = False
+        # Id of the last request sent waiting for its response
+        self.__req_id: int = 0
+        # Max round trip time in seconds of the requests of the last blocking call
+        self.round_trip: float = 0.0
+
+    def __send_to_can(self, type_msg: DrvCanCmdTypeE,
+                      msg: DrvCanMessageC|DrvCanFilterC|DrvCanPeriodicC|DrvCanRequestC|
+                           List[DrvCanMessageC]|DrvCanTriggerC,
+                      priority: DrvCanPriorityE = DrvCanPriorityE.CONFIG)-> None:
         """Send a message to the CAN transmission queue.
 
         Args:
             msg (DrvCanMessageC): [Message to be send]
+            priority (DrvCanPriorityE, optional): [Priority of the command in the CAN node,
+                CONTROL for the mode changes and BULK for the requests of data].
+                Defaults to DrvCanPriorityE.CONFIG.
         """
-        cmd = DrvCanCmdDataC(type_msg, msg)
+        cmd = DrvCanCmdDataC(type_msg, msg, priority)
         self.__tx_can.send_data(cmd)
 
-    def read_can_buffer( # pylint: disable= too-many-statements, too-many-branches, too-many-locals
-            self):
+    def __status_trigger(self) -> DrvCanTriggerC:
+        """Trigger of the flight recorder of the CAN node for the status messages of the
+        device with any error flag set.
+
+        Returns:
+            DrvCanTriggerC: [Trigger of the status register]
+        """
+        return DrvCanTriggerC(addr= self.__properties.can_id | _EpcMsgTypeE.STATUS.value,
+                              data_mask= _STATUS_ERROR_MASK)
+
+    def __request_data(self, data_reqs: Tuple[int, ...]) -> None:
+        """Request data to the device without waiting the answers, sending all the requests
+        in a single command.
+
+        Args:
+            data_reqs (Tuple[int, ...]): [Codes of the data requested]
+        """
+        id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
+        msgs = [DrvCanMessageC(addr= id_msg, size= 1, payload= data_req)
+                for data_req in data_reqs]
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE_BATCH, msgs, DrvCanPriorityE.BULK)
+
+    def __request_sync(self, data_reqs: Tuple[int, ...], timeout: float) -> None:
+        """Request data to the device and wait until it answers every request, then update
+        the attributes with the data received.
+
+        Args:
+            data_reqs (Tuple[int, ...]): [Codes of the data requested]
+            timeout (float): [Max time in seconds to wait all the responses]
+
+        Raises:
+            TimeoutError: Raised when the device does not answer any request in time.
+        """
+        deadline = time() + timeout
+        pending: Dict[int, int] = {}
+        requests: List[DrvCanRequestC] = []
+        for data_req in data_reqs:
+            self.__req_id = (self.__req_id + 1) & 0xFFFFFFFF
+            pending[self.__req_id] = data_req
+            requests.append(DrvCanRequestC(
+                addr= self.__properties.can_id | _EpcMsgTypeE.REQUEST.value,
+                size= 1, payload= data_req,
+                resp_addr= self.__properties.can_id | _EPC_RESPONSES[data_req].value,
+                chan_name= DEFAULT_RESP_CHAN+hex(self.__properties.can_id),
+                timeout= int(timeout * _TO_MS), req_id= self.__req_id))
+        # All the requests are sent in a single command
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE_BATCH, requests, DrvCanPriorityE.BULK)
+        self.round_trip = 0.0
+        missing = []
+        while len(pending) > 0:
+            response: DrvCanResponseC|None
+            response = self.__resp_handler.wait_data(deadline - time()) # type: ignore
+            if response is None:
+                break
+            # Responses of previous calls that arrived after their deadline are discarded
+            data_req = pending.pop(response.req_id, None)
+            if data_req is not None and response.timed_out:
+                missing.append(data_req)
+            elif data_req is not None:
+                self.round_trip = max(self.round_trip, response.round_trip)
+        missing.extend(pending.values())
+        # The responses are also sent to the channel of the device before the node answers
+        self.read_can_buffer()
+        if len(missing) > 0:
+            log.error(f"The device {hex(self.__properties.can_id)} did not answer the "+
+                      f"requests {missing} in {timeout} s")
+            raise TimeoutError(f"The device {hex(self.__properties.can_id)} did not answer "+
+                               f"the requests {missing} in {timeout} s")
+
+    def read_can_buffer(self):
         """Receive data from the device .
         """
-        if self.__device_handler.is_empty():
+        # Drain the can queue of the device, a call to the queue per message, and update the
+        # data with the last measure of each type
+        msgs = self.__device_handler.drain_data(DEFAULT_MAX_READS)
+        if len(msgs) == 0:
             log.debug("The device doesn`t have any message to read")
         else:
-            i=0
-            while not self.__device_handler.is_empty() and i<=DEFAULT_MAX_READS:
-                i = i+1
-                # Read a message from the can queue of the device
-                msg: DrvCanMessageC = self.__device_handler.receive_data()
-                # Get the message id and transform the data to bitarray
-                msg_id= msg.addr & 0x00F
-                msg_bits = int2ba(int.from_bytes(msg.payload,'little'),length=64, endian='little')
-                #------   0xYY0 EPC mode   ------
-                if msg_id == _EpcMsgTypeE.MODE.value:
-                    # The message has in the first 4 bits if the output is enable and the mode
-                    self.__live_data.mode = DrvEpcModeE(ba2int(msg_bits[1:4],signed=False))
-                    #The next 3 bits corresponds to the type of limit
-                    self.__live_data.lim_mode = DrvEpcLimitE(ba2int(msg_bits[4:6],signed=False))
-                    # From the bit 16 to the 32 correspond to the mode reference
-                    self.__live_data.ref = ba2int(
-                        msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD],
-                        signed=True)
-                    # From the bit 32 forwards is the reference for the limit
-                    self.__live_data.lim_ref = ba2int(msg_bits[EpcConstC.MID_SIDE_BITFIELD:],
-                                                      signed=True)
-                #------   0xYY1 EPC request  ------
-                elif msg_id == _EpcMsgTypeE.REQUEST.value:
-                    log.error(("The message send to request data has a format error, "
-                               f"receive {hex(ba2int(msg_bits))}"))
-                #------   0xYY2 EPC LS Voltage Limits  ------
-                elif msg_id == _EpcMsgTypeE.LS_VOLT_LIM.value:
-                    self.__properties.ls_volt_limit.max = ba2int(
-                        msg_bits[:EpcConstC.LOW_SIDE_BITFIELD])
-                    self.__properties.ls_volt_limit.min = ba2int(
-                        msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD])
-                    log.info((f"LS Voltage limits are Max:{self.__properties.ls_volt_limit.max} mV"
-                            f" Min: {self.__properties.ls_volt_limit.min} mV"))
-                #------   0xYY3 EPC LS Current Limits  ------
-                elif msg_id == _EpcMsgTypeE.LS_CURR_LIM.value:
-                    max_curr = ba2int(msg_bits[:EpcConstC.LOW_SIDE_BITFIELD],signed=True)
-                    min_curr = ba2int(
-                        msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD],
-                        signed=True)
-                    self.__properties.ls_curr_limit.max = max_curr
-                    self.__properties.ls_curr_limit.min = min_curr
-                    log.info(f"LS Current limits are Max:{max_curr} mA Min: {min_curr} mA")
-                #------   0xYY4 EPC HS Voltage Limits  ------
-                elif msg_id == _EpcMsgTypeE.HS_VOLT_LIM.value:
-                    self.__properties.hs_volt_limit.max = ba2int(
-                        msg_bits[:EpcConstC.LOW_SIDE_BITFIELD])
-                    self.__properties.hs_volt_limit.min = ba2int(
-                        msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD])
-                    log.info((f"HS Voltage limits are Max:{self.__properties.hs_volt_limit.max} mV "
-                            f" Min: {self.__properties.hs_volt_limit.min} mV"))
-                #------   0xYY5 EPC LS Power Limits  ------
-                elif msg_id == _EpcMsgTypeE.LS_PWR_LIM.value:
-                    max_pwr = ba2int(msg_bits[:EpcConstC.LOW_SIDE_BITFIELD],signed=True)
-                    min_pwr = ba2int(
-                        msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD],
-                        signed=True)
-                    self.__properties.ls_pwr_limit.max = max_pwr
-                    self.__properties.ls_pwr_limit.min = min_pwr
-                    log.info(f"LS Power limits are Max:{max_pwr} dW "+ \
-                            f"Min: {min_pwr} dW")
-                #------   0xYY6 EPC Temperature Limits  ------
-                elif msg_id == _EpcMsgTypeE.TEMP_LIM.value:
-                    max_temp = ba2int(msg_bits[:EpcConstC.LOW_SIDE_BITFIELD],signed=True)
-                    min_temp = ba2int(
-                        msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD],
-                                      signed=True)
-                    self.__properties.temp_limit.max = max_temp
-                    self.__properties.temp_limit.min = min_temp
-                    log.info(f"Temperature limits are Max:{max_temp} dºC "+ \
-                            f"Min: {min_temp} dºC")
-                #------   0xYY7 EPC Response Configuration  ------
-                elif msg_id == _EpcMsgTypeE.PERIODIC.value:
-                    log.info(f"Enable user ACK: {msg_bits[0]}")
-                    log.info(f"Period user ACK: {ba2int(msg_bits[1:EpcConstC.LOW_SIDE_BITFIELD])}")
-                    en_elect = msg_bits[EpcConstC.LOW_SIDE_BITFIELD]
-                    log.info(f"Enable periodic electric meas: {en_elect}")
-                    prd_elec = ba2int(
-                        msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD])
-                    log.info(f"Period periodic electric meas: {prd_elec}")
-                    en_temp = msg_bits[EpcConstC.MID_SIDE_BITFIELD]
-                    log.info(f"Enable periodic temp meas: {en_temp}")
-                    prd_temp = ba2int(msg_bits[EpcConstC.MID_SIDE_BITFIELD:])
-                    log.info(f"Period periodic temp meas: {prd_temp}")
-                #------   0xYYA EPC Info details  ------
-                elif msg_id == _EpcMsgTypeE.INFO.value:
-                    # The first 6 bits correspond to the can id
-                    can_id = ba2int(msg_bits[:6])
-                    self.__properties.can_id = can_id << 4
-                    log.info(f"Device ID: {can_id}")
-                    # The next 5 bits correspond to the fw version
-                    fw_ver = ba2int(msg_bits[6:11])
-                    self.__properties.sw_version = fw_ver
-                    log.info(f"Device fw version: {fw_ver}")
-                    # The next 13 bits correspond to the hw version
-                    hw_ver = msg_bits[11:24]
-                    self.__properties.hw_version = hw_ver
-                    log.info(f"Device hw version: {ba2int(hw_ver)}")
-                    # The last bits correspond to the serial number
-                    self.__properties.serial_number = str(ba2int(msg_bits[24:32]))
-                #------   0xYYB EPC Status register  ------
-                elif msg_id == _EpcMsgTypeE.STATUS.value:
-                    # The first 5 bits correspond each one to a different error type
-                    if msg_bits[0] == 1:
-                        log.error("HS voltage error")
-                    if msg_bits[1] == 1:
-                        log.error("LS voltage error")
-                    if msg_bits[2] == 1:
-                        log.error("LS current error")
-                    if msg_bits[3] == 1:
-                        log.error("Communication error")
-                    if msg_bits[4] == 1:
-                        log.error("Temperature error")
-                    if msg_bits[5] == 1:
-                        log.error("Internal error")
-                    # The next bits correspond to the value error given
-                    error = ba2int(msg_bits[:6])
-                    self.__live_data.status= DrvEpcStatusC(error)
-                    if error>0:
-                        log.error(f"Last rised error: {ba2int(msg_bits[6:])}")
-                #------   0xYYC EPC Electrical Measures  ------
-                elif msg_id == _EpcMsgTypeE.ELEC_MEAS.value:
-                    # The electrical measures are codified, been the first 16 bits the ls volt
-                    volt = ba2int(msg_bits[:EpcConstC.LOW_SIDE_BITFIELD])
-                    self.__live_data.ls_voltage = volt
-                    log.info(f"LS Voltage [mV]: {volt}")
-                    # The next 16 bits corresponds to the low side current
-                    curr = ba2int(msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD],
-                                  signed = True)
-                    self.__live_data.ls_current = curr
-                    log.info(f"LS Current [mA]: {curr}")
-                    # Finally the last 16 bits correspond to the high side voltage
-                    hs_volt = ba2int(msg_bits[EpcConstC.MID_SIDE_BITFIELD:])
-                    self.__live_data.hs_voltage = hs_volt
-                    log.info(f"HS Voltage [mV]: {hs_volt}")
-                    # The power is obtained from the measured values of ls current and voltage
-                    power = curr * volt / EpcConstC.TO_DECI_WATS
-                    log.info(f"LS Power [dW]: {power}")
-                    self.__live_data.ls_power = int(power)
-                #------   0xYYD EPC Temperature measures  ------
-                elif msg_id == _EpcMsgTypeE.TEMP_MEAS.value:
-                    # The temperature measures are codified, been the first 16 bits the body temp
-                    if self.__properties.hw_version[9] == 1:
-                        temp_body = ba2int(msg_bits[:EpcConstC.LOW_SIDE_BITFIELD], signed = True)
-                        self.__live_data.temp_body = temp_body
-                        log.info(f"Body temperature [dºC]: {temp_body}")
-                    # The next 16 bits are the temperature in the anode
-                    if ba2int(self.__properties.hw_version[7:9]) != 0:
-                        temp_anod = ba2int(
-                            msg_bits[EpcConstC.LOW_SIDE_BITFIELD:EpcConstC.MID_SIDE_BITFIELD],
-                            signed = True)
-                        self.__live_data.temp_anod = temp_anod
-                        log.info(f"Anode temperature [dºC]: {temp_anod}")
-                    # The last 16 bits are for the ambient temperature
-                    if self.__properties.hw_version[10] == 1:
-                        temp_amb = ba2int(msg_bits[EpcConstC.MID_SIDE_BITFIELD:48], signed = True)
-                        self.__live_data.temp_amb = temp_amb
-                        log.info(f"Ambient temperature [dºC]: {temp_amb}")
-                else:
-                    log.error(f"The id of the message can not \
-                              be interpreted by the epc {hex(msg_id)}")
+            self.__decoder.decode_batch(msgs)
 
     def set_cv_mode(self, ref: int, limit_type: DrvEpcLimitE, limit_ref: int) -> None:
         """Set the CV mode for a specific reference, limit type and limit reference.
@@ -282,7 +207,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         data_msg= union_control(enable= True, mode= DrvEpcModeE.CV_MODE, lim_mode= limit_type,
                                 ref=ref, lim_ref= limit_ref)
         msg = DrvCanMessageC(addr= id_msg, size= 8, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.CONTROL)
         self.read_can_buffer()
 
     def set_cc_mode(self, ref: int, limit_type: DrvEpcLimitE, limit_ref: int) -> None:
@@ -334,7 +259,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
                                 ref=ref, lim_ref= limit_ref)
         #limit_ref << 32 | ref<<16 | limit_type.value << 4 | 2<<1 | 1
         msg = DrvCanMessageC(addr= id_msg, size= 8, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.CONTROL)
         self.read_can_buffer()
 
     def set_cp_mode(self, ref: int, limit_type: DrvEpcLimitE, limit_ref: int) -> None:
@@ -384,7 +309,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
                                 ref=ref, lim_ref= limit_ref)
         #limit_ref << 32 | ref<<16 | limit_type.value << 4 | 3<<1 | 1
         msg = DrvCanMessageC(addr= id_msg, size= 8, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.CONTROL)
         self.read_can_buffer()
 
     def set_wait_mode(self, limit_ref: int) -> None:
@@ -402,7 +327,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         data_msg= union_control(enable= False, mode= DrvEpcModeE.WAIT, lim_mode= DrvEpcLimitE.TIME,
                                 ref=0, lim_ref= limit_ref)
         msg = DrvCanMessageC(addr= id_msg, size= 8, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.CONTROL)
         self.read_can_buffer()
 
     def disable(self) -> None:
@@ -439,6 +364,37 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         msg = DrvCanMessageC(addr= id_msg, size= 6, payload = data_msg)
         self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
 
+    def set_keepalive(self, enable: bool, period: int = DEFAULT_KEEPALIVE_PERIOD) -> None:
+        """Start or stop the keepalive of the device, a status request sent periodically by
+        the CAN node, without a command for each request. With the user ACK enabled in
+        set_periodic the device resets if it does not receive any message in the ack period,
+        so the ack period has to be longer than the period of the keepalive.
+        Each request is answered with a status message, so the period should be as long as
+        the ack period allows.
+
+        Args:
+            enable (bool): [True to start the keepalive, False to stop it]
+            period (int, optional): [Period of the requests in ms, at least 20 ms].
+                Defaults to DEFAULT_KEEPALIVE_PERIOD.
+
+        Raises:
+            ValueError: Raised when the period is shorter than 20 ms.
+        """
+        id_req = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
+        if enable:
+            if period < _MIN_KEEPALIVE_PERIOD:
+                log.error(f"Keepalive period {period} ms too short, "+
+                          f"min is {_MIN_KEEPALIVE_PERIOD} ms")
+                raise ValueError(f"Keepalive period {period} ms too short, "+
+                                 f"min is {_MIN_KEEPALIVE_PERIOD} ms")
+            keepalive = DrvCanPeriodicC(addr= id_req, size= 1, payload= 2, period= period)
+            self.__send_to_can(DrvCanCmdTypeE.START_PERIODIC, keepalive)
+            self.__keepalive = True
+        elif self.__keepalive:
+            keepalive = DrvCanPeriodicC(addr= id_req, size= 1, payload= 2, period= 0)
+            self.__send_to_can(DrvCanCmdTypeE.STOP_PERIODIC, keepalive)
+            self.__keepalive = False
+
     def set_ls_volt_limit(self, max_lim: int, min_lim: int):
         """Set the Low Side voltage limits on the device.
         Args:
@@ -551,7 +507,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
             raise ValueError((f"Wrong temp limits, should between {EpcConstC.MIN_TEMP} and "
                 f"{EpcConstC.MAX_TEMP} dºC, but has been introduced {min_lim} and {max_lim}"))
 
-    def get_data(self, update: bool = False) -> DrvEpcDataC:
+    def get_data(self, update: bool = False, timeout: float|None = None) -> DrvEpcDataC:
         """Getter to the private attribute of live_data.
         Before returning the info it check if there is any message in can queue
         and update the attributes. If update is false, it won´t send the request messages
@@ -560,18 +516,23 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         Args:
             update (bool): [Choose between (True) sending a request message to the device
                   and update all the data or (False) just read the last updated attributes]
+            timeout (float|None, optional): [Max time in seconds to wait the answers of the
+                  device when update is True, None to return without waiting them].
+                  Defaults to None.
+        Raises:
+            TimeoutError: Raised when the device does not answer all the requests in time.
         Returns:
             [DrvEpcDataC]: [Return ]
         """
-        if update:
-            self.get_elec_meas()
-            self.get_temp_meas()
-            self.get_mode()
-            self.get_status()
+        if update and timeout is not None:
+            self.__request_sync(_DATA_REQUESTS, timeout)
+        elif update:
+            self.__request_data(_DATA_REQUESTS)
         self.read_can_buffer()
         return self.__live_data
 
-    def get_properties(self, update: bool = False) -> DrvEpcPropertiesC:
+    def get_properties(self, update: bool = False,
+                       timeout: float|None = None) -> DrvEpcPropertiesC:
         """Getter to the private attribute of __properties.
         Before returning the info it check if there is any message in can queue
         and update the attributes.
@@ -581,16 +542,18 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         Args:
             update (bool): [Choose between (True) sending a request message to the device
                   and update all the data or (False) just read the last updated attributes]
+            timeout (float|None, optional): [Max time in seconds to wait the answers of the
+                  device when update is True, None to return without waiting them].
+                  Defaults to None.
+        Raises:
+            TimeoutError: Raised when the device does not answer all the requests in time.
         Returns:
             [DrvEpcPropertiesC]: [description]
         """
-        if update:
-            self.get_info()
-            self.get_temp_limits()
-            self.get_hs_volt_limits()
-            self.get_ls_curr_limits()
-            self.get_ls_pwr_limits()
-            self.get_ls_volt_limits()
+        if update and timeout is not None:
+            self.__request_sync(_PROPERTIES_REQUESTS, timeout)
+        elif update:
+            self.__request_data(_PROPERTIES_REQUESTS)
         self.read_can_buffer()
         return self.__properties
 
@@ -603,7 +566,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 0x0
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return DrvEpcPropInfoC(self.__properties.sw_version,
                                ba2int(self.__properties.hw_version),
@@ -620,7 +583,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 1
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
 
         return DrvEpcDataCtrlC(self.__live_data.mode, self.__live_data.ref,
@@ -639,7 +602,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 2
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return self.__live_data.status
 
@@ -657,10 +620,11 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
             id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
             data_msg = 3
             msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-            self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+            self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return DrvEpcDataElectC(self.__live_data.ls_voltage, self.__live_data.ls_current,
-                                self.__live_data.ls_power, self.__live_data.hs_voltage)
+                                self.__live_data.ls_power, self.__live_data.hs_voltage,
+                                self.__live_data.elect_timestamp)
 
     def get_temp_meas(self, periodic_flag: bool = False) -> DrvEpcDataTempC:
         """Get the current temperatures measure of the device.
@@ -676,10 +640,10 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
             id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
             data_msg = 4
             msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-            self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+            self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return DrvEpcDataTempC(self.__live_data.temp_body, self.__live_data.temp_amb,
-                               self.__live_data.temp_anod)
+                               self.__live_data.temp_anod, self.__live_data.temp_timestamp)
 
     def get_ls_volt_limits(self) -> DrvEpcLimitsC:
         """Get the low side voltage limits .
@@ -691,7 +655,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 6
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return self.__properties.ls_volt_limit
 
@@ -705,7 +669,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 7
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return self.__properties.ls_curr_limit
 
@@ -719,7 +683,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 8
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return self.__properties.hs_volt_limit
 
@@ -733,7 +697,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 9
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return self.__properties.ls_pwr_limit
 
@@ -747,7 +711,7 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         id_msg = self.__properties.can_id | _EpcMsgTypeE.REQUEST.value
         data_msg = 0xA
         msg = DrvCanMessageC(addr= id_msg, size= 1, payload = data_msg)
-        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg)
+        self.__send_to_can(DrvCanCmdTypeE.MESSAGE, msg, DrvCanPriorityE.BULK)
         self.read_can_buffer()
         return self.__properties.temp_limit
 
@@ -758,12 +722,20 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
             mask (int): [mask apply to the addr in order to save the can messages]
         """
         # After same test the posix channel needs to have a minimum message size of 150 bytes
-        self.__device_handler = SysShdIpcChanC(name= DEFAULT_RX_CHAN+hex(self.__properties.can_id),
-                                               max_message_size=DEFAULT_MAX_MESSAGE_SIZE,
-                                               max_msg= DEFAULT_MAX_MSG)
+        self.__device_handler = DrvCanChanC(name= DEFAULT_RX_CHAN+hex(self.__properties.can_id),
+                                            max_message_size=DEFAULT_MAX_MESSAGE_SIZE,
+                                            max_msg= DEFAULT_MAX_MSG)
+        self.__resp_handler = DrvCanChanC(name= DEFAULT_RESP_CHAN+hex(self.__properties.can_id),
+                                          max_message_size=DEFAULT_MAX_MESSAGE_SIZE,
+                                          max_msg= DEFAULT_MAX_MSG)
+        # Only the last value of each message is kept, so if the channel gets full the
+        # CAN node discards the older messages with the same id instead of waiting
         open_filter = DrvCanFilterC(addr=self.__properties.can_id,mask= EpcConstC.MASK_CAN_DEVICE,
-                                    chan_name= DEFAULT_RX_CHAN+hex(self.__properties.can_id))
+                                    chan_name= DEFAULT_RX_CHAN+hex(self.__properties.can_id),
+                                    overflow= DrvCanOverflowE.COALESCE)
         self.__send_to_can(DrvCanCmdTypeE.ADD_FILTER, open_filter)
+        # The flight recorder of the CAN node, if enabled, keeps the frames before any error
+        self.__send_to_can(DrvCanCmdTypeE.ADD_TRIGGER, self.__status_trigger())
         # Once the device can receive messages it has to know which hw version has
         # in order to identificate which sensors are present
         self.get_properties(update= True)
@@ -775,12 +747,15 @@ class DrvEpcDeviceC : # pylint: disable= too-many-public-methods
         #Disable periodic messages to avoid jamming the can bus
         self.disable()
         self.set_periodic(ack_en= False, elect_en= False, temp_en= False)
+        self.set_keepalive(False)
         self.read_can_buffer()
         close_filter = DrvCanFilterC(addr=self.__properties.can_id,mask= EpcConstC.MASK_CAN_DEVICE,
                                     chan_name= DEFAULT_RX_CHAN+hex(self.__properties.can_id))
         self.__send_to_can(DrvCanCmdTypeE.REMOVE_FILTER, close_filter)
+        self.__send_to_can(DrvCanCmdTypeE.REMOVE_TRIGGER, self.__status_trigger())
         self.__device_handler.delete_until_last()
         self.__device_handler.terminate()
+        self.__resp_handler.terminate()
 
 #######################             FUNCTIONS              #######################
 
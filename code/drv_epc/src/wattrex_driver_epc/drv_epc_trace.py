@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+"""
+This module decodes traces of the messages of the epc devices into columnar numpy arrays, for the
+offline analysis of long tests.
+numpy is an optional dependency of the package, installed with the extra trace, so this module is
+not imported by the package and has to be imported as wattrex_driver_epc.drv_epc_trace.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+
+#######################         GENERIC IMPORTS          #######################
+from typing import Dict, Iterator, Tuple
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+from system_logger_tool import SysLogLoggerC, sys_log_logger_get_module_logger
+if __name__ == '__main__':
+    cycler_logger = SysLogLoggerC()
+log = sys_log_logger_get_module_logger(__name__)
+
+#######################       THIRD PARTY IMPORTS        #######################
+import numpy as np
+from can_sniffer.can_trace import read_trace
+from can_sniffer.context import DEFAULT_TRACE_CHUNK
+
+#######################          MODULE IMPORTS          #######################
+from .drv_epc_common import EpcConstC
+from .drv_epc_decoder import _EpcMsgTypeE
+#######################          PROJECT IMPORTS         #######################
+
+######################             CONSTANTS              ######################
+# Fields of each type of message: name, first bit, number of bits and signed, with the names of
+# the attributes of the data and properties of the device
+_TRACE_FIELDS: Dict[_EpcMsgTypeE, Tuple[Tuple[str, int, int, bool], ...]] = {
+    _EpcMsgTypeE.MODE: (('enable', 0, 1, False), ('mode', 1, 3, False),
+                        ('lim_mode', 4, 2, False), ('ref', 16, 16, True),
+                        ('lim_ref', 32, 32, True)),
+    _EpcMsgTypeE.REQUEST: (('request', 0, 8, False),),
+    _EpcMsgTypeE.LS_VOLT_LIM: (('max', 0, 16, False), ('min', 16, 16, False)),
+    _EpcMsgTypeE.LS_CURR_LIM: (('max', 0, 16, True), ('min', 16, 16, True)),
+    _EpcMsgTypeE.HS_VOLT_LIM: (('max', 0, 16, False), ('min', 16, 16, False)),
+    _EpcMsgTypeE.LS_PWR_LIM: (('max', 0, 16, True), ('min', 16, 16, True)),
+    _EpcMsgTypeE.TEMP_LIM: (('max', 0, 16, True), ('min', 16, 16, True)),
+    _EpcMsgTypeE.PERIODIC: (('ack_en', 0, 1, False), ('ack_period', 1, 15, False),
+                            ('elect_en', 16, 1, False), ('elect_period', 17, 15, False),
+                            ('temp_en', 32, 1, False), ('temp_period', 33, 15, False)),
+    _EpcMsgTypeE.INFO: (('can_id', 0, 6, False), ('sw_version', 6, 5, False),
+                        ('hw_version', 11, 13, False), ('serial_number', 24, 8, False)),
+    _EpcMsgTypeE.STATUS: (('error', 0, 6, False), ('last_error', 6, 58, False)),
+    _EpcMsgTypeE.ELEC_MEAS: (('ls_voltage', 0, 16, False), ('ls_current', 16, 16, True),
+                             ('hs_voltage', 32, 32, False)),
+    _EpcMsgTypeE.TEMP_MEAS: (('temp_body', 0, 16, True), ('temp_anod', 16, 16, True),
+                             ('temp_amb', 32, 16, True))}
+
+#######################              ENUMS               #######################
+
+#######################             CLASSES              #######################
+
+#######################            FUNCTIONS             #######################
+def decode_epc_trace(timestamp: np.ndarray, addr: np.ndarray, payload: np.ndarray,
+                     can_id: int|None = None) -> Dict[str, Dict[str, np.ndarray]]:
+    '''Decode the messages of the epc devices of a trace, all the messages of each type at once.
+    The payloads are read as little endian 64 bits integers and each field is extracted from
+    all of them with a shift and a mask.
+    The temperatures are decoded even for the sensors the hw version of the device has not, and
+    the periodic configuration with the layout sent by set_periodic.
+
+    Args:
+        timestamp (np.ndarray): Time of each frame.
+        addr (np.ndarray): Id of each frame.
+        payload (np.ndarray): Payload of each frame, uint8 with shape (frames, 8) padded with
+            zeros, as read by can_sniffer.can_trace.read_trace.
+        can_id (int|None, optional): Id of the device, as given to DrvEpcDeviceC, to decode only
+            its messages. With None every frame is decoded as a message of an epc.
+            Defaults to None.
+
+    Returns:
+        Dict[str, Dict[str, np.ndarray]]: Columns of the messages of each type, by the name of
+            the type (MODE, ELEC_MEAS, ...). Each type has the columns timestamp, device with the
+            id of the device, and its fields as int64. ELEC_MEAS has also ls_power as
+            DrvEpcDeviceC computes it.
+    '''
+    if can_id is not None:
+        selected = (addr & EpcConstC.MASK_CAN_DEVICE) == can_id << 4
+        timestamp, addr, payload = timestamp[selected], addr[selected], payload[selected]
+    values = np.ascontiguousarray(payload, dtype= np.uint8).view('<u8')[:, 0]
+    msg_types = addr & EpcConstC.MASK_CAN_MESSAGE
+    result: Dict[str, Dict[str, np.ndarray]] = {}
+    for msg_type, fields in _TRACE_FIELDS.items():
+        selected = msg_types == msg_type.value
+        type_values = values[selected]
+        columns: Dict[str, np.ndarray] = {'timestamp': timestamp[selected],
+                                          'device': (addr[selected] >> 4).astype(np.int64)}
+        for name, first_bit, n_bits, signed in fields:
+            columns[name] = _extract_field(type_values, first_bit, n_bits, signed)
+        result[msg_type.name] = columns
+    elec = result[_EpcMsgTypeE.ELEC_MEAS.name]
+    elec['ls_power'] = np.trunc(elec['ls_current'] * elec['ls_voltage']
+                                / EpcConstC.TO_DECI_WATS).astype(np.int64)
+    return result
+
+def read_epc_trace(file_path: str, can_id: int|None = None, chunk_size: int = DEFAULT_TRACE_CHUNK
+                   ) -> Iterator[Dict[str, Dict[str, np.ndarray]]]:
+    '''Read and decode a trace with the messages of the epc devices in chunks, so the memory used
+    does not depend on the length of the trace.
+
+    Args:
+        file_path (str): Path of the trace, a file of the flight recorder or a log of python-can.
+        can_id (int|None, optional): Id of the device to decode only its messages.
+            Defaults to None.
+        chunk_size (int, optional): Max number of frames of each chunk.
+            Defaults to DEFAULT_TRACE_CHUNK.
+
+    Yields:
+        Dict[str, Dict[str, np.ndarray]]: Columns of the messages of each chunk, as returned by
+            decode_epc_trace.
+    '''
+    for chunk in read_trace(file_path, chunk_size):
+        yield decode_epc_trace(chunk.timestamp, chunk.addr, chunk.payload, can_id)
+
+def _extract_field(values: np.ndarray, first_bit: int, n_bits: int, signed: bool) -> np.ndarray:
+    '''Extract a field of the payloads.
+
+    Args:
+        values (np.ndarray): Payloads as uint64.
+        first_bit (int): First bit of the field.
+        n_bits (int): Number of bits of the field.
+        signed (bool): True if the field is in two's complement.
+
+    Returns:
+        np.ndarray: Values of the field as int64.
+    '''
+    field = ((values >> np.uint64(first_bit)) & np.uint64((1 << n_bits) - 1)).astype(np.int64)
+    if signed:
+        field[field >= 1 << (n_bits - 1)] -= 1 << n_bits
+    return field
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Benchmark of the table-driven decoder of the epc messages. It measures the time to decode the
+periodic measures one by one and in batches, as read from the channel of the device.
+The values decoded are checked by the tests in test_epc_decoder.py.
+Run it from code/drv_epc, as the example.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import os
+import sys
+#######################         GENERIC IMPORTS          #######################
+from logging import CRITICAL
+from random import Random
+from timeit import timeit
+from typing import List
+
+#######################       THIRD PARTY IMPORTS        #######################
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+sys.path.append(os.getcwd())  #get absolute path
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels= '../log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+from can_sniffer import DrvCanMessageC
+from src.wattrex_driver_epc import drv_epc_decoder
+from src.wattrex_driver_epc.drv_epc_decoder import DrvEpcDecoderC
+from src.wattrex_driver_epc.drv_epc_common import DrvEpcDataC, DrvEpcPropertiesC
+
+######################             CONSTANTS              ######################
+_N_FRAMES = 20000
+_N_LOOPS = 20
+_BATCH_SIZE = 50 # Messages read from the channel of the device in each update
+_CAN_ID = 0x3
+_SEED = 1234
+# Messages of the device at run time, mostly periodic measures
+_PERIODIC_TYPES = (0xC, 0xC, 0xC, 0xD, 0xD, 0xD, 0x0, 0xB)
+
+#######################            FUNCTIONS             #######################
+def random_frames(rnd: Random, msg_types: tuple, n_frames: int) -> List[DrvCanMessageC]:
+    """Messages of the device with random payloads and sizes.
+    """
+    frames = []
+    for index in range(n_frames):
+        msg_type = rnd.choice(msg_types)
+        size = rnd.randint(1, 8)
+        payload = bytearray(rnd.getrandbits(8) for _ in range(size))
+        if msg_type == 0x0:
+            # Only the valid modes
+            payload[0] = (payload[0] & 0xF1) | (rnd.randint(0, 5) << 1)
+        frames.append(DrvCanMessageC(addr= (_CAN_ID << 4) | msg_type, size= size,
+                                     payload= payload, timestamp= float(index)))
+    return frames
+
+if __name__ == '__main__':
+    rnd = Random(_SEED)
+    # The decoder logs every limit, info and error message
+    drv_epc_decoder.log.setLevel(CRITICAL)
+    decoder = DrvEpcDecoderC(DrvEpcDataC(), DrvEpcPropertiesC(can_id= _CAN_ID))
+    # All the sensors of temperature present
+    decoder.decode(DrvCanMessageC(addr= (_CAN_ID << 4) | 0xA, size= 4,
+                                  payload= (0xF << 18).to_bytes(4, 'little')))
+    frames = random_frames(rnd, _PERIODIC_TYPES, _N_FRAMES)
+    batches = [frames[index:index + _BATCH_SIZE] for index in range(0, _N_FRAMES, _BATCH_SIZE)]
+    def _single_loop():
+        for msg in frames:
+            decoder.decode(msg)
+    def _batch_loop():
+        for batch in batches:
+            decoder.decode_batch(batch)
+    t_single = timeit(_single_loop, number= _N_LOOPS) / (_N_LOOPS * _N_FRAMES)
+    t_batch = timeit(_batch_loop, number= _N_LOOPS) / (_N_LOOPS * _N_FRAMES)
+    log.info(f"Decode periodic message: one by one {t_single*1e6:.2f} us, "
+             f"in batches of {_BATCH_SIZE} {t_batch*1e6:.2f} us")
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""
+Benchmark of the reading of the messages of an epc device done by get_data, draining the channel
+and decoding the last measure of each type, against the previous reading, which checked if the
+channel was empty before receiving each message and decoded all of them.
+It counts the calls to the IPC queue of each reading, checks that both leave the same data and
+measures their time.
+Run it from code/drv_epc, as the example.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import os
+import sys
+#######################         GENERIC IMPORTS          #######################
+from logging import CRITICAL
+from random import Random
+from time import perf_counter
+from typing import Dict, List
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+sys.path.append(os.getcwd())  #get absolute path
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels= '../log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+from can_sniffer import DrvCanChanC, DrvCanMessageC
+from src.wattrex_driver_epc import drv_epc_decoder
+from src.wattrex_driver_epc.drv_epc_decoder import DrvEpcDecoderC
+from src.wattrex_driver_epc.drv_epc_common import DrvEpcDataC, DrvEpcPropertiesC, DrvEpcStatusC
+from src.wattrex_driver_epc.context import (DEFAULT_MAX_MSG, DEFAULT_MAX_MESSAGE_SIZE,
+                                            DEFAULT_MAX_READS)
+
+######################             CONSTANTS              ######################
+_N_LOOPS = 200
+_CAN_ID = 0x3
+_SEED = 1234
+_CHAN_NAME = 'BENCH_EPC_DRAIN'
+# Messages received between two calls to get_data, mostly periodic measures
+_MSG_TYPES = (0xC, 0xC, 0xC, 0xC, 0xC, 0xC, 0xC, 0xD, 0xD, 0xD, 0xD, 0xD, 0xD, 0xD, 0x0, 0xB)
+
+#######################             CLASSES              #######################
+class _CountingChanC(DrvCanChanC):
+    """Channel that counts the calls to the queue, receive and the number of messages, used
+    by is_empty.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.calls: int = 0
+
+    @property
+    def current_messages(self) -> int:
+        """Number of messages of the queue."""
+        self.calls += 1
+        return DrvCanChanC.current_messages.__get__(self) # pylint: disable= no-member
+
+    def receive(self, *args, **kwargs):
+        self.calls += 1
+        return super().receive(*args, **kwargs)
+
+#######################            FUNCTIONS             #######################
+def legacy_read(chan: DrvCanChanC, decoder: DrvEpcDecoderC) -> None:
+    """Previous reading of DrvEpcDeviceC.read_can_buffer.
+    """
+    if not chan.is_empty():
+        i=0
+        while not chan.is_empty() and i<=DEFAULT_MAX_READS:
+            i = i+1
+            decoder.decode(chan.receive_data())
+
+def drain_read(chan: DrvCanChanC, decoder: DrvEpcDecoderC) -> None:
+    """Current reading of DrvEpcDeviceC.read_can_buffer.
+    """
+    msgs = chan.drain_data(DEFAULT_MAX_READS)
+    if len(msgs) > 0:
+        decoder.decode_batch(msgs)
+
+def snapshot(live_data: DrvEpcDataC) -> Dict[str, object]:
+    """Values of the live data, comparable between two devices.
+    """
+    return {name: (str(value) if isinstance(value, DrvEpcStatusC) else value)
+            for name, value in vars(live_data).items()}
+
+if __name__ == '__main__':
+    # The decoder logs every status with errors
+    drv_epc_decoder.log.setLevel(CRITICAL)
+    rnd = Random(_SEED)
+    msgs: List[DrvCanMessageC] = []
+    for index in range(DEFAULT_MAX_MSG):
+        payload = bytearray(rnd.getrandbits(8) for _ in range(8))
+        payload[0] = (payload[0] & 0xF1) | (rnd.randint(0, 5) << 1)
+        msgs.append(DrvCanMessageC(addr= (_CAN_ID << 4) | rnd.choice(_MSG_TYPES), size= 8,
+                                   payload= payload, timestamp= 1.0 + index * 1e-3))
+    info = DrvCanMessageC(addr= (_CAN_ID << 4) | 0xA, size= 4,
+                          payload= (0xF << 18).to_bytes(4, 'little'))
+    chan = _CountingChanC(name= _CHAN_NAME, max_msg= DEFAULT_MAX_MSG,
+                          max_message_size= DEFAULT_MAX_MESSAGE_SIZE)
+    try:
+        results = {}
+        for name, read in (('legacy', legacy_read), ('drain', drain_read)):
+            live_data = DrvEpcDataC()
+            decoder = DrvEpcDecoderC(live_data, DrvEpcPropertiesC(can_id= _CAN_ID))
+            decoder.decode(info)
+            elapsed = 0.0
+            for _ in range(_N_LOOPS):
+                for msg in msgs:
+                    chan.send_data(msg)
+                chan.calls = 0
+                start = perf_counter()
+                read(chan, decoder)
+                elapsed += perf_counter() - start
+            results[name] = (chan.calls, elapsed / _N_LOOPS, snapshot(live_data))
+        assert results['legacy'][2] == results['drain'][2]
+        log.info(f"Both readings leave the same data with {len(msgs)} messages")
+        for name, (calls, elapsed, _) in results.items():
+            log.info(f"{name}: {calls} IPC calls and {elapsed*1e3:.3f} ms per get_data "
+                     f"with {len(msgs)} messages")
+    finally:
+        chan.terminate()
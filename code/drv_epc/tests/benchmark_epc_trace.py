@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""
+Benchmark of the offline decoding of a trace of epc messages with numpy against decoding each
+message with the decoder of DrvEpcDeviceC.
+It checks that both give the same measures and measures the time per message.
+Run it from code/drv_epc, as the example.
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+import os
+import sys
+#######################         GENERIC IMPORTS          #######################
+from logging import CRITICAL
+from random import Random
+from timeit import timeit
+from typing import List, Tuple
+
+#######################       THIRD PARTY IMPORTS        #######################
+import numpy as np
+
+#######################    SYSTEM ABSTRACTION IMPORTS    #######################
+sys.path.append(os.getcwd())  #get absolute path
+from system_logger_tool import sys_log_logger_get_module_logger, SysLogLoggerC, Logger
+
+#######################       LOGGER CONFIGURATION       #######################
+cycler_logger = SysLogLoggerC(file_log_levels= '../log_config.yaml')
+log: Logger = sys_log_logger_get_module_logger(__name__)
+
+#######################          MODULE IMPORTS          #######################
+from can_sniffer import DrvCanMessageC
+from src.wattrex_driver_epc import drv_epc_decoder
+from src.wattrex_driver_epc.drv_epc_decoder import DrvEpcDecoderC
+from src.wattrex_driver_epc.drv_epc_trace import decode_epc_trace
+from src.wattrex_driver_epc.drv_epc_common import DrvEpcDataC, DrvEpcPropertiesC
+
+######################             CONSTANTS              ######################
+_N_FRAMES = 200000
+_CAN_ID = 0x3
+_SEED = 1234
+# Messages of the device during a test, mostly periodic measures
+_PERIODIC_TYPES = (0xC, 0xC, 0xC, 0xD, 0xD, 0xD, 0x0, 0xB)
+
+#######################            FUNCTIONS             #######################
+def random_trace(rnd: Random, n_frames: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Columns of a trace of the device with random payloads.
+    """
+    addr = np.array([(_CAN_ID << 4) | rnd.choice(_PERIODIC_TYPES) for _ in range(n_frames)],
+                    dtype= np.uint32)
+    payload = np.frombuffer(rnd.randbytes(8 * n_frames), dtype= np.uint8).reshape(-1, 8).copy()
+    # Only the valid modes
+    modes = np.array([rnd.randint(0, 5) for _ in range(n_frames)], dtype= np.uint8)
+    payload[:, 0] = np.where(addr & 0xF == 0, (payload[:, 0] & 0xF1) | (modes << 1),
+                             payload[:, 0])
+    timestamp = np.arange(n_frames, dtype= np.float64) * 1e-3
+    return timestamp, addr, payload
+
+if __name__ == '__main__':
+    # The decoder logs every status with errors
+    drv_epc_decoder.log.setLevel(CRITICAL)
+    timestamp, addr, payload = random_trace(Random(_SEED), _N_FRAMES)
+    msgs = [DrvCanMessageC(addr= int(addr[index]), size= 8, payload= payload[index].tobytes(),
+                           timestamp= float(timestamp[index])) for index in range(_N_FRAMES)]
+    live_data = DrvEpcDataC()
+    decoder = DrvEpcDecoderC(live_data, DrvEpcPropertiesC(can_id= _CAN_ID))
+    # All the sensors of temperature present
+    decoder.decode(DrvCanMessageC(addr= (_CAN_ID << 4) | 0xA, size= 4,
+                                  payload= (0xF << 18).to_bytes(4, 'little')))
+    elec: List[Tuple[int, ...]] = []
+    temp: List[Tuple[int, ...]] = []
+    for msg in msgs:
+        decoder.decode(msg)
+        if msg.addr & 0xF == 0xC:
+            elec.append((live_data.ls_voltage, live_data.ls_current, live_data.hs_voltage,
+                         live_data.ls_power))
+        elif msg.addr & 0xF == 0xD:
+            temp.append((live_data.temp_body, live_data.temp_anod, live_data.temp_amb))
+    trace = decode_epc_trace(timestamp, addr, payload, _CAN_ID)
+    trace_elec, trace_temp = trace['ELEC_MEAS'], trace['TEMP_MEAS']
+    assert elec == list(zip(trace_elec['ls_voltage'].tolist(), trace_elec['ls_current'].tolist(),
+                            trace_elec['hs_voltage'].tolist(), trace_elec['ls_power'].tolist()))
+    assert temp == list(zip(trace_temp['temp_body'].tolist(), trace_temp['temp_anod'].tolist(),
+                            trace_temp['temp_amb'].tolist()))
+    log.info(f"Both decoders give the same measures with {_N_FRAMES} messages")
+
+    def _frame_loop():
+        for msg in msgs:
+            decoder.decode(msg)
+    t_frame = timeit(_frame_loop, number= 1) / _N_FRAMES
+    t_trace = timeit(lambda: decode_epc_trace(timestamp, addr, payload, _CAN_ID),
+                     number= 1) / _N_FRAMES
+    log.info(f"Decode message: one by one {t_frame*1e9:.0f} ns, trace {t_trace*1e9:.0f} ns, "
+             f"speed-up {t_frame/t_trace:.0f}x")
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+"""
+Tests of the decoder of the messages of the epc devices, with fixed payloads of each type of
+message and the values the device encodes in them.
+Run them from the root of the repository:
+    python -m pytest code/drv_epc/tests
+"""
+#######################        MANDATORY IMPORTS         #######################
+from __future__ import annotations
+#######################         GENERIC IMPORTS          #######################
+from logging import ERROR
+from typing import Tuple
+
+#######################       THIRD PARTY IMPORTS        #######################
+import pytest
+from bitarray.util import ba2int
+from can_sniffer import DrvCanMessageC
+
+#######################          MODULE IMPORTS          #######################
+from src.wattrex_driver_epc.drv_epc_decoder import DrvEpcDecoderC
+from src.wattrex_driver_epc.drv_epc_common import (DrvEpcDataC, DrvEpcPropertiesC, DrvEpcLimitsC,
+                DrvEpcLimitE, DrvEpcModeE, EpcConstC)
+
+######################             CONSTANTS              ######################
+_CAN_ID = 0x3
+_TIMESTAMP = 1234.5
+# Type of message, payload and (max, min) of the limits of each type of limits message
+_LIMITS = {
+    'ls_volt_limit': (0x2, 'ec139001', (5100, 400)),
+    # The voltages are unsigned, 40000 mV does not overflow
+    'hs_volt_limit': (0x4, '409cb414', (40000, 5300)),
+    'ls_curr_limit': (0x3, '8c3c74c3', (15500, -15500)),
+    'ls_pwr_limit': (0x5, '2003e0fc', (800, -800)),
+    'temp_limit': (0x6, 'bc0238ff', (700, -200))}
+# Temperatures body -150, anode 325 and ambient -5 dºC
+_TEMP_PAYLOAD = '6aff4501fbff'
+_TEMPS = (-150, 325, -5)
+
+#######################            FUNCTIONS             #######################
+def _frame(msg_type: int, payload: str, timestamp: float = _TIMESTAMP) -> DrvCanMessageC:
+    """Message of the device of a type, with the payload in hexadecimal.
+    """
+    data = bytes.fromhex(payload)
+    return DrvCanMessageC(addr= (_CAN_ID << 4) | msg_type, size= len(data), payload= data,
+                          timestamp= timestamp)
+
+def _info_payload(hw_version: int) -> str:
+    """Payload of the info message with can id 3, fw version 7, serial number 42 and a hw
+    version.
+    """
+    value = _CAN_ID | (7 << 6) | (hw_version << 11) | (42 << 24)
+    return value.to_bytes(4, 'little').hex()
+
+def _new_device() -> Tuple[DrvEpcDecoderC, DrvEpcDataC, DrvEpcPropertiesC]:
+    """Decoder with its live data and its properties, with their own limits, as the default
+    limits are shared by all the properties.
+    """
+    live_data = DrvEpcDataC()
+    properties = DrvEpcPropertiesC(can_id= _CAN_ID,
+        ls_volt_limit= DrvEpcLimitsC(EpcConstC.MAX_LS_VOLT, EpcConstC.MIN_LS_VOLT),
+        ls_curr_limit= DrvEpcLimitsC(EpcConstC.MAX_LS_CURR, EpcConstC.MIN_LS_CURR),
+        ls_pwr_limit= DrvEpcLimitsC(EpcConstC.MAX_LS_PWR, EpcConstC.MIN_LS_PWR),
+        hs_volt_limit= DrvEpcLimitsC(EpcConstC.MAX_HS_VOLT, EpcConstC.MIN_HS_VOLT),
+        temp_limit= DrvEpcLimitsC(EpcConstC.MAX_TEMP, EpcConstC.MIN_TEMP))
+    return DrvEpcDecoderC(live_data, properties), live_data, properties
+
+#######################              TESTS               #######################
+def test_mode() -> None:
+    """Output enabled in CC mode with a power limit, and negative references.
+    """
+    decoder, live_data, _ = _new_device()
+    # Flags 0x35: enabled, mode 2 and limit 3, reference -1500 and limit reference -20000
+    decoder.decode(_frame(0x0, '350024fae0b1ffff'))
+    assert live_data.mode is DrvEpcModeE.CC_MODE
+    assert live_data.lim_mode is DrvEpcLimitE.POWER
+    assert (live_data.ref, live_data.lim_ref) == (-1500, -20000)
+    assert live_data.timestamp == _TIMESTAMP
+
+@pytest.mark.parametrize('attr', list(_LIMITS))
+def test_limits(attr: str) -> None:
+    """The limits messages only carry 4 bytes, max followed by min.
+    """
+    decoder, live_data, properties = _new_device()
+    msg_type, payload, expected = _LIMITS[attr]
+    decoder.decode(_frame(msg_type, payload))
+    limits = getattr(properties, attr)
+    assert (limits.max, limits.min) == expected
+    # The limits are properties, not live data
+    assert live_data.timestamp == 0.0
+
+def test_electric_measures() -> None:
+    """Negative current, and the power truncated towards zero as the previous decoder.
+    """
+    decoder, live_data, _ = _new_device()
+    # 3700 mV, -2500 mA and 12000 mV
+    decoder.decode(_frame(0xC, '740e3cf6e02e0000'))
+    assert (live_data.ls_voltage, live_data.ls_current, live_data.hs_voltage) == \
+           (3700, -2500, 12000)
+    assert live_data.ls_power == -92
+    assert live_data.elect_timestamp == live_data.timestamp == _TIMESTAMP
+
+@pytest.mark.parametrize('hw_version, sensors', [
+        (0x000, (False, False, False)),
+        (0x200, (True, False, False)),
+        (0x080, (False, True, False)),
+        (0x100, (False, True, False)),
+        (0x400, (False, False, True)),
+        (0x780, (True, True, True))],
+    ids= ['none', 'body', 'anode bit 7', 'anode bit 8', 'ambient', 'all'])
+def test_info_and_temperatures(hw_version: int, sensors: Tuple[bool, bool, bool]) -> None:
+    """The info message sets the hw version, and only the sensors of temperature it has are
+    updated by the temperature measures.
+    """
+    decoder, live_data, properties = _new_device()
+    decoder.decode(_frame(0xA, _info_payload(hw_version)))
+    assert properties.can_id == _CAN_ID << 4
+    assert properties.sw_version == 7
+    assert ba2int(properties.hw_version) == hw_version
+    assert properties.serial_number == '42'
+    decoder.decode(_frame(0xD, _TEMP_PAYLOAD, _TIMESTAMP + 1))
+    temps = (live_data.temp_body, live_data.temp_anod, live_data.temp_amb)
+    assert temps == tuple(temp if present else None for temp, present in zip(_TEMPS, sensors))
+    assert live_data.temp_timestamp == _TIMESTAMP + 1
+
+def test_hw_version_changed() -> None:
+    """A new info message changes the sensors of the next temperature measures.
+    """
+    decoder, live_data, _ = _new_device()
+    decoder.decode(_frame(0xA, _info_payload(0x200)))
+    decoder.decode(_frame(0xD, _TEMP_PAYLOAD))
+    decoder.decode(_frame(0xA, _info_payload(0x400)))
+    decoder.decode(_frame(0xD, '0a00000014000000'))
+    assert (live_data.temp_body, live_data.temp_anod, live_data.temp_amb) == (-150, None, 20)
+
+def test_status(caplog: pytest.LogCaptureFixture) -> None:
+    """Each error flag of the status register is logged with the last error raised.
+    """
+    decoder, live_data, _ = _new_device()
+    # HS voltage and LS current errors, last error 17
+    with caplog.at_level(ERROR):
+        decoder.decode(_frame(0xB, '4504'))
+    assert live_data.status.error_code == 5
+    assert [record.getMessage() for record in caplog.records] == \
+           ["HS voltage error", "LS current error", "Last rised error: 17"]
+    caplog.clear()
+    with caplog.at_level(ERROR):
+        decoder.decode(_frame(0xB, '00'))
+    assert live_data.status.error_code == 0
+    assert not caplog.records
+
+@pytest.mark.parametrize('msg_type', [0x1, 0x8], ids= ['request', 'unknown'])
+def test_errors(msg_type: int, caplog: pytest.LogCaptureFixture) -> None:
+    """The requests sent back by the device and the unknown types are logged as errors and do
+    not change the live data.
+    """
+    decoder, live_data, _ = _new_device()
+    with caplog.at_level(ERROR):
+        decoder.decode(_frame(msg_type, '0102'))
+    assert len(caplog.records) == 1
+    assert vars(live_data) == vars(_new_device()[1])